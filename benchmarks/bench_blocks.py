@@ -0,0 +1,271 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import argparse
+import csv
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from datetime import datetime, timedelta
+from dev_slack import activity_stats, activity_store, functions, home_page, modals, search
+
+SIZES = (2, 3, 4, 5, 6)
+BUTTONS = ['ΚΑΤΑΣΤΑΤΙΚΟ ΣΥΛΛΟΓΟΥ', 'ΑΡΧΕΙΟ ΟΙ ΑΙΤΗΣΕΙΣ ΜΑΣ ', 'ΤΗΛΕΦΩΝΑ ΕΠΙΚΟΙΝΩΝΙΑΣ',
+           'ΠΡΑΚΤΙΚΑ ΓΕΝΙΚΩΝ ΣΥΝΕΛΕΥΣΕΩΝ']
+
+
+def generate(directory, records, seed=0):
+    """
+    Writes synthetic 'requests.json', 'meetings.json' and 'statistic_records.csv' files of 'records' records.
+
+    The requests carry every stage of 'functions.display_status()', the meetings are grouped by year with
+    three fields each, and the activity records are spread over about sqrt(records) users, the way a
+    growing club adds members more slowly than clicks.
+
+    Parameters:
+    directory (str): The directory the 'data' folder is created in.
+    records (int): The number of records of each file.
+    seed (int, optional): The seed of the random generator. Defaults to 0.
+    """
+
+    rng = random.Random(seed)
+    data = os.path.join(directory, 'data')
+    os.makedirs(data, exist_ok=True)
+    start = datetime(2020, 1, 1)
+
+    requests = {}
+    for n in range(records):
+        day = (start + timedelta(days=n % 1500)).strftime('%d/%m/%Y')
+        requests[f'{n + 1}/{2020 + n % 5}'] = {
+            'name': f'αίτηση {rng.choice(["στέγης", "οργάνων", "εκδήλωσης", "χρηματοδότησης"])} {n}',
+            'management_a': day,
+            'management_b': day,
+            'municipality_a': f'{n + 1}',
+            'municipality_b': day,
+            'municipality_c': day,
+            'municipality_d': day,
+            'onedrive_link_a': f'https://onedrive.example.com/request/{n}',
+            'onedrive_pin_a': f'{rng.randrange(10000):04d}',
+        }
+    with open(os.path.join(data, 'requests.json'), 'w', encoding='utf-8') as file:
+        json.dump(requests, file, ensure_ascii=False)
+
+    meetings = {}
+    for n in range(records):
+        meetings.setdefault(f'ΓΕΝΙΚΕΣ ΣΥΝΕΛΕΥΣΕΙΣ {2000 + n % 25}', {})[f'ΣΥΝΕΛΕΥΣΗ {n + 1}'] = {
+            'ΗΜΕΡΟΜΗΝΙΑ': (start + timedelta(days=n)).strftime('%d/%m/%Y'),
+            'ΘΕΜΑ': f'Θέμα συνέλευσης {n + 1}',
+            'ΠΡΑΚΤΙΚΑ': f'https://onedrive.example.com/meeting/{n}',
+        }
+    with open(os.path.join(data, 'meetings.json'), 'w', encoding='utf-8') as file:
+        json.dump(meetings, file, ensure_ascii=False)
+
+    users = max(1, int(records ** 0.5))
+    with open(os.path.join(data, 'statistic_records.csv'), 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow([*activity_store.CSV_HEADER, 'key', 'date'])
+        for n in range(records):
+            user = rng.randrange(users)
+            button = rng.choice(BUTTONS)
+            writer.writerow([f'U{user:08d}', f'https://example.com/avatar/{user}.png', f'Χρήστης {user}',
+                             button, f'{n + 1}/2024' if button.startswith('ΑΡΧΕΙΟ') else '',
+                             start + timedelta(minutes=n)])
+
+
+def builders():
+    """
+    Returns the builders under test, as (name, function, size) tuples.
+
+    Every function builds its blocks from the files of the current directory, 'size' returns the number of
+    blocks (or options) of its result. The caches of the app are reset by the 'cold' builders only.
+    """
+
+    event = {'user': 'U00000000'}
+
+    def load_requests_cold():
+        functions.archive.version = None
+        return functions.load_requests()
+
+    def activity_stats_load_cold():
+        activity_stats.aggregator = activity_stats.StatisticsAggregator(activity_store.CsvActivityStore())
+        activity_stats.load()
+        return activity_stats.snapshot()
+
+    def display_status():
+        requests = functions.load_requests()
+        return functions.display_status(requests, next(reversed(requests)))
+
+    def meetings_cold():
+        modals.meetings.version = None
+        return modals.meetings_page(0)
+
+    def search_cold():
+        search.archive_search = search.ArchiveSearch()
+        return search.search('στέγης 12')
+
+    def format_data_for_slack():
+        with open('data/meetings.json', 'r') as file:
+            return modals.format_data_for_slack(json.load(file))
+
+    return [
+        ('functions.load_requests (cold)', load_requests_cold, len),
+        ('functions.display_status', display_status, len),
+        ('functions.request_options (typeahead)', lambda: functions.request_options('στεγ 1'), len),
+        ('modals.format_data_for_slack', format_data_for_slack, len),
+        ('modals.meetings_page (cold)', meetings_cold, lambda view: len(view['blocks'])),
+        ('modals.meetings_page', lambda: modals.meetings_page(1), lambda view: len(view['blocks'])),
+        ('search.search (cold index)', search_cold, len),
+        ('search.search', lambda: search.search('στέγης 12'), len),
+        ('activity_stats.load (cold)', activity_stats_load_cold, lambda stats: stats['total']),
+        ('home_page.expose_statistics', home_page.expose_statistics, len),
+        ('home_page.run (super user)', lambda: home_page.run(event, True, True), lambda view: len(view['blocks'])),
+    ]
+
+
+def measure(function, repeat=3):
+    """
+    Times and memory-profiles one builder.
+
+    The number of calls per timing is picked by 'timeit.Timer.autorange()', the best of 'repeat' timings is kept.
+    The peak memory is traced over a single call.
+
+    Returns:
+    dict: The seconds per call (best and median), the calls per timing, the peak memory in KiB and the result.
+    """
+
+    gc.collect()
+    tracemalloc.start()
+    result = function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    timings = sorted(total / number for total in timer.repeat(repeat, number))
+    return {
+        'seconds': timings[0],
+        'median': timings[len(timings) // 2],
+        'calls': number,
+        'peak_kib': round(peak / 1024, 1),
+    }, result
+
+
+def environment():
+    """
+    Returns the machine, interpreter and commit the results were taken on.
+    """
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ''
+    return {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+    }
+
+
+def run(sizes=SIZES, only=None, repeat=3):
+    """
+    Generates the inputs of every size and measures every builder on them.
+
+    Parameters:
+    sizes (tuple, optional): The exponents of the input sizes, 10 ** size records. Defaults to 2 through 6.
+    only (list, optional): The names of the builders to measure. Defaults to all of them.
+    repeat (int, optional): The timings per builder and size. Defaults to 3.
+
+    Returns:
+    dict: The environment and one result per builder and size.
+    """
+
+    results = []
+    cwd = os.getcwd()
+    for size in sizes:
+        records = 10 ** size
+        with tempfile.TemporaryDirectory(prefix='bench_blocks_') as directory:
+            started = time.perf_counter()
+            generate(directory, records)
+            print(f"10^{size} records generated in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+            os.chdir(directory)
+            try:
+                functions.archive = functions.RequestArchive()
+                activity_stats.aggregator = activity_stats.StatisticsAggregator(activity_store.CsvActivityStore())
+                activity_stats.load()
+                for name, function, output in builders():
+                    if only and name not in only:
+                        continue
+                    timing, result = measure(function, repeat)
+                    results.append({'builder': name, 'records': records, 'size': output(result), **timing})
+                    del result
+                    print(f"{name:<34} 10^{size}  {timing['seconds'] * 1e3:12.3f} ms/call  "
+                          f"{timing['peak_kib']:12.1f} KiB peak", file=sys.stderr)
+            finally:
+                os.chdir(cwd)
+    return {'environment': environment(), 'results': results}
+
+
+def compare(baseline, current, threshold=1.2):
+    """
+    Prints the change of every builder and size against a baseline run and returns the regressions.
+
+    Parameters:
+    baseline (dict): A previous output of 'run()'.
+    current (dict): The current output of 'run()'.
+    threshold (float, optional): The slowdown (or memory growth) ratio reported as a regression. Defaults to 1.2.
+
+    Returns:
+    list: The (builder, records, metric, ratio) of every regression.
+    """
+
+    previous = {(item['builder'], item['records']): item for item in baseline['results']}
+    regressions = []
+    for item in current['results']:
+        before = previous.get((item['builder'], item['records']))
+        if not before:
+            continue
+        for metric in ('seconds', 'peak_kib'):
+            ratio = item[metric] / before[metric] if before[metric] else 1.0
+            flag = ''
+            if ratio > threshold:
+                regressions.append((item['builder'], item['records'], metric, ratio))
+                flag = '  <-- REGRESSION'
+            print(f"{item['builder']:<34} {item['records']:>8}  {metric:<9} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time and memory-profile the block builders at growing input sizes.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES), help='exponents, 10^size records')
+    parser.add_argument('--builder', action='append', help='repeat to measure only some builders')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='the JSON file the results are written to')
+    parser.add_argument('--compare', help='a previous JSON output to compare against')
+    parser.add_argument('--threshold', type=float, default=1.2, help='the ratio reported as a regression')
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, args.builder, args.repeat)
+    output = args.output or f"bench_blocks-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2, ensure_ascii=False)
+    print(f"Results written to {output}", file=sys.stderr)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)
+        if compare(baseline, report, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.bench_blocks --sizes 2 3 4 --output before.json
+    # python -m benchmarks.bench_blocks --sizes 2 3 4 --compare before.json
+    main()
@@ -0,0 +1,138 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import os
+import timeit
+from dev_slack import home_page
+
+
+def uncached(event, admin):
+    """
+    Builds the Home tab view with a copy of the body of 'home_page.run()' before the role templates,
+    which rebuilt every static block on each call. The super user statistics are left out.
+    """
+
+    part_a = f"""
+\tΣκοπός του Συλλόγου είναι η υποστήριξη της Δημοτικής :musical_note:Φιλαρμονικής της πόλης της Νεάπολης Λασιθίου, η διάδοση, ανάδειξη και παραγωγή πολιτιστικών δραστηριοτήτων, στην ευρύτερη περιοχή του Δήμου Αγίου Νικολάου, η συνεργασία με άλλα ομοειδή σωματεία, σε όλη την επικράτεια, η συνένωση όλων των κατοίκων της Νεάπολης σε μια μαζική οργάνωση για την ανάδειξη των δραστηριοτήτων της :notes:Φιλαρμονικής της πόλης, η βελτίωση και καλυτέρευση της πολιτιστικής και κοινωνικής ζωής των κατοίκων της Νεάπολης με κάθε πρόσφορο μέσο, η μελέτη, προώθηση και επίλυση κάθε θέματος που αφορά την μουσική δραστηριότητα στην πόλη.
+"""
+    part_b = f"""
+\tΤα μέσα για την επίτευξη του παραπάνω μη κερδοσκοπικού σκοπού είναι κυρίως: η παροχή :handshake: κάθε είδους βοήθειας και δη οικονομικής :moneybag: και υλικοτεχνικής στην Φιλαρμονική της Νεάπολης, όπως όργανα :musical_keyboard:, στολές, κ.λ.π, η πραγματοποίηση πολιτιστικών εκδηλώσεων και ειδικότερα μουσικών συναυλιών :microphone:, η ενεργή συμμετοχή στις κάθε είδους εκδηλώσεις που αφορούν εθνικές επετείους :calendar:, θρησκευτικές εορτές :church: και δημοτικές εκδηλώσεις, και κάθε εν γένει δραστηριότητα που προσιδιάζει στην φύση και τον προορισμό του Συλλόγου ως πολιτιστικού :museum: με γνώμονα πάντα την πνευματική ανάπτυξη της πόλης της Νεάπολης καθώς και κάθε άλλη νομική :scales: ή υλική πράξη που κρίνεται αναγκαία από τα αρμόδια όργανα για την επίτευξη των στόχων του Σωματείου :dart:.
+"""
+    part_c = f"""
+\tΓια την πληρέστερη :dart: επιτυχία των επιδιώξεών του, το σωματείο θα επιδιώκει τη συνεργασία :handshake: με όλα τα ομοειδή Σωματεία της ευρύτερης περιοχής του Νομού Λασιθίου, με τον Δήμο Αγίου Νικολάου:office: , τη Δημοτική Κοινότητα Νεάπολης:cityscape: και εν γένει φορείς οι οποίοι έχουν στο καταστατικό τους κοινούς ή όμοιους σκοπούς:flags:.
+"""
+    part_d = f""":gear: Ακολουθήστε μας:  \t<{os.getenv('FACEBOOK_LINK')}|:facebook: Facebook >
+"""
+    katastatiko = f""":gear: ΚΑΤΑΣΤΑΤΙΚΟ  \t<{os.getenv('KATASTATIKO')}|:pdf: ONLINE HERE >
+:pushpin: Only Administrators can see this section."""
+    mitroo = f""":gear: ΜΗΤΡΩΟ ΜΕΛΩΝ ΣΥΛΛΟΓΟΥ  \t<{os.getenv('MHTRO')}|:excel: ONLINE HERE>
+:pushpin: Only Administrators can see this section."""
+
+    sections = [
+        home_page.create_section(part_a),
+        # home_page.create_section(part_b),
+        # home_page.create_section(part_c),
+        home_page.create_section(part_d),
+    ]
+
+    sections_flat = [section for section_tuple in sections for section in section_tuple]
+
+    blocks = [
+        {
+            "type": "section",
+            "text": {
+                "type": "mrkdwn",
+                "text": f" *:rocket: Καλώς Ορίσατε, <@{event['user']}> :house: στο κανάλι μας*\n\n\n\n"
+                        "*:wave:Σύντομος Χαιρετισμός, ο Σκοπός του Συλλόγου μας*"
+            }
+        }, *sections_flat,
+        {
+            "type": "divider"
+        },
+        {
+            "type": "actions",
+            "elements": [
+                {
+                    "type": "button",
+                    "text": {"type": "plain_text", "text": ":link: ΤΗΛΕΦΩΝΑ ΕΠΙΚΟΙΝΩΝΙΑΣ", "emoji": True},
+                    "style": "primary",
+                    "value": "approve",
+                    "action_id": "reuest_phones",
+                },
+            ],
+        },
+        {
+            "type": "divider"
+        },
+    ]
+    # block_id, text, image, button_text, action_id
+
+    a = """
+>:card_index_dividers: *ΑΡΧΕΙΟ ΟΙ ΑΙΤΗΣΕΙΣ ΜΑΣ*
+    """
+    b = """
+>:card_index_dividers: *ΠΡΑΚΤΙΚΑ ΓΕΝΙΚΩΝ ΣΥΝΕΛΕΥΣΕΩΝ*
+    """
+    c = """
+>:card_index_dividers: *ΠΡΑΚΤΙΚΑ Δ.Σ.*
+        """
+    d = """
+> :card_index_dividers: *ΒΙΒΛΙΟ ΕΣΟΔΩΝ ΕΞΟΔΩΝ*
+        """
+    e = """
+> :card_index_dividers: *ΒΙΒΛΙΟ ΠΕΡΙΟΥΣΙΑΚΩΝ ΣΤΟΙΧΕΙΩΝ*
+        """
+    f = """
+> :card_index_dividers: *ΠΡΩΤΟΚΟΛΛΟ ΑΛΛΗΛΟΓΡΑΦΙΑΣ*
+        """
+    admin_buttons_texts_ids = [
+        (0, "block_id_c", a, os.getenv('FILARMONIKI_LOGO'), "ΑΣ ΞΕΚΙΝΗΣΟΥΜΕ",
+         "request_arxeio"),
+        (0, "block_id_d", b, os.getenv('AGIOS_NIKOLAOS_LOGO'), "ΑΣ ΞΕΚΙΝΗΣΟΥΜΕ",
+         "request_sinelefsi"),
+        (0, "block_id_e", c, os.getenv('FILARMONIKI_LOGO'), "ΑΣ ΞΕΚΙΝΗΣΟΥΜΕ",
+         "request_ds"),
+        (0, "block_id_f", d, os.getenv('FILARMONIKI_LOGO'), "ΑΣ ΞΕΚΙΝΗΣΟΥΜΕ",
+         "request_money"),
+        (0, "block_id_g", e, os.getenv('FILARMONIKI_LOGO'), "ΑΣ ΞΕΚΙΝΗΣΟΥΜΕ",
+         "request_periousia"),
+        (0, "block_id_h", f, os.getenv('FILARMONIKI_LOGO'), "ΑΣ ΞΕΚΙΝΗΣΟΥΜΕ",
+         "request_protocol"),
+    ]
+
+    if admin:
+        a = home_page.create_section(katastatiko, 1)
+        blocks.extend(a,)
+        b = home_page.create_section(mitroo, 1)
+        blocks.extend(b)
+        for simple, block_id, text, image, button_text, action_id in admin_buttons_texts_ids:
+            action_block = home_page.create_block(simple, block_id, text, image, button_text, action_id)
+            blocks.extend(action_block)
+
+    return {
+        "type": "home",
+        "blocks": blocks
+    }
+
+
+def run(number=10000):
+    """
+    Times the per-call cost of the Home tab view with and without the prebuilt role templates.
+
+    The statistics section of super users is left out, it is the same in both cases.
+
+    Parameters:
+    number (int, optional): The number of calls timed for each case. Defaults to 10000.
+    """
+    event = {'user': 'U00000000'}
+    home_page.build_templates()
+    for role, admin in (('regular', False), ('admin', True)):
+        assert uncached(event, admin) == home_page.run(event, admin, False)
+        before = timeit.timeit(lambda: uncached(event, admin), number=number) / number
+        after = timeit.timeit(lambda: home_page.run(event, admin, False), number=number) / number
+        print(f"{role:<8} before: {before * 1e6:8.2f} us/call  after: {after * 1e6:8.2f} us/call  "
+              f"speedup: {before / after:5.1f}x")
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.bench_home_page
+    run()
@@ -0,0 +1,354 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import argparse
+import hashlib
+import hmac
+import http.client
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from urllib.parse import urlencode, urlsplit
+from benchmarks.slack_stub import SlackStub
+
+ACTIONS = ['request_katastatiko', 'request_arxeio', 'reuest_phones', 'request_sinelefsi', 'meetings_page_next',
+           'archive_step_b', 'search_open_request']
+SCENARIOS = ['app_home_opened', 'message', *[f'action:{action}' for action in ACTIONS], 'options:archive_step_b',
+             'view:button_archive_step_b', 'shortcut:search_archive', 'view:search_archive']
+
+
+def sign(secret, body, timestamp=None):
+    """
+    Returns the headers Slack signs a request with, as verified by Bolt.
+
+    Parameters:
+    secret (str): The signing secret of the app, SLACK_SECRET.
+    body (bytes): The body of the request.
+    timestamp (int, optional): The request timestamp. Defaults to now.
+
+    Returns:
+    dict: The 'X-Slack-Request-Timestamp' and 'X-Slack-Signature' headers.
+    """
+
+    timestamp = str(int(timestamp or time.time()))
+    base = b'v0:' + timestamp.encode() + b':' + body
+    signature = hmac.new(secret.encode(), base, hashlib.sha256).hexdigest()
+    return {'X-Slack-Request-Timestamp': timestamp, 'X-Slack-Signature': f'v0={signature}'}
+
+
+def _event(event):
+    body = {
+        'token': 'load-test',
+        'team_id': 'T00000000',
+        'api_app_id': 'A00000000',
+        'type': 'event_callback',
+        'event_id': f'Ev{uuid.uuid4().hex[:12].upper()}',
+        'event_time': int(time.time()),
+        'event': event,
+    }
+    return 'application/json', json.dumps(body).encode('utf-8')
+
+
+def _interaction(payload):
+    payload = {
+        'token': 'load-test',
+        'api_app_id': 'A00000000',
+        'team': {'id': 'T00000000', 'domain': 'stub'},
+        'trigger_id': f'{int(time.time())}.{uuid.uuid4().hex[:10]}',
+        'is_enterprise_install': False,
+        **payload,
+    }
+    return 'application/x-www-form-urlencoded', urlencode({'payload': json.dumps(payload)}).encode('utf-8')
+
+
+def payload(scenario, user, protocol=''):
+    """
+    Builds the body of a synthetic Slack request for one of the listeners of main.py.
+
+    Parameters:
+    scenario (str): One of SCENARIOS: 'app_home_opened', 'message', 'action:<action_id>', 'options:<action_id>',
+                    'shortcut:<callback_id>' or 'view:<callback_id>'.
+    user (str): The ID of the user sending the request.
+    protocol (str, optional): The request protocol selected in the archive modal. Defaults to ''.
+
+    Returns:
+    tuple: The content type and the body (bytes) of the request.
+    """
+
+    ts = f'{time.time():.6f}'
+    user_object = {'id': user, 'username': user, 'name': user, 'team_id': 'T00000000'}
+    if scenario == 'app_home_opened':
+        return _event({'type': 'app_home_opened', 'user': user, 'channel': 'D00000000', 'tab': 'home',
+                       'event_ts': ts})
+    if scenario == 'message':
+        return _event({'type': 'message', 'channel': 'C00000000', 'user': user, 'text': 'load test',
+                       'ts': ts, 'event_ts': ts, 'channel_type': 'channel'})
+    kind, name = scenario.split(':', 1)
+    selected = {'type': 'external_select', 'selected_option': {'value': protocol,
+                                                               'text': {'type': 'plain_text', 'text': protocol}}}
+    if kind == 'action':
+        if name == 'archive_step_b':
+            action = {'action_id': name, 'block_id': 'archive', **selected, 'action_ts': ts}
+            container = {'type': 'view', 'view_id': 'V00000000'}
+            view = {'id': 'V00000000', 'type': 'modal', 'callback_id': 'button_archive_step_b'}
+        elif name == 'meetings_page_next':
+            action = {'action_id': name, 'block_id': 'meetings_pages', 'type': 'button', 'value': '1', 'action_ts': ts}
+            container = {'type': 'view', 'view_id': 'V00000002'}
+            view = {'id': 'V00000002', 'type': 'modal', 'hash': ts}
+        elif name == 'search_open_request':
+            action = {'action_id': name, 'type': 'button', 'value': protocol, 'action_ts': ts}
+            container = {'type': 'view', 'view_id': 'V00000003'}
+            view = {'id': 'V00000003', 'type': 'modal', 'callback_id': 'search_archive', 'hash': ts}
+        else:
+            action = {'action_id': name, 'block_id': 'home', 'type': 'button', 'value': name, 'action_ts': ts}
+            container = {'type': 'view', 'view_id': 'V00000001'}
+            view = {'id': 'V00000001', 'type': 'home'}
+        return _interaction({'type': 'block_actions', 'user': user_object, 'container': container,
+                             'view': view, 'actions': [action]})
+    if kind == 'options':
+        # what the user typed in the archive picker, the protocol or a few letters of a request name
+        return _interaction({'type': 'block_suggestion', 'user': user_object, 'action_id': name,
+                             'block_id': 'archive', 'value': protocol or 'αίτ',
+                             'view': {'id': 'V00000000', 'type': 'modal', 'callback_id': 'button_archive_step_b'}})
+    if kind == 'shortcut':
+        return _interaction({'type': 'shortcut', 'callback_id': name, 'user': user_object, 'action_ts': ts})
+    if kind == 'view' and name == 'search_archive':
+        values = {'search': {'query': {'type': 'plain_text_input', 'value': protocol or 'αίτηση'}}}
+        return _interaction({'type': 'view_submission', 'user': user_object,
+                             'view': {'id': 'V00000003', 'type': 'modal', 'callback_id': name, 'hash': ts,
+                                      'private_metadata': '', 'state': {'values': values}}})
+    if kind == 'view':
+        return _interaction({'type': 'view_submission', 'user': user_object,
+                             'view': {'id': 'V00000000', 'type': 'modal', 'callback_id': name, 'hash': ts,
+                                      'private_metadata': '',
+                                      'state': {'values': {'archive': {'archive_step_b': selected}}}}})
+    raise ValueError(f'Unknown scenario: {scenario}')
+
+
+def percentile(values, q):
+    """
+    Returns the q-th percentile (0-100) of the sorted list 'values', by the nearest rank.
+    """
+
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, round(q / 100 * len(values)) - 1))]
+
+
+class LoadTest:
+    """
+    Fires signed synthetic Slack requests at '/slack/events' and measures the acknowledgements.
+
+    'concurrency' worker threads each keep one connection to the app and send requests back to back,
+    cycling through the scenarios, until 'requests' requests have been sent. The latency of a request
+    is the time until its response (Bolt's ack) is read, any response other than 200 is an error.
+
+    Parameters:
+    url (str): The URL of the '/slack/events' endpoint.
+    secret (str): The signing secret of the app.
+    scenarios (list, optional): The scenarios to send. Defaults to every scenario of SCENARIOS.
+    users (int, optional): The number of distinct synthetic users. Defaults to 50.
+    protocol (str, optional): The request protocol selected in the archive modal. Defaults to ''.
+    timeout (float, optional): Seconds to wait for a response. Defaults to 10.
+    """
+
+    def __init__(self, url, secret, scenarios=None, users=50, protocol='', timeout=10.0):
+        self.url = urlsplit(url)
+        self.secret = secret
+        self.scenarios = scenarios or SCENARIOS
+        self.users = [f'U{n:08d}' for n in range(max(1, users))]
+        self.protocol = protocol
+        self.timeout = timeout
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        return http.client.HTTPConnection(self.url.netloc, timeout=self.timeout)
+
+    def _worker(self, jobs):
+        connection = self._connect()
+        for n in jobs:
+            scenario = self.scenarios[n % len(self.scenarios)]
+            content_type, body = payload(scenario, self.users[n % len(self.users)], self.protocol)
+            headers = {'Content-Type': content_type, **sign(self.secret, body)}
+            started = time.perf_counter()
+            try:
+                connection.request('POST', self.url.path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = self._connect()
+                ok = False
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                if ok:
+                    self.latencies[scenario].append(elapsed)
+                else:
+                    self.errors[scenario] += 1
+        connection.close()
+
+    def run(self, requests=1000, concurrency=10):
+        """
+        Sends the requests and returns the report.
+
+        Parameters:
+        requests (int, optional): The total number of requests. Defaults to 1000.
+        concurrency (int, optional): The number of requests in flight. Defaults to 10.
+
+        Returns:
+        dict: The report, see 'report()'.
+        """
+
+        counter = itertools.count()
+        jobs = iter(lambda: next(counter), requests)
+        lock = threading.Lock()
+
+        def shared_jobs():
+            while True:
+                with lock:
+                    n = next(jobs, None)
+                if n is None:
+                    return
+                yield n
+
+        workers = [threading.Thread(target=self._worker, args=(shared_jobs(),)) for _ in range(max(1, concurrency))]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return self.report(time.perf_counter() - started)
+
+    def report(self, seconds):
+        """
+        Summarizes the run.
+
+        Parameters:
+        seconds (float): The duration of the run.
+
+        Returns:
+        dict: The totals (requests, errors, error rate, throughput) and, per scenario, the number
+              of requests, the errors and the p50, p90, p99 and max ack latency in milliseconds.
+        """
+
+        scenarios = {}
+        for scenario in self.scenarios:
+            values = sorted(self.latencies[scenario])
+            errors = self.errors[scenario]
+            scenarios[scenario] = {
+                'requests': len(values) + errors,
+                'errors': errors,
+                **{f'p{q}': round(percentile(values, q) * 1000, 2) for q in (50, 90, 99)},
+                'max': round(values[-1] * 1000, 2) if values else 0.0,
+            }
+        requests = sum(item['requests'] for item in scenarios.values())
+        errors = sum(item['errors'] for item in scenarios.values())
+        everything = sorted(itertools.chain.from_iterable(self.latencies.values()))
+        return {
+            'requests': requests,
+            'errors': errors,
+            'error_rate': round(errors / requests, 4) if requests else 0.0,
+            'seconds': round(seconds, 3),
+            'throughput': round(requests / seconds, 1) if seconds else 0.0,
+            **{f'p{q}': round(percentile(everything, q) * 1000, 2) for q in (50, 90, 99)},
+            'scenarios': scenarios,
+        }
+
+
+def print_report(report):
+    print(f"{'scenario':<34}{'requests':>9}{'errors':>8}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for scenario, item in report['scenarios'].items():
+        print(f"{scenario:<34}{item['requests']:>9}{item['errors']:>8}{item['p50']:>9.2f}{item['p90']:>9.2f}"
+              f"{item['p99']:>9.2f}{item['max']:>9.2f}")
+    print(f"\n{report['requests']} requests in {report['seconds']}s: {report['throughput']} req/s, "
+          f"error rate {report['error_rate']:.2%}, p50 {report['p50']} ms, p90 {report['p90']} ms, "
+          f"p99 {report['p99']} ms")
+
+
+def spawn(port, stub, secret, startup=30.0):
+    """
+    Starts a local instance of main.py with uvicorn, its outbound Slack calls sent to the stub.
+
+    The environment of the harness is passed on, so e.g. SLACK_ASYNC_MODE or REPORT_DIGEST apply to the instance.
+
+    Returns:
+    subprocess.Popen: The server process, once '/status' answers.
+    """
+
+    env = {
+        'SLACK_TOKEN': 'xoxb-load-test',
+        'SLACK_ADMINISTRATORS': '',
+        'SLACK_SUPER_USERS': '',
+        **os.environ,
+        'SLACK_SECRET': secret,
+        'SLACK_API_URL': stub.url,
+    }
+    server = subprocess.Popen([sys.executable, '-m', 'uvicorn', 'main:api', '--host', '127.0.0.1',
+                               '--port', str(port), '--log-level', 'warning'], env=env)
+    deadline = time.monotonic() + startup
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f'The app exited with code {server.returncode}')
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/status')
+            if connection.getresponse().status == 200:
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError('The app did not start in time')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test of the /slack/events endpoint with signed payloads.')
+    parser.add_argument('--url', help='the /slack/events URL of a running instance, instead of spawning one')
+    parser.add_argument('--port', type=int, default=3201, help='the port of the spawned instance')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS, help='repeat to pick scenarios')
+    parser.add_argument('--protocol', default='', help='the request protocol selected in the archive modal')
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds added to every stub Slack call')
+    parser.add_argument('--secret', default=os.getenv('SLACK_SECRET') or 'load-test-secret')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args(argv)
+
+    stub = server = None
+    url = args.url
+    if not url:
+        stub = SlackStub(latency=args.latency).start()
+        server = spawn(args.port, stub, args.secret)
+        url = f'http://127.0.0.1:{args.port}/slack/events'
+    try:
+        report = LoadTest(url, args.secret, args.scenario, args.users, args.protocol).run(args.requests,
+                                                                                          args.concurrency)
+        if stub:
+            # let the queued activity reports reach the stub before its calls are counted
+            time.sleep(1)
+            report['slack_calls'] = stub.stats()
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=30)
+        if stub:
+            stub.stop()
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_report(report)
+        if 'slack_calls' in report:
+            print(f"Slack calls answered by the stub: {report['slack_calls']}")
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.load_test --requests 2000 --concurrency 20
+    main()
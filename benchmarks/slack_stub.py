@@ -0,0 +1,116 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import json
+import threading
+import time
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlsplit
+
+
+def slack_response(method, params):
+    """
+    Returns the body of a successful answer of the Slack Web API method 'method'.
+
+    Only the fields read by the app are filled in, every other method answers {'ok': True}.
+
+    Parameters:
+    method (str): The Web API method, e.g. 'chat.postMessage'.
+    params (dict): The arguments of the call.
+
+    Returns:
+    dict: The body of the response.
+    """
+
+    now = f'{time.time():.6f}'
+    if method == 'auth.test':
+        return {'ok': True, 'url': 'https://stub.slack.com/', 'team': 'stub', 'user': 'bot',
+                'team_id': 'T00000000', 'user_id': 'U0000BOT0', 'bot_id': 'B00000000'}
+    if method == 'users.info':
+        user = params.get('user', 'U00000000')
+        return {'ok': True, 'user': {'id': user, 'name': user, 'real_name': f'Load Test {user}',
+                                     'profile': {'real_name': f'Load Test {user}',
+                                                 'image_original': 'https://stub.slack.com/avatar.png'}}}
+    if method in ('chat.postMessage', 'chat.update'):
+        return {'ok': True, 'channel': params.get('channel'), 'ts': params.get('ts') or now}
+    if method in ('conversations.history', 'conversations.replies'):
+        return {'ok': True, 'messages': [], 'has_more': False}
+    if method in ('views.open', 'views.publish', 'views.update', 'views.push'):
+        return {'ok': True, 'view': {'id': 'V00000000', 'hash': now}}
+    return {'ok': True}
+
+
+class SlackStub:
+    """
+    A local stand-in for the Slack Web API, used by the load test harness.
+
+    Every call to '/api/<method>' is answered with 'slack_response()' after 'latency' seconds and counted
+    per method, so a local instance of the app can be driven without reaching Slack. Start the app with
+    SLACK_API_URL set to 'url' to send its outbound calls here.
+
+    Parameters:
+    host (str, optional): The interface to listen on. Defaults to '127.0.0.1'.
+    port (int, optional): The port to listen on. Defaults to 0, a free port.
+    latency (float, optional): Seconds added to every answer, to mimic the round trip to Slack. Defaults to 0.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0):
+        stub = self
+        self.latency = latency
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                url = urlsplit(self.path)
+                method = url.path.rsplit('/', 1)[-1]
+                raw = self.rfile.read(int(self.headers.get('Content-Length') or 0)).decode('utf-8')
+                if self.headers.get('Content-Type', '').startswith('application/json'):
+                    params = json.loads(raw or '{}')
+                else:
+                    params = {key: values[0] for key, values in parse_qs(raw).items()}
+                # the AsyncWebClient sends some methods, e.g. users.info, as GET with a query string
+                params.update({key: values[0] for key, values in parse_qs(url.query).items()})
+                with stub._lock:
+                    stub.calls[method] += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                body = json.dumps(slack_response(method, params)).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.url = f'http://{host}:{self.server.server_port}/api/'
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name='slack-stub', daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def stats(self):
+        with self._lock:
+            return dict(self.calls)
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.slack_stub [port] [latency]
+    import sys
+
+    stub = SlackStub(port=int(sys.argv[1]) if len(sys.argv) > 1 else 3300,
+                     latency=float(sys.argv[2]) if len(sys.argv) > 2 else 0.0)
+    print(f"Slack stub listening on {stub.url}")
+    stub.server.serve_forever()
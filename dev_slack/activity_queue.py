@@ -0,0 +1,276 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import asyncio
+import logging
+import os
+import queue
+import threading
+from dev_slack import config, reports
+
+config.load()
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = int(os.getenv('ACTIVITY_QUEUE_SIZE', 1000))
+WORKERS = int(os.getenv('ACTIVITY_WORKERS', 2))
+
+_queue = queue.Queue(maxsize=QUEUE_SIZE)
+_workers = []
+_async_queue = None
+_async_workers = []
+_lock = threading.Lock()
+_stop = object()
+# set by 'drain()' and 'drain_async()', so a report queued during the shutdown cannot restart the pool
+_closing = False
+_counters = {
+    'enqueued': 0,
+    'processed': 0,
+    'failed': 0,
+    'dropped': 0,
+}
+
+
+def _count(name):
+    with _lock:
+        _counters[name] += 1
+
+
+def _refuse(logger, text):
+    _count('dropped')
+    logger.warning(f"Activity queue is closed, report '{text}' dropped")
+    return False
+
+
+def _worker(jobs):
+    """
+    Consumes activity reports from 'jobs' until the stop marker is received.
+
+    Every job is handed to 'reports.button_reports()'. Errors are logged and counted,
+    they never stop the worker.
+    """
+
+    while True:
+        job = jobs.get()
+        try:
+            if job is _stop:
+                return
+            body, client, job_logger, text, key = job
+            try:
+                reports.button_reports(body, client, job_logger, text, key)
+                _count('processed')
+            except Exception as e:
+                _count('failed')
+                logger.error(f"Error reporting button activity: {e}")
+        finally:
+            jobs.task_done()
+
+
+def _start(workers):
+    # the caller holds '_lock'
+    if any(worker.is_alive() for worker in _workers):
+        return
+    _workers.clear()
+    for i in range(max(1, workers)):
+        worker = threading.Thread(target=_worker, args=(_queue,), name=f'activity-worker-{i}', daemon=True)
+        worker.start()
+        _workers.append(worker)
+
+
+def start(workers=WORKERS):
+    """
+    Starts the worker pool that publishes the queued activity reports.
+
+    Calling this function while the pool is already running has no effect. A queue closed by 'drain()'
+    is opened again.
+
+    Parameters:
+    workers (int, optional): The number of worker threads. Defaults to ACTIVITY_WORKERS (2).
+    """
+
+    global _closing
+    with _lock:
+        _closing = False
+        _start(workers)
+
+
+def enqueue(body, client, logger, text, key=None):
+    """
+    Queues a button activity report and returns immediately.
+
+    The report is published later by the worker pool, so the listener thread is released
+    as soon as the job is stored. When the queue is full, or closed by 'drain()', the report is
+    dropped and counted, the interactive path is never blocked.
+
+    Parameters:
+    body (dict): A dictionary with Slack's action payload.
+    client (any): Slack client that contains methods to interact with Slack API.
+    logger (any): An instance of a logging class for logging purposes.
+    text (str): The text or description of the interaction to be reported.
+    key (str, optional): An optional key related to the interaction.
+
+    Returns:
+    bool: True if the report was queued, False if it was dropped.
+    """
+
+    # the job is queued under the lock, so it is either ahead of the stop markers of 'drain()' or refused
+    with _lock:
+        if not _closing:
+            _start(WORKERS)
+            try:
+                _queue.put_nowait((body, client, logger, text, key))
+                _counters['enqueued'] += 1
+                return True
+            except queue.Full:
+                _counters['dropped'] += 1
+                logger.warning(f"Activity queue is full, report '{text}' dropped")
+                return False
+    return _refuse(logger, text)
+
+
+def drain(timeout=10):
+    """
+    Publishes the pending reports and stops the worker pool.
+
+    The stop marker is queued behind the pending jobs, so every report accepted before the
+    call is still processed. The queue is closed first, reports queued during the drain are
+    dropped and counted instead of starting a new pool. Workers that do not finish within
+    'timeout' seconds are left behind as daemon threads.
+
+    Parameters:
+    timeout (float, optional): Seconds to wait for the workers to finish. Defaults to 10.
+    """
+
+    global _closing
+    with _lock:
+        _closing = True
+        workers = list(_workers)
+        _workers.clear()
+    for _ in workers:
+        try:
+            _queue.put(_stop, timeout=timeout)
+        except queue.Full:
+            logger.error("Activity queue did not drain in time")
+            break
+    for worker in workers:
+        worker.join(timeout=timeout)
+
+
+async def _async_worker(jobs):
+    """
+    Consumes activity reports from the asyncio queue 'jobs' until the stop marker is received.
+
+    Every job is awaited with 'reports.button_reports_async()'. Errors are logged and counted,
+    they never stop the worker.
+    """
+
+    while True:
+        job = await jobs.get()
+        try:
+            if job is _stop:
+                return
+            body, client, job_logger, text, key = job
+            try:
+                await reports.button_reports_async(body, client, job_logger, text, key)
+                _count('processed')
+            except Exception as e:
+                _count('failed')
+                logger.error(f"Error reporting button activity: {e}")
+        finally:
+            jobs.task_done()
+
+
+def start_async(workers=WORKERS):
+    """
+    Starts the worker tasks that publish the queued activity reports in the async Bolt mode.
+
+    Must be called from the running event loop. Calling it while the tasks are running has no effect.
+    A queue closed by 'drain_async()' is opened again.
+
+    Parameters:
+    workers (int, optional): The number of worker tasks. Defaults to ACTIVITY_WORKERS (2).
+    """
+
+    global _closing
+    _closing = False
+    _start_async(workers)
+
+
+def _start_async(workers):
+    global _async_queue
+    if any(not worker.done() for worker in _async_workers):
+        return
+    _async_queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    _async_workers.clear()
+    for i in range(max(1, workers)):
+        _async_workers.append(asyncio.create_task(_async_worker(_async_queue), name=f'activity-worker-{i}'))
+
+
+def enqueue_async(body, client, logger, text, key=None):
+    """
+    Queues a button activity report for the async worker tasks and returns immediately.
+
+    The async Bolt mode counterpart of 'enqueue()', with the same arguments and the same
+    drop-on-overflow behaviour. Reports queued during 'drain_async()' are dropped as well.
+
+    Returns:
+    bool: True if the report was queued, False if it was dropped.
+    """
+
+    if _closing:
+        return _refuse(logger, text)
+    _start_async(WORKERS)
+    try:
+        _async_queue.put_nowait((body, client, logger, text, key))
+    except asyncio.QueueFull:
+        _count('dropped')
+        logger.warning(f"Activity queue is full, report '{text}' dropped")
+        return False
+    _count('enqueued')
+    return True
+
+
+async def drain_async(timeout=10):
+    """
+    Publishes the pending reports and stops the worker tasks of the async Bolt mode.
+
+    The queue is closed first, see 'drain()'.
+
+    Parameters:
+    timeout (float, optional): Seconds to wait for the workers to finish. Defaults to 10.
+    """
+
+    global _closing
+    _closing = True
+    workers = list(_async_workers)
+    jobs = _async_queue
+    _async_workers.clear()
+    if not workers:
+        return
+    try:
+        for _ in workers:
+            await asyncio.wait_for(jobs.put(_stop), timeout)
+        await asyncio.wait_for(asyncio.gather(*workers), timeout)
+    except asyncio.TimeoutError:
+        logger.error("Activity queue did not drain in time")
+        for worker in workers:
+            worker.cancel()
+
+
+def stats():
+    """
+    Returns the current state of the activity queue.
+
+    Returns:
+    dict: The queue depth and capacity, the number of running workers and the
+          enqueued, processed, failed and dropped counters.
+    """
+
+    with _lock:
+        counters = dict(_counters)
+        workers = sum(worker.is_alive() for worker in _workers)
+    workers += sum(not worker.done() for worker in _async_workers)
+    return {
+        'depth': _queue.qsize() + (_async_queue.qsize() if _async_queue else 0),
+        'capacity': QUEUE_SIZE,
+        'workers': workers,
+        **counters,
+    }
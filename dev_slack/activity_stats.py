@@ -0,0 +1,131 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import threading
+from collections import Counter, defaultdict
+from dev_slack import activity_store
+
+
+class StatisticsAggregator:
+    """
+    Keeps the button press statistics of the activity store in memory.
+
+    The totals are rebuilt once by reading the store from the last stored cursor (a byte offset for the
+    CSV store, a row id for the SQLite store), and afterwards every new record updates the per button,
+    per user and per (user, button) counters in place. The store is only read again when it grew outside
+    'append()', e.g. by another worker of the production mode, in which case just the new records are read.
+
+    Parameters:
+    store (CsvActivityStore | SqliteActivityStore, optional): The activity store.
+                                                              Defaults to 'activity_store.get_store()'.
+    """
+
+    def __init__(self, store=None):
+        self._store = store
+        self.cursor = 0
+        self.loaded = False
+        self.total = 0
+        self.buttons = Counter()
+        self.users = Counter()
+        self.user_buttons = defaultdict(Counter)
+        self.user_images = {}
+        self.user_ids = {}
+        self._lock = threading.RLock()
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = activity_store.get_store()
+        return self._store
+
+    def _add(self, id, user_image, user_name, button, presses=1):
+        self.total += presses
+        self.buttons[button] += presses
+        self.users[user_name] += presses
+        self.user_buttons[user_name][button] += presses
+        self.user_images[user_name] = user_image
+        self.user_ids.setdefault(user_name, id)
+
+    def refresh(self):
+        """
+        Reads the records stored after the last cursor and adds them to the counters.
+        """
+
+        with self._lock:
+            self.loaded = True
+            rows, self.cursor = self.store.read_since(self.cursor)
+            for row in rows:
+                self._add(*row)
+
+    def load(self):
+        """
+        Builds the counters from the store, once. Later calls have no effect.
+        """
+
+        with self._lock:
+            if not self.loaded:
+                self.refresh()
+
+    def append(self, id, user_image, user_name, button, key, date):
+        """
+        Appends a record to the store and adds it to the counters.
+
+        Records written by another writer since the last read are read first, so the stored cursor
+        always points at the end of the store after the write. The lock of the store is held from the
+        read to the write, so no record of another worker can slip in between and be skipped.
+        """
+
+        with self._lock, self.store.lock:
+            self.load()
+            if self.store.cursor() != self.cursor:
+                self.refresh()
+            self.cursor = self.store.append(id, user_image, user_name, button, key, date)
+            self._add(id, user_image, user_name, button)
+
+    def snapshot(self):
+        """
+        Returns a consistent copy of the counters, including the records stored by other workers.
+
+        Returns:
+        dict: The total presses, the presses per button, per user and per (user, button),
+              and the last image and the first ID recorded for each user.
+        """
+
+        with self._lock:
+            self.load()
+            if self.store.cursor() != self.cursor:
+                self.refresh()
+            return {
+                'total': self.total,
+                'buttons': dict(self.buttons),
+                'users': dict(self.users),
+                'user_buttons': {user: dict(buttons) for user, buttons in self.user_buttons.items()},
+                'user_images': dict(self.user_images),
+                'user_ids': dict(self.user_ids),
+            }
+
+
+aggregator = StatisticsAggregator()
+
+
+def load():
+    """
+    Builds the in-memory statistics from the activity store. Meant to be called once at startup.
+    """
+
+    aggregator.load()
+
+
+def record(id, user_image, user_name, button, key, date):
+    """
+    Appends a button press to the activity store and updates the in-memory statistics.
+    """
+
+    aggregator.append(id, user_image, user_name, button, key, date)
+
+
+def snapshot():
+    """
+    Returns a copy of the in-memory statistics, see 'StatisticsAggregator.snapshot()'.
+    """
+
+    return aggregator.snapshot()
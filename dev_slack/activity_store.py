@@ -0,0 +1,283 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import csv
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+from dev_slack import config, file_lock
+
+config.load()
+
+CSV_FILE = 'data/statistic_records.csv'
+SQLITE_FILE = 'data/activity.sqlite3'
+CSV_HEADER = ['id', 'user_image', 'username', 'report']
+
+
+def _timestamp(date):
+    return date.isoformat(' ') if isinstance(date, datetime) else str(date)
+
+
+class CsvActivityStore:
+    """
+    Activity store backed by the headerless 'statistic_records.csv' file.
+
+    The cursor of this store is a byte offset in the file, so new records can be read by
+    parsing only the tail that was appended after a given offset. Writers hold 'lock', a lock file
+    shared by the workers of the production mode, so their appends never interleave.
+
+    Parameters:
+    path (str, optional): The path of the CSV file. Defaults to 'data/statistic_records.csv'.
+    """
+
+    def __init__(self, path=CSV_FILE):
+        self.path = path
+        self.lock = file_lock.FileLock(f'{path}.lock')
+
+    def cursor(self):
+        """
+        Returns the current end of the store, the size of the file in bytes.
+        """
+
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def append(self, id, user_image, user_name, button, key, date):
+        """
+        Appends a record to the file and returns the new cursor.
+        """
+
+        with open(self.path, mode='a', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow([id, user_image, user_name, button, key, date])
+            return file.tell()
+
+    def read_since(self, cursor=0):
+        """
+        Reads the records appended after 'cursor'.
+
+        Only complete lines are consumed, a partially written last line is left for the next read.
+
+        Parameters:
+        cursor (int, optional): The byte offset to read from. Defaults to 0.
+
+        Returns:
+        tuple: A list of (id, user_image, username, button, presses) rows and the new cursor.
+        """
+
+        if not os.path.exists(self.path):
+            return [], cursor
+        with open(self.path, 'rb') as file:
+            file.seek(cursor)
+            data = file.read()
+        end = data.rfind(b'\n') + 1
+        rows = []
+        for row in csv.reader(data[:end].decode('utf-8').splitlines()):
+            if len(row) < 4 or (cursor == 0 and row[:4] == CSV_HEADER):
+                continue
+            rows.append((*row[:4], 1))
+        return rows, cursor + end
+
+
+class SqliteActivityStore:
+    """
+    Activity store backed by a local SQLite database in WAL mode.
+
+    Every record is kept in the 'activity' table, indexed on (user, button, created), and the daily
+    rollup table 'daily_user_button' is updated in the same transaction. The statistics are loaded by
+    summing the rollup, so their cost depends on the number of days, users and buttons, not on the number
+    of clicks, and are then kept up to date in memory by 'activity_stats' from the newer rows only.
+    The cursor of this store is the last 'activity' row id.
+    Writers hold 'lock', a lock file shared by the workers of the production mode, see 'CsvActivityStore'.
+
+    Parameters:
+    path (str, optional): The path of the database file. Defaults to 'data/activity.sqlite3'.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS activity (
+            id INTEGER PRIMARY KEY,
+            user TEXT NOT NULL,
+            user_image TEXT,
+            username TEXT,
+            button TEXT NOT NULL,
+            key TEXT,
+            created TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_activity_user_button_created ON activity (user, button, created);
+        CREATE TABLE IF NOT EXISTS daily_user_button (
+            day TEXT NOT NULL,
+            user TEXT NOT NULL,
+            button TEXT NOT NULL,
+            presses INTEGER NOT NULL,
+            PRIMARY KEY (day, user, button)
+        );
+        CREATE TABLE IF NOT EXISTS users (
+            user TEXT PRIMARY KEY,
+            username TEXT,
+            user_image TEXT
+        );
+        CREATE TABLE IF NOT EXISTS migrations (
+            source TEXT PRIMARY KEY,
+            rows INTEGER NOT NULL,
+            imported TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, path=SQLITE_FILE):
+        self.path = path
+        self.lock = file_lock.FileLock(f'{path}.lock')
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.executescript(self.SCHEMA)
+
+    def _query(self, sql, parameters=()):
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    def _insert(self, rows):
+        self._connection.executemany(
+            "INSERT INTO activity (user, user_image, username, button, key, created) VALUES (?, ?, ?, ?, ?, ?)",
+            rows)
+        self._connection.executemany(
+            "INSERT INTO daily_user_button (day, user, button, presses) VALUES (substr(?, 1, 10), ?, ?, 1) "
+            "ON CONFLICT (day, user, button) DO UPDATE SET presses = presses + 1",
+            [(row[5], row[0], row[3]) for row in rows])
+        self._connection.executemany(
+            "INSERT INTO users (user, username, user_image) VALUES (?, ?, ?) "
+            "ON CONFLICT (user) DO UPDATE SET username = excluded.username, user_image = excluded.user_image",
+            [(row[0], row[2], row[1]) for row in rows])
+
+    def cursor(self):
+        """
+        Returns the current end of the store, the id of the last 'activity' row.
+        """
+
+        return self._query("SELECT COALESCE(MAX(id), 0) FROM activity")[0][0]
+
+    def append(self, id, user_image, user_name, button, key, date):
+        """
+        Stores a record, updates the daily rollup and returns the new cursor.
+        """
+
+        with self._lock:
+            self._connection.execute('BEGIN IMMEDIATE')
+            try:
+                self._insert([(id, user_image, user_name, button, key, _timestamp(date))])
+                cursor = self._connection.execute("SELECT MAX(id) FROM activity").fetchone()[0]
+                self._connection.execute('COMMIT')
+            except Exception:
+                self._connection.execute('ROLLBACK')
+                raise
+        return cursor
+
+    def read_since(self, cursor=0):
+        """
+        Reads the totals of the records stored after 'cursor'.
+
+        From the start of the store the totals are summed from the daily rollup, otherwise only
+        the newer 'activity' rows are grouped.
+
+        Parameters:
+        cursor (int, optional): The row id to read from. Defaults to 0.
+
+        Returns:
+        tuple: A list of (id, user_image, username, button, presses) rows and the new cursor.
+        """
+
+        with self._lock:
+            # one read transaction, so a row appended by another worker in between is neither in the
+            # rollup nor below the returned cursor, and is read once by the next call
+            self._connection.execute('BEGIN')
+            try:
+                end = self._connection.execute("SELECT COALESCE(MAX(id), 0) FROM activity").fetchone()[0]
+                if cursor == 0:
+                    rows = self._connection.execute(
+                        "SELECT r.user, u.user_image, u.username, r.button, SUM(r.presses) "
+                        "FROM daily_user_button r LEFT JOIN users u ON u.user = r.user "
+                        "GROUP BY r.user, r.button").fetchall()
+                else:
+                    rows = self._connection.execute(
+                        "SELECT a.user, u.user_image, u.username, a.button, COUNT(*) "
+                        "FROM activity a LEFT JOIN users u ON u.user = a.user "
+                        "WHERE a.id > ? GROUP BY a.user, a.button", (cursor,)).fetchall()
+            finally:
+                self._connection.execute('COMMIT')
+        return rows, end
+
+    def import_csv(self, path=CSV_FILE):
+        """
+        Imports the records of a legacy 'statistic_records.csv' file, once.
+
+        The import is recorded in the 'migrations' table, so importing the same file again has no effect.
+
+        Parameters:
+        path (str, optional): The path of the CSV file. Defaults to 'data/statistic_records.csv'.
+
+        Returns:
+        int: The number of imported records, 0 if the file was already imported or does not exist.
+        """
+
+        source = os.path.abspath(path)
+        if not os.path.exists(path) or self._query("SELECT 1 FROM migrations WHERE source = ?", (source,)):
+            return 0
+        with self.lock:
+            return self._import_csv(path, source)
+
+    def _import_csv(self, path, source):
+        # checked again under the lock, another worker may have imported the file meanwhile
+        if self._query("SELECT 1 FROM migrations WHERE source = ?", (source,)):
+            return 0
+        rows = []
+        with open(path, 'r', encoding='utf-8', newline='') as file:
+            for i, row in enumerate(csv.reader(file)):
+                if len(row) < 6 or (i == 0 and row[:4] == CSV_HEADER):
+                    continue
+                rows.append((row[0], row[1], row[2], row[3], row[4] or None, row[5]))
+        with self._lock:
+            self._connection.execute('BEGIN IMMEDIATE')
+            try:
+                self._insert(rows)
+                self._connection.execute("INSERT INTO migrations (source, rows, imported) VALUES (?, ?, ?)",
+                                         (source, len(rows), _timestamp(datetime.now())))
+                self._connection.execute('COMMIT')
+            except Exception:
+                self._connection.execute('ROLLBACK')
+                raise
+        return len(rows)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """
+    Returns the process-wide activity store selected by the 'ACTIVITY_STORE' setting.
+
+    'sqlite' (the default) opens 'data/activity.sqlite3' and imports an existing
+    'statistic_records.csv' on first use, 'csv' keeps writing to 'statistic_records.csv'.
+
+    Returns:
+    CsvActivityStore | SqliteActivityStore: The activity store.
+    """
+
+    global _store
+    with _store_lock:
+        if _store is None:
+            if os.getenv('ACTIVITY_STORE', 'sqlite') == 'csv':
+                _store = CsvActivityStore()
+            else:
+                _store = SqliteActivityStore()
+                _store.import_csv()
+        return _store
+
+
+if __name__ == "__main__":
+    # python -m dev_slack.activity_store [statistic_records.csv] [activity.sqlite3]
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else CSV_FILE
+    sqlite_path = sys.argv[2] if len(sys.argv) > 2 else SQLITE_FILE
+    imported = SqliteActivityStore(sqlite_path).import_csv(csv_path)
+    print(f"{imported} records imported from {csv_path} into {sqlite_path}")
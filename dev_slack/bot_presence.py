@@ -1,6 +1,15 @@
 #  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
 
-from dev_slack import slack_todo, channels
+import os
+from dev_slack import config, slack_todo, channels, file_lock
+
+config.load()
+
+# posts the ONLINE / OFFLINE status message from the lifespan of main.py, off by default
+ENABLED = os.getenv('BOT_PRESENCE', 'false').lower() in ('1', 'true', 'yes')
+PRESENCE_LOCK = 'data/presence.lock'
+
+_presence = file_lock.FileLock(PRESENCE_LOCK)
 
 
 def initialize_button(represent):
@@ -34,7 +43,8 @@ def initialize_button(represent):
 def set_status(represent, cid):
     """
     Function to set a status in a specific Slack channel.
-    The previous status (if any) is deleted before the new one is set.
+    The previous status (if any) is deleted before the new one is set. The previous status is found
+    through the message index of the bot's messages, the channel history is only read on a miss.
 
     Args:
         represent (str): The representational text used to generate the Slack message button.
@@ -56,3 +66,57 @@ def set_status(represent, cid):
         print(f"An error occurred While Trying to Send a Message in Channel {channels.channels[cid]}: {e}")
     finally:
         print(f"BOT ACTION SEND: {channels.channels[cid]}")
+
+
+async def set_status_async(represent, cid):
+    """
+    Function to set a status in a specific Slack channel, on the AsyncWebClient.
+    The asynchronous counterpart of 'set_status()', used in the async Bolt mode.
+
+    Args:
+        represent (str): The representational text used to generate the Slack message button.
+        cid : The channel id where the status is being set.
+
+    Returns:
+        None
+    """
+    # imported here, the async client needs aiohttp which the sync mode does not
+    from dev_slack import slack_todo_async
+
+    try:
+        await slack_todo_async.delete_with_specific_text(channel_id=channels.channels_id[cid], text="ONLINE OFFLINE")
+    except Exception as e:
+        print(f"An error occurred While Trying To Delete Specific Message from Channel {channels.channels[cid]}: {e}")
+    finally:
+        print(f"BOT ACTION DELETE: {channels.channels[cid]}")
+    btn = initialize_button(represent)
+    try:
+        await slack_todo_async.send_text("ONLINE OFFLINE", channels.channels_id[cid], btn)
+    except Exception as e:
+        print(f"An error occurred While Trying to Send a Message in Channel {channels.channels[cid]}: {e}")
+    finally:
+        print(f"BOT ACTION SEND: {channels.channels[cid]}")
+
+
+def claim():
+    """
+    Decides whether this process posts the bot status.
+
+    Every worker of the production mode runs the lifespan of main.py, but only the first one to start
+    may post the status, or the channel would get one ONLINE message per worker. The chosen worker holds
+    the lock file 'data/presence.lock' until 'release()' (or until it dies), the others skip the status.
+
+    Returns:
+    bool: True if this process holds the status and should post it.
+    """
+
+    return ENABLED and _presence.acquire(blocking=False)
+
+
+def release():
+    """
+    Lets another worker post the status, once this process has posted its OFFLINE status.
+    """
+
+    if _presence.locked():
+        _presence.release()
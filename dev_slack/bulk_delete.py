@@ -0,0 +1,217 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from slack_sdk.errors import SlackApiError
+from dev_slack import config, message_index, retry
+from dev_slack.cache import TTLCache
+
+config.load()
+logger = logging.getLogger(__name__)
+
+WORKERS = int(os.getenv('BULK_DELETE_WORKERS', 4))
+RATE = float(os.getenv('BULK_DELETE_RATE', 2))
+BURST = int(os.getenv('BULK_DELETE_BURST', 10))
+PAGE_SIZE = 200
+MAX_ATTEMPTS = 5
+# how long an interrupted run can be resumed from its checkpoint
+CHECKPOINT_TTL = float(os.getenv('BULK_DELETE_CHECKPOINT_TTL', 600))
+
+
+class TokenBucket:
+    """
+    A thread safe token bucket that limits the rate of API calls.
+
+    Tokens are added at 'rate' per second up to 'capacity'. When Slack answers with a rate limit
+    error, 'pause()' stops every caller until the 'Retry-After' delay has passed.
+
+    Parameters:
+    rate (float): The number of tokens added per second, above 0.
+    capacity (int): The maximum number of tokens, the size of a burst.
+
+    Raises:
+    ValueError: If 'rate' is not above 0 or 'capacity' is below 1.
+    """
+
+    def __init__(self, rate, capacity):
+        if not rate > 0:
+            raise ValueError(f"The rate of a token bucket must be above 0, not {rate}")
+        if capacity < 1:
+            raise ValueError(f"The capacity of a token bucket must be at least 1, not {capacity}")
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until a token is available and takes it.
+        """
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """
+        Stops handing out tokens for 'seconds' and empties the bucket.
+        """
+
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+
+
+class BulkDeleter:
+    """
+    Deletes messages of a channel concurrently, under a token bucket that honours 'Retry-After'.
+
+    The channel history is read one page at a time, newest first, with the 'latest' bound set to the oldest
+    message read so far. After each page the deleter keeps a checkpoint of the channel: the oldest message
+    before which every message was handled, deleted or not removable. A message that could not be deleted
+    holds the checkpoint back, so a run that is interrupted and resumed with 'resume=True' goes back to it
+    instead of reading the history from the top again. Checkpoints belong to the deleter, are dropped when a
+    run completes and expire after BULK_DELETE_CHECKPOINT_TTL seconds (600).
+
+    Parameters:
+    client (WebClient): Slack client used for 'chat.delete'.
+    history (function): Streams the channel history, see 'slack_todo.iter_history()'. It has to raise when a page
+                        cannot be read, a history that just ends would complete the run and drop its checkpoint.
+    workers (int, optional): The number of concurrent deletions. Defaults to BULK_DELETE_WORKERS (4).
+    rate (float, optional): The deletions per second. Defaults to BULK_DELETE_RATE (2).
+    burst (int, optional): The deletions allowed in a burst. Defaults to BULK_DELETE_BURST (10).
+    progress (function, optional): Called with the progress dictionary after every page. Defaults to logging it.
+    """
+
+    def __init__(self, client, history, workers=WORKERS, rate=RATE, burst=BURST, progress=None):
+        self.client = client
+        self.history = history
+        self.workers = workers
+        self.bucket = TokenBucket(rate, burst)
+        self.progress = progress or self.log_progress
+        self.deleted = 0
+        self.failed = 0
+        self.rate_limited = 0
+        self.started = None
+        self._checkpoints = TTLCache(maxsize=64, ttl=CHECKPOINT_TTL)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def log_progress(report):
+        logger.info(f"DELETING SLACK MESSAGES: {report['deleted']} deleted, {report['failed']} failed, "
+                    f"{report['per_second']:.1f}/s")
+
+    def report(self):
+        """
+        Returns the progress of the run.
+
+        Returns:
+        dict: The deleted and failed messages, the rate limit hits, the elapsed seconds and the deletions per second.
+        """
+
+        elapsed = time.monotonic() - self.started if self.started else 0.0
+        return {
+            'deleted': self.deleted,
+            'failed': self.failed,
+            'rate_limited': self.rate_limited,
+            'seconds': round(elapsed, 3),
+            'per_second': self.deleted / elapsed if elapsed else 0.0,
+        }
+
+    def delete(self, channel_id, ts):
+        """
+        Deletes one message, waiting for a token first and retrying after rate limit errors.
+
+        Returns:
+        bool: True if the message was deleted, False otherwise.
+        """
+
+        for _ in range(MAX_ATTEMPTS):
+            self.bucket.acquire()
+            try:
+                self.client.chat_delete(channel=channel_id, ts=ts)
+                message_index.forget(channel_id, ts)
+                with self._lock:
+                    self.deleted += 1
+                return True
+            except SlackApiError as e:
+                if e.response['error'] != 'ratelimited':
+                    logger.error(f"Error deleting message: {e}")
+                    break
+                with self._lock:
+                    self.rate_limited += 1
+                retry.count('chat_delete', 'retries')
+                self.bucket.pause(retry.retry_after(e))
+        retry.count('chat_delete', 'giveups')
+        with self._lock:
+            self.failed += 1
+        return False
+
+    def checkpoint(self, channel_id):
+        """
+        Returns the timestamp an interrupted run on the channel resumes from, or None.
+        """
+
+        return self._checkpoints.get(channel_id)
+
+    def run(self, channel_id, removable, stop_at_first_kept=True, resume=False):
+        """
+        Deletes the messages of a channel accepted by 'removable'.
+
+        Parameters:
+        channel_id (str): The ID of the channel.
+        removable (function): Returns True for the messages that are to be deleted.
+        stop_at_first_kept (bool, optional): Stop at the first message that is not removable. Defaults to True.
+        resume (bool, optional): Resume from the checkpoint of an interrupted run of this deleter, if it has not
+                                 expired. Defaults to False, the history is read from the newest message.
+
+        Returns:
+        dict: The final progress report, see 'report()'.
+        """
+
+        self.started = time.monotonic()
+        latest = self.checkpoint(channel_id) if resume else None
+        if not resume:
+            self._checkpoints.pop(channel_id)
+        # a message that could not be deleted holds the checkpoint back for the rest of the run
+        held = False
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bulk-delete') as pool:
+            while True:
+                page = list(self.history(channel_id, latest=latest, limit=PAGE_SIZE))
+                if not page:
+                    break
+                handled = []
+                stopped = False
+                for message in page:
+                    if removable(message):
+                        handled.append(message['ts'])
+                    elif stop_at_first_kept:
+                        stopped = True
+                        break
+                    else:
+                        handled.append(None)
+                deleted = dict(zip([ts for ts in handled if ts],
+                                   pool.map(lambda ts: self.delete(channel_id, ts), [ts for ts in handled if ts])))
+                for message, ts in zip(page, handled):
+                    if held or (ts and not deleted[ts]):
+                        held = True
+                        break
+                    self._checkpoints.set(channel_id, message['ts'])
+                latest = page[-1]['ts']
+                self.progress(self.report())
+                if stopped or len(page) < PAGE_SIZE:
+                    break
+        self._checkpoints.pop(channel_id)
+        return self.report()
@@ -0,0 +1,94 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    A bounded, thread safe cache with least recently used eviction and optional time based expiry.
+
+    Entries older than 'ttl' seconds are treated as missing. When the cache is full the least
+    recently used entry is evicted. Hits and misses are counted, so the hit rate can be reported.
+
+    Parameters:
+    maxsize (int, optional): The maximum number of entries kept. Defaults to 256.
+    ttl (float, optional): The lifetime of an entry in seconds. Defaults to None (entries never expire).
+    """
+
+    def __init__(self, maxsize=256, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Returns the cached value for 'key', or 'default' if it is missing or expired.
+        """
+
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires is None or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        """
+        Stores 'value' under 'key', evicting the least recently used entry if the cache is full.
+        """
+
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """
+        Removes 'key' from the cache and returns its value, or 'default' if it was not cached.
+        """
+
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def clear(self):
+        """
+        Removes every entry from the cache. The hit and miss counters are kept.
+        """
+
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def stats(self):
+        """
+        Returns the size and the hit/miss counters of the cache.
+
+        Returns:
+        dict: The current size, the maximum size, the hits, the misses and the hit rate.
+        """
+
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            }
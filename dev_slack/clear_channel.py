@@ -12,9 +12,9 @@ def remove_data_from_specific_channel(id, lenght=0):
         length (int, optional): Specifies the amount of data to remove. Default is 0 (removes no data).
 
         Returns:
-        None
+        dict: The progress report of the deletion, see 'slack_todo.remove()'.
         """
-    slack_todo.remove(id, lenght)
+    return slack_todo.remove(id, lenght)
 
 
 # remove_data_from_specific_channel(1)
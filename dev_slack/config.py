@@ -0,0 +1,24 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+from dotenv import load_dotenv
+
+_loaded = False
+
+
+def load():
+    """
+    Loads the variables of the '.env' file into the environment, once per process.
+
+    Every module calls this before reading its settings with 'os.getenv()', the file is only searched
+    for and parsed by the first call. Variables already set in the environment are not overridden.
+
+    Returns:
+    bool: True once the environment is loaded.
+    """
+
+    global _loaded
+    if not _loaded:
+        # searched upwards from this package, so the .env file next to main.py is found
+        load_dotenv()
+        _loaded = True
+    return _loaded
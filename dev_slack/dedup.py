@@ -0,0 +1,276 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import parse_qs
+from slack_sdk.signature import SignatureVerifier
+from dev_slack import config, metrics
+
+config.load()
+logger = logging.getLogger(__name__)
+
+# Slack retries a delivery up to three times over about five minutes
+TTL = float(os.getenv('SLACK_DEDUP_TTL', 900))
+DEDUP_FILE = 'data/deliveries.sqlite3'
+# the expired deliveries are deleted once every PURGE_EVERY claims of this process
+PURGE_EVERY = 256
+IN_PROGRESS = 'in_progress'
+DONE = 'done'
+
+_lock = threading.Lock()
+_counters = {
+    'dispatched': 0,
+    'retries': 0,
+    'duplicates': 0,
+    'released': 0,
+}
+
+
+class DeliveryLog:
+    """
+    The seen-set of the Slack deliveries, shared by the workers of the production mode.
+
+    A retry of Slack lands on any of the workers, so the deliveries are recorded in a local SQLite database in
+    WAL mode rather than in memory: a delivery is claimed by a single 'INSERT ... ON CONFLICT' that only
+    replaces an expired row, so exactly one worker claims a key, whichever worker each retry reaches.
+    Deliveries expire 'ttl' seconds after their last change, expired rows are deleted every few claims.
+
+    Parameters:
+    path (str, optional): The path of the database file. Defaults to 'data/deliveries.sqlite3'.
+    ttl (float, optional): Seconds a delivery is remembered. Defaults to SLACK_DEDUP_TTL (900).
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS deliveries (
+            key TEXT PRIMARY KEY,
+            state TEXT NOT NULL,
+            expires REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_deliveries_expires ON deliveries (expires);
+    """
+
+    def __init__(self, path=DEDUP_FILE, ttl=TTL):
+        self.path = path
+        self.ttl = ttl
+        self._connection = None
+        self._claims = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        # opened on first use, so importing the module does not touch the disk
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.executescript(self.SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def prepare(self):
+        """
+        Creates the database ahead of the first delivery.
+        """
+
+        with self._lock:
+            self._connect()
+
+    def add(self, key, state=IN_PROGRESS):
+        """
+        Records 'key' unless it is already recorded and not expired, in one step across the workers.
+
+        Returns:
+        bool: True if the key was recorded, False if it was already seen.
+        """
+
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            claimed = connection.execute(
+                "INSERT INTO deliveries (key, state, expires) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET state = excluded.state, expires = excluded.expires "
+                "WHERE deliveries.expires <= ?", (key, state, now + self.ttl, now)).rowcount == 1
+            self._claims += 1
+            if self._claims % PURGE_EVERY == 0:
+                connection.execute("DELETE FROM deliveries WHERE expires <= ?", (now,))
+        return claimed
+
+    def set(self, key, state):
+        """
+        Records the state of a key, which is remembered for another 'ttl' seconds.
+        """
+
+        with self._lock:
+            self._connect().execute(
+                "INSERT INTO deliveries (key, state, expires) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET state = excluded.state, expires = excluded.expires",
+                (key, state, time.time() + self.ttl))
+
+    def pop(self, key):
+        """
+        Forgets a key, so the next delivery of it is dispatched.
+        """
+
+        with self._lock:
+            self._connect().execute("DELETE FROM deliveries WHERE key = ?", (key,))
+
+    def __len__(self):
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM deliveries WHERE expires > ?",
+                                           (time.time(),)).fetchone()[0]
+
+
+_seen = DeliveryLog()
+
+
+def _count(name):
+    with _lock:
+        _counters[name] += 1
+
+
+def prepare():
+    """
+    Creates the seen-set shared by the workers, see 'DeliveryLog'.
+    """
+
+    _seen.prepare()
+
+
+def delivery_key(body):
+    """
+    Returns the identity of a Slack delivery, which is the same for every retry of it.
+
+    Events carry an 'event_id'. Interactions (actions, view submissions, shortcuts, commands) carry a
+    'trigger_id', which is unique per user interaction.
+
+    Parameters:
+    body (bytes): The raw body of the '/slack/events' request.
+
+    Returns:
+    str: The key, e.g. 'event:Ev0123456789', or None for requests that are never retried, e.g. the
+         URL verification challenge.
+    """
+
+    try:
+        text = body.decode('utf-8')
+        if text.startswith('{'):
+            event_id = json.loads(text).get('event_id')
+            return f'event:{event_id}' if event_id else None
+        form = parse_qs(text)
+        if 'payload' in form:
+            payload = json.loads(form['payload'][0])
+            trigger_id = payload.get('trigger_id')
+            return f"{payload.get('type')}:{trigger_id}" if trigger_id else None
+        trigger_id = form.get('trigger_id', [None])[0]
+        return f'command:{trigger_id}' if trigger_id else None
+    except (ValueError, KeyError, AttributeError, TypeError):
+        return None
+
+
+def _signed(body, headers):
+    secret = os.getenv('SLACK_SECRET')
+    if not secret:
+        return False
+    return SignatureVerifier(secret).is_valid(body, headers.get('x-slack-request-timestamp'),
+                                              headers.get('x-slack-signature'))
+
+
+def claim(body, headers):
+    """
+    Claims a delivery before it is dispatched to Bolt.
+
+    The first delivery of a key is marked in progress and dispatched. A later delivery of the same key,
+    a retry with 'X-Slack-Retry-Num' or a duplicate, is a duplicate while the key is in progress or done, and
+    is acknowledged without being dispatched again, by whichever worker it reaches (see 'DeliveryLog'). Only
+    requests with a valid Slack signature are claimed, so a forged request cannot suppress a genuine one; the
+    others are left to Bolt, which rejects them. If the seen-set cannot be written, the error is logged and the
+    delivery is dispatched untracked.
+
+    Parameters:
+    body (bytes): The raw body of the request.
+    headers (Mapping): The headers of the request.
+
+    Returns:
+    tuple: The key to pass to 'finish()' (None if the request is not tracked) and True if it is a duplicate.
+    """
+
+    if headers.get('x-slack-retry-num'):
+        _count('retries')
+    key = delivery_key(body)
+    if key is None or not _signed(body, headers):
+        return None, False
+    try:
+        claimed = _seen.add(key, IN_PROGRESS)
+    except sqlite3.Error as e:
+        logger.error(f"Error claiming Slack delivery {key}: {e}")
+        return None, False
+    if not claimed:
+        _count('duplicates')
+        logger.info(f"Duplicate Slack delivery {key} acknowledged (retry {headers.get('x-slack-retry-num', 0)}, "
+                    f"{headers.get('x-slack-retry-reason', 'no reason')})")
+        return key, True
+    _count('dispatched')
+    return key, False
+
+
+def finish(key, status_code=None):
+    """
+    Records the outcome of a claimed delivery.
+
+    An acknowledged delivery (a 2xx or 3xx status) stays in the seen-set until it expires. A failed delivery
+    (no status, i.e. an exception, or an error status) is released, so Slack's retry of it is dispatched.
+
+    Parameters:
+    key (str): The key returned by 'claim()'. Nothing is done for None.
+    status_code (int, optional): The HTTP status of the response. Defaults to None, a failed delivery.
+    """
+
+    if key is None:
+        return
+    try:
+        if status_code is not None and status_code < 400:
+            _seen.set(key, DONE)
+        else:
+            _seen.pop(key)
+            _count('released')
+    except sqlite3.Error as e:
+        logger.error(f"Error recording Slack delivery {key}: {e}")
+
+
+def stats():
+    """
+    Returns the deduplication counters and the size of the seen-set.
+
+    Returns:
+    dict: The dispatched, retried (by 'X-Slack-Retry-Num'), duplicate and released deliveries of this
+          worker, and the size (across the workers, None if it cannot be read) and TTL of the seen-set.
+    """
+
+    with _lock:
+        counters = dict(_counters)
+    try:
+        size = len(_seen)
+    except sqlite3.Error as e:
+        logger.error(f"Error reading the Slack delivery log: {e}")
+        size = None
+    return {
+        **counters,
+        'size': size,
+        'ttl': TTL,
+    }
+
+
+def _dedup_metrics():
+    counters = stats()
+    lines = []
+    for name, documentation in (('retries', 'Slack deliveries with an X-Slack-Retry-Num header.'),
+                                ('duplicates', 'Slack deliveries acknowledged without being dispatched again.')):
+        lines += [f'# HELP slack_event_{name}_total {documentation}', f'# TYPE slack_event_{name}_total counter',
+                  f'slack_event_{name}_total {counters[name]}']
+    return lines
+
+
+metrics.Collector(_dedup_metrics)
@@ -0,0 +1,82 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # not available on Windows, where the lock only guards the threads of one process
+    fcntl = None
+
+
+class FileLock:
+    """
+    An exclusive lock shared by every process of the machine, held with flock() on a lock file.
+
+    The workers of the production mode are separate processes, so the state they share on disk (the activity
+    store, the bot status message) is guarded by a lock file instead of a threading lock. The lock also
+    serializes the threads of one process. The lock is released by the OS if its process dies.
+
+    Parameters:
+    path (str): The path of the lock file, created if missing along with its directory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def acquire(self, blocking=True):
+        """
+        Acquires the lock.
+
+        Parameters:
+        blocking (bool, optional): Wait for the lock. Defaults to True.
+
+        Returns:
+        bool: True if the lock was acquired, False if it is held elsewhere and 'blocking' is False.
+        """
+
+        if not self._lock.acquire(blocking):
+            return False
+        file = None
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            file = open(self.path, 'a')
+            if fcntl is not None:
+                fcntl.flock(file.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            file.close()
+            self._lock.release()
+            return False
+        except Exception:
+            if file is not None:
+                file.close()
+            self._lock.release()
+            raise
+        self._file = file
+        return True
+
+    def release(self):
+        file, self._file = self._file, None
+        try:
+            if fcntl is not None:
+                fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+            file.close()
+        finally:
+            self._lock.release()
+
+    def locked(self):
+        """
+        Returns True if this process holds the lock.
+        """
+
+        return self._file is not None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
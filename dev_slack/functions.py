@@ -2,17 +2,93 @@
 
 import json
 import os
-from dotenv import load_dotenv
-load_dotenv()
+import threading
+from dev_slack import config, text_index
+from dev_slack.cache import TTLCache
+config.load()
+
+REQUESTS_FILE = 'data/requests.json'
+LOGO_KEYS = ('FILARMONIKI_LOGO', 'AGIOS_NIKOLAOS_LOGO', 'ONE_DRIVE_LOGO')
+
+
+class RequestArchive:
+    """
+    Process-wide cache of the request archive 'requests.json'.
+
+    The file is parsed again only when its modification time or size changes. On every reload the
+    options of the archive picker and their search index (names and protocol numbers) are prebuilt,
+    so answering the picker as the user types is an index lookup.
+
+    Parameters:
+    path (str, optional): The path of the json file. Defaults to 'data/requests.json'.
+    """
+
+    def __init__(self, path=REQUESTS_FILE):
+        self.path = path
+        self.version = None
+        self.records = {}
+        self.options = {}
+        self.index = text_index.TrigramIndex(())
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """
+        Reloads the archive if the file changed since the last load.
+
+        Returns:
+        RequestArchive: The archive itself, so calls can be chained.
+        """
+        stat = os.stat(self.path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        if version != self.version:
+            with self._lock:
+                if version != self.version:
+                    with open(self.path, 'r', encoding='utf-8') as file:
+                        records = json.load(file)
+                    options = {key: {
+                        "text": {
+                            "type": "plain_text",
+                            "emoji": True,
+                            "text": value.get('name').upper()
+                        },
+                        "value": key
+                    } for key, value in records.items()}
+                    index = text_index.TrigramIndex((key, f"{key} {value.get('name')}") for key, value in records.items())
+                    self.records, self.options, self.index, self.version = records, options, index, version
+        return self
+
+
+archive = RequestArchive()
 
 
 def load_requests():
     """
     Function to load the request data from the json file.
-    :return: Dictionary object containing the request data
+    The data is cached and the file is parsed again only when it changes.
+    :return: Dictionary object containing the request data, shared and not to be modified
+    """
+    return archive.refresh().records
+
+
+def get_request(protocol):
     """
-    with open('data/requests.json', 'r', encoding='utf-8') as file:
-        return json.load(file)
+    Function to get a single request from the cached request data.
+    :param: protocol: String that represents the protocol number
+    :return: Dictionary with the request details, or None if the protocol is unknown
+    """
+    return archive.refresh().records.get(protocol)
+
+
+def request_options(query='', limit=100):
+    """
+    Function to get the options of the archive picker matching what the user typed.
+    The name and the protocol number of the requests are searched, regardless of accents and case.
+    :param: query: String typed in the external_select, an empty string returns the first requests
+    :param: limit: The most options returned, Slack shows up to 100
+    :return: List of option objects, best match first, shared and not to be modified
+    """
+    requests = archive.refresh()
+    return [requests.options[key] for key in requests.index.search(query, limit)]
 
 
 def create_section(part_text, image_url):
@@ -52,7 +128,7 @@ def display_status(request, protocol):
     :return: None
     """
     request_info = request.get(protocol)
-    image_urls = [os.getenv('FILARMONIKI_LOGO'), os.getenv('AGIOS_NIKOLAOS_LOGO'), os.getenv('ONE_DRIVE_LOGO')]
+    image_urls = [os.getenv(key) for key in LOGO_KEYS]
 
     management_map = {
         'management_a': 'ΣΥΝΕΛΕΥΣΗ ΔΣ',
@@ -115,6 +191,40 @@ def display_status(request, protocol):
     ]
 
 
+_status_blocks = TTLCache(maxsize=int(os.getenv('STATUS_CACHE_SIZE', 256)))
+_status_version = None
+
+
+def render_status(protocol):
+    """
+    Function to get the status blocks of a request, rendered once per archive version.
+    The blocks are cached per protocol, archive version and logo URLs, and the cache is emptied
+    whenever the request archive changes.
+    :param: protocol: String that represents the protocol number
+    :return: List of Slack blocks, shared and not to be modified
+    """
+    global _status_version
+    records = archive.refresh().records
+    version = archive.version
+    if version != _status_version:
+        _status_blocks.clear()
+        _status_version = version
+    key = (protocol, version, tuple(os.getenv(key) for key in LOGO_KEYS))
+    blocks = _status_blocks.get(key)
+    if blocks is None:
+        blocks = display_status(records, protocol)
+        _status_blocks.set(key, blocks)
+    return blocks
+
+
+def status_cache_stats():
+    """
+    Function to get the size and the hit rate of the status blocks cache.
+    :return: Dictionary with the size, the maximum size, the hits, the misses and the hit rate
+    """
+    return _status_blocks.stats()
+
+
 def check():
     """
     Check the status of all requests.
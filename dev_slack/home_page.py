@@ -1,10 +1,9 @@
 #  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
 from typing import List, Dict
-import pandas as pd
 import os
-from dotenv import load_dotenv
+from dev_slack import config, activity_stats
 
-load_dotenv()
+config.load()
 
 
 def create_section(text, after=None):
@@ -106,24 +105,24 @@ def expose_statistics():
     """
     Aggregate and expose button press statistics.
 
-    This function reads from a CSV file named 'statistic_records.csv', which contains records of button presses from
-    users. It aggregates these statistics both globally and on a per-user basis. It then formats the aggregated data
+    This function reads the button press statistics kept in memory by 'activity_stats', which are built once from
+    'statistic_records.csv' and updated on every new record. It formats the global and the per-user statistics
     into a Slack-friendly format called 'blocks' for easy message construction.
 
     Returns:
     list: A list of Slack blocks representing the statistics information.
     """
-    df = pd.read_csv('data/statistic_records.csv')
-    total_presses = df['report'].count()
-    user_presses = df.groupby('username')['report'].count()
+    stats = activity_stats.snapshot()
+    total_presses = stats['total']
+    user_presses = sorted(stats['users'].items())
 
-    # Group by both 'username' and 'report' and count the occurrences
-    user_button_presses = df.groupby(['username', 'report']).size()
+    # Button presses per user, keyed by username and report
+    user_button_presses = stats['user_buttons']
 
     # Count total button presses globally
-    total_button_presses = df.groupby('report').size()
+    total_button_presses = sorted(stats['buttons'].items())
 
-    user_images = df.groupby('username')['user_image'].last()
+    user_images = stats['user_images']
 
     blocks = [
         {"type": "divider"},
@@ -144,7 +143,7 @@ def expose_statistics():
     ]
 
     # Sort `total_button_presses` by count/value
-    sorted_total_presses = sorted(total_button_presses.items(), key=lambda item: item[1], reverse=True)
+    sorted_total_presses = sorted(total_button_presses, key=lambda item: item[1], reverse=True)
 
     elements = [
         {"type": "mrkdwn",
@@ -166,10 +165,10 @@ def expose_statistics():
             "text": "User's Statistics"
         }
     })
-    for user, presses in user_presses.items():
+    for user, presses in user_presses:
         user_reports = user_button_presses[user]
         user_image = user_images[user]
-        id = df[df['username'] == user]['id'].iloc[0]
+        id = stats['user_ids'][user]
         # Add user's profile picture to blocks
         blocks.append({
             "type": "section",
@@ -185,7 +184,7 @@ def expose_statistics():
         })
 
         # Sort `user_reports` by count/value
-        sorted_reports = sorted(user_reports.items(), key=lambda item: item[1], reverse=True)
+        sorted_reports = sorted(sorted(user_reports.items()), key=lambda item: item[1], reverse=True)
 
         elements = [
             {"type": "mrkdwn",
@@ -204,18 +203,45 @@ def expose_statistics():
     return blocks
 
 
-def run(event, admin, super_user):
+CONFIG_KEYS = ('FACEBOOK_LINK', 'KATASTATIKO', 'MHTRO', 'FILARMONIKI_LOGO', 'AGIOS_NIKOLAOS_LOGO')
+
+_templates = {}
+_templates_config = None
+
+
+def welcome_block(user):
     """
-    Generate a block kit suitable for a Home tab view in a Slack App.
+    Creates the per-user welcome section shown at the top of the Home tab.
+
+    Parameters:
+    user (str): The ID of the user who opened the Home tab.
+
+    Returns:
+    dict: A dictionary for the welcome section block.
+    """
+    return {
+        "type": "section",
+        "text": {
+            "type": "mrkdwn",
+            "text": f" *:rocket: Καλώς Ορίσατε, <@{user}> :house: στο κανάλι μας*\n\n\n\n"
+                    "*:wave:Σύντομος Χαιρετισμός, ο Σκοπός του Συλλόγου μας*"
+        }
+    }
 
-    This function creates a formatted collection of message blocks for a Home tab view in Slack. It includes several statically defined message sections and buttons. If the user has admin permissions, additional buttons and statistical data are added to the view.
+
+def build_template(admin):
+    """
+    Generate the static blocks of the Home tab for a role.
+
+    This function creates every block of the Home tab that does not depend on the user: the statically defined
+    message sections and buttons and, if the user has admin permissions, the administrator sections and buttons.
+    The welcome section and the statistics are added per request by 'run()'.
 
     Parameters:
-    event (dict): A dictionary containing data about the triggering event, such as the user ID of the user who interacted with the button.
     admin (bool): A boolean specifying if the user has admin permissions.
 
     Returns:
-    dict: A dictionary representing a Slack Home tab view in block kit format.
+    list: A list of Slack blocks, without the welcome section.
     """
 
     part_a = f"""
@@ -244,14 +270,7 @@ def run(event, admin, super_user):
     sections_flat = [section for section_tuple in sections for section in section_tuple]
 
     blocks = [
-        {
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": f" *:rocket: Καλώς Ορίσατε, <@{event['user']}> :house: στο κανάλι μας*\n\n\n\n"
-                        "*:wave:Σύντομος Χαιρετισμός, ο Σκοπός του Συλλόγου μας*"
-            }
-        }, *sections_flat,
+        *sections_flat,
         {
             "type": "divider"
         },
@@ -314,6 +333,61 @@ def run(event, admin, super_user):
         for simple, block_id, text, image, button_text, action_id in admin_buttons_texts_ids:
             action_block = create_block(simple, block_id, text, image, button_text, action_id)
             blocks.extend(action_block)
+
+    return blocks
+
+
+def build_templates():
+    """
+    Builds the static Home tab blocks of every role (regular, admin, super user) for the current configuration.
+
+    The templates are keyed by the values of the environment variables they use, so they are rebuilt
+    automatically by 'get_template()' when the configuration changes.
+    """
+    global _templates, _templates_config
+    settings = tuple(os.getenv(key) for key in CONFIG_KEYS)
+    templates = {}
+    for admin in (False, True):
+        template = build_template(admin)
+        for super_user in (False, True):
+            templates[(admin, super_user)] = template
+    _templates, _templates_config = templates, settings
+
+
+def get_template(admin, super_user):
+    """
+    Returns the prebuilt static Home tab blocks of a role, rebuilding them if the configuration changed.
+
+    Parameters:
+    admin (bool): A boolean specifying if the user has admin permissions.
+    super_user (bool): A boolean specifying if the user can see the statistics.
+
+    Returns:
+    list: The static Slack blocks of the role. The list is shared and must not be modified.
+    """
+    if tuple(os.getenv(key) for key in CONFIG_KEYS) != _templates_config:
+        build_templates()
+    return _templates[(admin, super_user)]
+
+
+def run(event, admin, super_user):
+    """
+    Generate a block kit suitable for a Home tab view in a Slack App.
+
+    This function creates a formatted collection of message blocks for a Home tab view in Slack. The static sections
+    and buttons of the user's role are taken from the prebuilt templates of 'get_template()', so only the welcome
+    section is created per request. If the user is a super user, the statistics are added to the view.
+
+    Parameters:
+    event (dict): A dictionary containing data about the triggering event, such as the user ID of the user who interacted with the button.
+    admin (bool): A boolean specifying if the user has admin permissions.
+    super_user (bool): A boolean specifying if the user can see the statistics.
+
+    Returns:
+    dict: A dictionary representing a Slack Home tab view in block kit format.
+    """
+
+    blocks = [welcome_block(event['user']), *get_template(admin, super_user)]
     if super_user:
         blocks.extend(expose_statistics())
 
@@ -0,0 +1,212 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = 'data/message_index.sqlite3'
+LEGACY_FILE = 'data/message_index.json'
+MAX_ENTRIES = 1000
+# the texts of a channel are trimmed to 'max_entries' once every TRIM_EVERY records of this process
+TRIM_EVERY = 64
+# the highest code point, every text starting with a prefix sorts between the prefix and prefix + _LAST
+_LAST = '\U0010ffff'
+
+
+class MessageIndex:
+    """
+    Persistent index of the messages posted by the bot, (channel, text) -> ts.
+
+    Every message the bot posts is recorded under its text and the text of its first block, in a local SQLite
+    database in WAL mode, so a message posted by the bot can be found without downloading the channel history.
+    Recording or forgetting a message is a single upsert or delete on the (channel, text) key, whatever the size
+    of the index, and each statement is atomic, so the workers of the production mode share the index safely:
+    a message posted by one worker is found by the others. Each channel keeps about the newest 'max_entries'
+    texts, the older ones are trimmed every few records. A legacy 'message_index.json' is imported once.
+
+    Parameters:
+    path (str, optional): The path of the database file. Defaults to 'data/message_index.sqlite3'.
+    max_entries (int, optional): The number of texts kept per channel. Defaults to 1000.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS messages (
+            channel TEXT NOT NULL,
+            text TEXT NOT NULL,
+            ts TEXT NOT NULL,
+            recorded INTEGER NOT NULL,
+            PRIMARY KEY (channel, text)
+        );
+        CREATE INDEX IF NOT EXISTS idx_messages_channel_ts ON messages (channel, ts);
+        CREATE INDEX IF NOT EXISTS idx_messages_channel_recorded ON messages (channel, recorded);
+    """
+
+    def __init__(self, path=INDEX_FILE, max_entries=MAX_ENTRIES, legacy_path=LEGACY_FILE):
+        self.path = path
+        self.max_entries = max_entries
+        self.legacy_path = legacy_path
+        self._connection = None
+        self._records = {}
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        # opened on first use, so importing the module does not touch the disk
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.executescript(self.SCHEMA)
+            self._connection = connection
+            self._import_legacy()
+        return self._connection
+
+    def _import_legacy(self):
+        if not os.path.exists(self.legacy_path) or self._connection.execute("SELECT 1 FROM messages LIMIT 1").fetchone():
+            return
+        try:
+            with open(self.legacy_path, 'r', encoding='utf-8') as file:
+                channels = json.load(file)
+        except (OSError, ValueError) as e:
+            logger.error(f"Error importing the legacy message index {self.legacy_path}: {e}")
+            return
+        now = time.time_ns()
+        # the json entries are in recording order, the newest last
+        rows = [(channel, text, ts, now - len(entries) + position)
+                for channel, entries in channels.items() for position, (text, ts) in enumerate(entries.items())]
+        self._connection.execute('BEGIN IMMEDIATE')
+        try:
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO messages (channel, text, ts, recorded) VALUES (?, ?, ?, ?)", rows)
+            self._connection.execute('COMMIT')
+        except Exception:
+            self._connection.execute('ROLLBACK')
+            raise
+        logger.info(f"{len(rows)} messages imported from {self.legacy_path}")
+
+    def prepare(self):
+        """
+        Creates the database, and imports a legacy 'message_index.json' into it, ahead of the first message.
+        """
+
+        with self._lock:
+            self._connect()
+
+    def _trim(self, connection, channel):
+        connection.execute(
+            "DELETE FROM messages WHERE channel = ? AND recorded < ("
+            "SELECT recorded FROM messages WHERE channel = ? ORDER BY recorded DESC LIMIT 1 OFFSET ?)",
+            (channel, channel, self.max_entries - 1))
+
+    def record(self, channel, ts, texts):
+        """
+        Records the timestamp of a posted message under each of the given texts.
+
+        Parameters:
+        channel (str): The channel (or channel and thread) the message was posted in.
+        ts (str): The timestamp of the message.
+        texts (list): The texts the message can be looked up by. Empty texts are ignored.
+        """
+
+        rows = [(channel, text, ts, time.time_ns()) for text in dict.fromkeys(texts) if text]
+        if not rows:
+            return
+        try:
+            with self._lock:
+                connection = self._connect()
+                connection.executemany(
+                    "INSERT INTO messages (channel, text, ts, recorded) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (channel, text) DO UPDATE SET ts = excluded.ts, recorded = excluded.recorded", rows)
+                self._records[channel] = self._records.get(channel, 0) + 1
+                if self._records[channel] % TRIM_EVERY == 0:
+                    self._trim(connection, channel)
+        except sqlite3.Error as e:
+            logger.error(f"Error saving message index: {e}")
+
+    def lookup(self, channel, text, prefix=False):
+        """
+        Returns the timestamp of the newest message recorded under 'text'.
+
+        Parameters:
+        channel (str): The channel (or channel and thread) to look in.
+        text (str): The text of the message.
+        prefix (bool, optional): Match texts starting with 'text' instead of the exact text. Defaults to False.
+
+        Returns:
+        str: The timestamp of the message, or None if it is not in the index (or the index cannot be read).
+        """
+
+        try:
+            with self._lock:
+                connection = self._connect()
+                if not prefix:
+                    row = connection.execute("SELECT ts FROM messages WHERE channel = ? AND text = ?",
+                                             (channel, text)).fetchone()
+                else:
+                    row = connection.execute(
+                        "SELECT ts FROM messages WHERE channel = ? AND text >= ? AND text < ? "
+                        "ORDER BY CAST(ts AS REAL) DESC LIMIT 1", (channel, text, text + _LAST)).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Error reading message index: {e}")
+            return None
+        return row[0] if row else None
+
+    def forget(self, channel, ts):
+        """
+        Removes every text recorded for a message, after it was deleted or could not be found.
+
+        Parameters:
+        channel (str): The channel the message was posted in.
+        ts (str): The timestamp of the message.
+        """
+
+        try:
+            with self._lock:
+                self._connect().execute("DELETE FROM messages WHERE channel = ? AND ts = ?", (channel, ts))
+        except sqlite3.Error as e:
+            logger.error(f"Error saving message index: {e}")
+
+
+index = MessageIndex()
+
+
+def block_text(blocks):
+    """
+    Returns the text of the first block of a message, or None if it has no text.
+    """
+
+    try:
+        return blocks[0]['text'].get('text')
+    except (IndexError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def record(channel, ts, text, blocks=None, thread_ts=None):
+    """
+    Records a message posted by the bot by its text and the text of its first block.
+
+    Replies are recorded under their thread, so they never shadow the messages of the channel.
+    """
+
+    if ts:
+        index.record(f'{channel}:{thread_ts}' if thread_ts else channel, ts, [text, block_text(blocks)])
+
+
+def lookup(channel, text, prefix=False):
+    """
+    Returns the timestamp of the newest bot message of a channel recorded under 'text', or None.
+    """
+
+    return index.lookup(channel, text, prefix)
+
+
+def forget(channel, ts):
+    """
+    Removes a message from the index.
+    """
+
+    index.forget(channel, ts)
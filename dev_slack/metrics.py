@@ -0,0 +1,219 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import functools
+import inspect
+import threading
+import time
+from collections import defaultdict
+from slack_sdk.errors import SlackApiError
+from dev_slack import retry
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = []
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    """
+    A monotonically increasing counter, rendered in the Prometheus text format.
+
+    Parameters:
+    name (str): The metric name.
+    documentation (str): The help text of the metric.
+    labels (tuple, optional): The label names. Defaults to no labels.
+    """
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, value=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        with self._lock:
+            self._values[key] += value
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        lines += [f'{self.name}{_labels(self.labels, key)} {value:g}' for key, value in values]
+        return lines
+
+
+class Histogram:
+    """
+    A histogram of observed values, e.g. latencies in seconds, rendered in the Prometheus text format.
+
+    Parameters:
+    name (str): The metric name.
+    documentation (str): The help text of the metric.
+    labels (tuple, optional): The label names. Defaults to no labels.
+    buckets (tuple, optional): The upper bounds of the buckets. Defaults to BUCKETS (5ms to 10s).
+    """
+
+    def __init__(self, name, documentation, labels=(), buckets=BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        with self._lock:
+            counts, total, observations = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value, observations + 1)
+
+    def render(self):
+        with self._lock:
+            values = sorted((key, (list(counts), total, observations))
+                            for key, (counts, total, observations) in self._values.items())
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for key, (counts, total, observations) in values:
+            # the buckets are cumulative, values above the last bound only count towards +Inf
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_labels(self.labels, key, f'le="{bound:g}"')} {cumulative}')
+            lines.append(f'{self.name}_bucket{_labels(self.labels, key, 'le="+Inf"')} {observations}')
+            lines.append(f'{self.name}_sum{_labels(self.labels, key)} {total:.6f}')
+            lines.append(f'{self.name}_count{_labels(self.labels, key)} {observations}')
+        return lines
+
+
+class Collector:
+    """
+    Renders metrics computed on demand by 'function', e.g. from the counters of another module.
+
+    Parameters:
+    function (function): Returns the lines of the metrics in the Prometheus text format.
+    """
+
+    def __init__(self, function):
+        self.function = function
+        _registry.append(self)
+
+    def render(self):
+        return self.function()
+
+
+listener_duration = Histogram('slack_listener_duration_seconds',
+                              'Duration of the Bolt listeners, by listener type and action_id, callback_id or event type.',
+                              ('type', 'listener'))
+listener_errors = Counter('slack_listener_errors_total', 'Bolt listeners that raised an error.', ('type', 'listener'))
+api_duration = Histogram('slack_api_request_duration_seconds', 'Duration of the Slack Web API calls, by method.',
+                         ('method',))
+api_requests = Counter('slack_api_requests_total', 'Slack Web API calls, by method and result (ok or the error code).',
+                       ('method', 'status'))
+api_rate_limited = Counter('slack_api_rate_limited_total', 'Slack Web API calls answered with a rate limit error.',
+                           ('method',))
+
+
+def _retry_metrics():
+    counters = retry.stats()
+    lines = []
+    for event in ('retries', 'giveups'):
+        name = f'slack_api_{event}_total'
+        lines += [f'# HELP {name} Slack Web API calls {"retried" if event == "retries" else "given up"} '
+                  f'by the retry policy.', f'# TYPE {name} counter']
+        lines += [f'{name}{{method="{_escape(method)}"}} {values[event]}' for method, values in sorted(counters.items())]
+    return lines
+
+
+Collector(_retry_metrics)
+
+
+def observe_api(method, seconds, error=None):
+    """
+    Records one Slack Web API call.
+
+    Parameters:
+    method (str): The Web API method, e.g. 'chat.postMessage'.
+    seconds (float): The duration of the call.
+    error (Exception, optional): The error raised by the call. Defaults to None, a successful call.
+    """
+
+    status = 'ok'
+    if isinstance(error, SlackApiError):
+        status = error.response.get('error') or str(error.response.status_code)
+        if status == 'ratelimited' or error.response.status_code == 429:
+            api_rate_limited.inc(method=method)
+    elif error is not None:
+        status = type(error).__name__
+    api_duration.observe(seconds, method=method)
+    api_requests.inc(method=method, status=status)
+
+
+def timed(kind, name):
+    """
+    Decorates a Bolt listener to record its duration and errors under (kind, name).
+
+    The decorated function keeps its signature, so Bolt still injects the same arguments.
+    Both plain and async listeners are supported.
+
+    Parameters:
+    kind (str): The listener type, 'action', 'view', 'event', 'shortcut' or 'options'.
+    name (str): The action_id, callback_id or event type of the listener.
+
+    Returns:
+    function: The decorator.
+    """
+
+    def decorator(function):
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await function(*args, **kwargs)
+                except Exception:
+                    listener_errors.inc(type=kind, listener=name)
+                    raise
+                finally:
+                    listener_duration.observe(time.perf_counter() - started, type=kind, listener=name)
+        else:
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                except Exception:
+                    listener_errors.inc(type=kind, listener=name)
+                    raise
+                finally:
+                    listener_duration.observe(time.perf_counter() - started, type=kind, listener=name)
+        return wrapper
+
+    return decorator
+
+
+def render():
+    """
+    Returns every registered metric in the Prometheus text exposition format (version 0.0.4).
+    """
+
+    lines = []
+    for metric in _registry:
+        lines += metric.render()
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,98 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from slack_sdk.errors import SlackApiError
+from dev_slack import config, modals
+
+config.load()
+logger = logging.getLogger(__name__)
+
+# the view was changed meanwhile, e.g. submitted, or closed by the user: the update is dropped
+STALE_ERRORS = ('hash_conflict', 'not_found')
+
+_builders = ThreadPoolExecutor(max_workers=int(os.getenv('MODAL_BUILD_WORKERS', 4)),
+                               thread_name_prefix='modal-build')
+
+
+def _update_args(opened, view):
+    return {'view_id': opened['id'], 'hash': opened['hash'], 'view': view}
+
+
+def _log_update_error(title, error):
+    if error.response.get('error') in STALE_ERRORS:
+        logger.info(f"Modal '{title}' was not updated: {error.response.get('error')}")
+    else:
+        logger.error(f"Error updating modal '{title}': {error}")
+
+
+def _fill(client, opened, title, build, args):
+    try:
+        view = build(*args)
+    except Exception as e:
+        logger.error(f"Error building modal '{title}': {e}")
+        view = None
+    try:
+        client.views_update(**_update_args(opened, view or modals.error_view(title)))
+    except SlackApiError as e:
+        _log_update_error(title, e)
+    return view
+
+
+def open_modal(client, trigger_id, title, build, *args, push=False):
+    """
+    Opens a modal in two phases: a placeholder at once, then the real modal once it is built.
+
+    The placeholder ('modals.loading_view()') is opened right away, so the trigger_id is used within Slack's
+    three seconds whatever the size of the data. The real modal is then built in a worker thread and swapped in
+    with 'views.update', passing the hash of the opened view, so an update never overwrites a view the user has
+    already moved on from. If the build fails, the placeholder is replaced by 'modals.error_view()'.
+    The listener returns once the placeholder is open, so it holds a thread of Bolt's listener executor no longer
+    than a single Slack call.
+
+    Parameters:
+    client (WebClient): The Slack client of the listener.
+    trigger_id (str): The trigger_id of the interaction.
+    title (str): The title of the modal, shown by the placeholder too.
+    build (function): Builds the view of the modal, called with 'args'.
+    push (bool, optional): Push the placeholder on top of the modal the interaction came from ('views.push'),
+                           which is shown again when the new modal is closed. Defaults to False, a new modal.
+
+    Returns:
+    Future: The view of the modal once it is built and shown, None if it could not be built.
+
+    Raises:
+    SlackApiError: If the placeholder cannot be opened, e.g. the trigger_id expired.
+    """
+
+    show = client.views_push if push else client.views_open
+    opened = show(trigger_id=trigger_id, view=modals.loading_view(title))['view']
+    return _builders.submit(_fill, client, opened, title, build, args)
+
+
+async def open_modal_async(client, trigger_id, title, build, *args, push=False):
+    """
+    The asynchronous counterpart of 'open_modal()', for the AsyncWebClient.
+
+    The real modal is built in a worker thread, so reading its files does not block the event loop.
+    """
+
+    task = asyncio.ensure_future(asyncio.to_thread(build, *args))
+    try:
+        show = client.views_push if push else client.views_open
+        opened = (await show(trigger_id=trigger_id, view=modals.loading_view(title)))['view']
+    except Exception:
+        task.cancel()
+        raise
+    try:
+        view = await task
+    except Exception as e:
+        logger.error(f"Error building modal '{title}': {e}")
+        view = None
+    try:
+        await client.views_update(**_update_args(opened, view or modals.error_view(title)))
+    except SlackApiError as e:
+        _log_update_error(title, e)
+    return view
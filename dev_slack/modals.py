@@ -3,8 +3,13 @@
 from dev_slack import functions
 import json
 import os
-from dotenv import load_dotenv
-load_dotenv()
+import threading
+from dev_slack import config
+config.load()
+
+MEETINGS_FILE = 'data/meetings.json'
+# blocks of meetings per page, Slack shows at most 100 blocks in a modal
+PAGE_BLOCKS = max(10, min(int(os.getenv('MEETINGS_PAGE_BLOCKS', 50)), 97))
 
 def handle_archive_step_b(view):
     """
@@ -64,25 +69,13 @@ def choose_archive():
     Creates a modal view for archive search.
 
     This function generates a modal view in Slack that allows users to choose from a list of requests.
-    The requests are loaded into the options for a static select menu, and the selected request's key
-    is returned when the user submits the form.
+    The external select menu is answered as the user types by the 'archive_step_b' options listener, with
+    'functions.request_options()', and the selected request's key is returned when the user submits the form.
 
     Returns:
-    dict: A dictionary representing a Slack modal view with a static select menu of requests.
+    dict: A dictionary representing a Slack modal view with an external select menu of requests.
     """
 
-    my_options = []
-    requests = functions.load_requests()
-    for key, value in requests.items():
-        my_options.append({
-            "text": {
-                "type": "plain_text",
-                "emoji": True,
-                "text": value.get('name').upper()
-            },
-            "value": key
-        })
-
     return {
         "type": "modal",
         "callback_id": "button_archive_step_b",
@@ -137,13 +130,13 @@ def choose_archive():
                     "text": "*ΑΙΤΗΣΕΙΣ ΠΡΟΣ: :an: ΔΗΜΟ ΑΓ. ΝΙΚΟΛΑΟΥ*"
                 },
                 "accessory": {
-                    "type": "static_select",
+                    "type": "external_select",
                     "placeholder": {
                         "type": "plain_text",
-                        "text": "ΕΠΙΛΕΞΤΕ",
+                        "text": "ΕΠΙΛΕΞΤΕ Ή ΠΛΗΚΤΡΟΛΟΓΗΣΤΕ",
                         "emoji": True
                     },
-                    "options": my_options,
+                    "min_query_length": 0,
                     "action_id": "archive_step_b"
                 }
             }
@@ -155,9 +148,9 @@ def represent_data(key):
     """
     Creates a modal to represent search results.
 
-    Given a key, this function retrieves a collection of requests, then generates
-    a representation of the status of the request associated with that key. The generated
-    status is used to create a Slack modal that presents the results to the user.
+    Given a key, this function retrieves the status blocks of the request associated with that key,
+    rendered once per archive version by 'functions.render_status()'. The prepared blocks are used
+    to create a Slack modal that presents the results to the user.
 
     Parameters:
     key (str): The key representing the request to find in the loaded requests.
@@ -167,8 +160,7 @@ def represent_data(key):
           from the selected request.
     """
 
-    requests = functions.load_requests()
-    data = functions.display_status(requests, key)
+    data = functions.render_status(key)
 
     return {
         "type": "modal",
@@ -187,6 +179,105 @@ def represent_data(key):
     }
 
 
+def _search_result(result):
+    details = '\n'.join(result['details'][:3])[:2500]
+    if result['kind'] == 'request':
+        return {
+            "type": "section",
+            "text": {
+                "type": "mrkdwn",
+                "text": f"*{result['title'].upper()}*  `{result['key']}`" + (f"\n{details}" if details else "")
+            },
+            "accessory": {
+                "type": "button",
+                "text": {
+                    "type": "plain_text",
+                    "text": "ΚΑΤΑΣΤΑΣΗ",
+                    "emoji": True
+                },
+                "action_id": "search_open_request",
+                "value": result['key']
+            }
+        }
+    return {
+        "type": "section",
+        "text": {
+            "type": "mrkdwn",
+            "text": f"*{result['title']}*  _{result['year']}_" + (f"\n{details}" if details else "")
+        }
+    }
+
+
+def search_view(query='', results=None):
+    """
+    Creates the full-text search modal of the archives, opened by the 'search_archive' shortcut.
+
+    The modal has a single text input. On submission it is updated in place with the results of
+    'search.search()', under the input that keeps the query, so the user can refine it and search again.
+    A request of the results has a button that shows its status, see 'represent_data()'.
+
+    Parameters:
+    query (str, optional): The searched text, shown in the input. Defaults to ''.
+    results (list, optional): The results of 'search.search()'. Defaults to None, the modal before a search.
+
+    Returns:
+    dict: A dictionary representing a Slack modal with the search input and the results.
+    """
+
+    search_input = {
+        "type": "plain_text_input",
+        "action_id": "query",
+        "placeholder": {
+            "type": "plain_text",
+            "text": "π.χ. στέγη 2024, απόφαση, συνέλευση"
+        }
+    }
+    if query:
+        search_input["initial_value"] = query
+    blocks = [
+        {
+            "type": "input",
+            "block_id": "search",
+            "label": {
+                "type": "plain_text",
+                "text": "ΑΙΤΗΣΕΙΣ ΚΑΙ ΠΡΑΚΤΙΚΑ ΓΕΝΙΚΩΝ ΣΥΝΕΛΕΥΣΕΩΝ",
+                "emoji": True
+            },
+            "element": search_input
+        }
+    ]
+    if results is not None:
+        blocks.append({
+            "type": "context",
+            "elements": [{
+                "type": "mrkdwn",
+                "text": f"{len(results)} αποτελέσματα για «{query}»" if results else f"Δεν βρέθηκαν αποτελέσματα για «{query}»"
+            }]
+        })
+        for result in results:
+            blocks += [{"type": "divider"}, _search_result(result)]
+    return {
+        "type": "modal",
+        "callback_id": "search_archive",
+        "title": {
+            "type": "plain_text",
+            "text": "ΑΝΑΖΗΤΗΣΗ",
+            "emoji": True
+        },
+        "submit": {
+            "type": "plain_text",
+            "text": "ΑΝΑΖΗΤΗΣΗ",
+            "emoji": True
+        },
+        "close": {
+            "type": "plain_text",
+            "text": "ΤΕΛΟΣ",
+            "emoji": True
+        },
+        "blocks": blocks
+    }
+
+
 def send_phones():
     """
     Creates a modal with contact phone numbers.
@@ -222,55 +313,256 @@ def send_phones():
     }
 
 
-def format_data_for_slack(data):
-    image_url = os.getenv('AGIOS_NIKOLAOS_LOGO')
-    blocks = []
-    for (outer_key, outer_value) in data.items():
+def _year_block(title, image_url):
+    return {
+        "type": "section",
+        "text": {
+            "type": "mrkdwn",
+            "text": f"*{title}*"
+        },
+        "accessory": {
+            "type": "image",
+            "image_url": image_url,
+            "alt_text": 'image'
+        }
+    }
+
+
+def _meeting_blocks(title, fields):
+    blocks = [{
+        "type": "section",
+        "text": {
+            "type": "mrkdwn",
+            "text": f"_{title}_"
+        }
+    }]
+    for key, value in fields.items():
         blocks.append({
             "type": "section",
             "text": {
                 "type": "mrkdwn",
-                "text": f"*{outer_key}*"
-            },
-            "accessory": {
-                "type": "image",
-                "image_url": image_url,
-                "alt_text": 'image'
+                "text": f"*{key}:* {value}"
             }
         })
-        for (inner_key, nested_dict) in outer_value.items():
-            blocks.append({
-                "type": "section",
-                "text": {
-                    "type": "mrkdwn",
-                    "text": f"_{inner_key}_"
-                }
-            })
-            for key, value in nested_dict.items():
-                blocks.append({
-                    "type": "section",
-                    "text": {
-                        "type": "mrkdwn",
-                        "text": f"*{key}:* {value}"
-                    }
-                })
-            blocks.append({"type": "divider"})
+    blocks.append({"type": "divider"})
     return blocks
 
 
-def send_request_sinelefsi():
-    with open("data/meetings.json", "r") as read_file:
-        data = json.load(read_file)
+def _meeting_groups(data):
+    image_url = os.getenv('AGIOS_NIKOLAOS_LOGO')
+    return [(_year_block(outer_key, image_url), [_meeting_blocks(inner_key, nested_dict)
+                                                 for inner_key, nested_dict in outer_value.items()])
+            for outer_key, outer_value in data.items()]
+
+
+def format_data_for_slack(data):
+    """
+    Creates the blocks of every meeting of 'meetings.json': a header per year, then a section per meeting
+    and per field of the meeting, followed by a divider.
+
+    Parameters:
+    data (dict): The meetings, keyed by year and by meeting.
+
+    Returns:
+    list: The blocks of all the meetings, see 'paginate_meetings()' for the blocks of one modal.
+    """
 
-    blocks = format_data_for_slack(data)
+    blocks = []
+    for header, meetings in _meeting_groups(data):
+        blocks.append(header)
+        for meeting in meetings:
+            blocks.extend(meeting)
+    return blocks
+
+
+def _split_meeting(blocks, most):
+    # a meeting longer than 'most' blocks is cut in parts, each starting with the title of the meeting
+    if len(blocks) <= most:
+        return [blocks]
+    title, rest = blocks[0], blocks[1:]
+    return [[title, *rest[start:start + most - 1]] for start in range(0, len(rest), most - 1)]
+
+
+def paginate_meetings(data, size=None):
+    """
+    Splits the blocks of 'format_data_for_slack()' into pages of at most 'size' blocks.
+
+    Pages break between meetings, and a year that goes on in the next page repeats its header at the top of
+    that page. A meeting that does not fit in a page with its year header is split in parts, each repeating
+    the title of the meeting, so no page ever has more than 'size' blocks.
+
+    Parameters:
+    data (dict): The meetings, keyed by year and by meeting.
+    size (int, optional): The maximum number of blocks of a page. Defaults to MEETINGS_PAGE_BLOCKS.
+
+    Returns:
+    list: The blocks of every page, at least one (empty) page.
+    """
 
+    size = size or PAGE_BLOCKS
+    pages, page = [], []
+    for header, meetings in _meeting_groups(data):
+        if page and len(page) + 1 + (min(len(meetings[0]), size - 1) if meetings else 0) > size:
+            pages.append(page)
+            page = []
+        page.append(header)
+        for meeting in (part for blocks in meetings for part in _split_meeting(blocks, size - 1)):
+            if len(page) + len(meeting) > size and len(page) > 1:
+                pages.append(page)
+                page = [header]
+            page.extend(meeting)
+    if page or not pages:
+        pages.append(page)
+    return pages
+
+
+def _meetings_view(blocks, number, total):
     view = {
         "type": "modal",
         "title": {
             "type": "plain_text",
             "text": "Meeting Info"
         },
-        "blocks": blocks
+        "blocks": list(blocks)
     }
-
+    if total > 1:
+        buttons = []
+        if number > 0:
+            buttons.append({"type": "button", "action_id": "meetings_page_prev", "value": str(number - 1),
+                            "text": {"type": "plain_text", "text": "◀ ΠΡΟΗΓΟΥΜΕΝΗ", "emoji": True}})
+        if number < total - 1:
+            buttons.append({"type": "button", "action_id": "meetings_page_next", "value": str(number + 1),
+                            "text": {"type": "plain_text", "text": "ΕΠΟΜΕΝΗ ▶", "emoji": True}})
+        view["blocks"] += [
+            {"type": "context", "elements": [{"type": "mrkdwn", "text": f"Σελίδα {number + 1} από {total}"}]},
+            {"type": "actions", "block_id": "meetings_pages", "elements": buttons},
+        ]
     return view
+
+
+class MeetingArchive:
+    """
+    Process-wide cache of the pages of the meetings modal, built from 'meetings.json'.
+
+    The file is parsed and every page is rendered again only when its modification time or size (or the
+    logo URL of the year headers) changes, so opening any page of the modal is a list lookup.
+
+    Parameters:
+    path (str, optional): The path of the json file. Defaults to 'data/meetings.json'.
+    size (int, optional): The maximum number of meeting blocks of a page. Defaults to MEETINGS_PAGE_BLOCKS.
+    """
+
+    def __init__(self, path=MEETINGS_FILE, size=None):
+        self.path = path
+        self.size = size or PAGE_BLOCKS
+        self.version = None
+        self.pages = []
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """
+        Renders the pages again if the file changed since the last load.
+
+        Returns:
+        MeetingArchive: The archive itself, so calls can be chained.
+        """
+
+        stat = os.stat(self.path)
+        version = (stat.st_mtime_ns, stat.st_size, os.getenv('AGIOS_NIKOLAOS_LOGO'))
+        if version != self.version:
+            with self._lock:
+                if version != self.version:
+                    with open(self.path, 'r', encoding='utf-8') as read_file:
+                        data = json.load(read_file)
+                    pages = paginate_meetings(data, self.size)
+                    self.pages = [_meetings_view(blocks, number, len(pages)) for number, blocks in enumerate(pages)]
+                    self.version = version
+        return self
+
+    def page(self, number):
+        """
+        Returns the view of a page of the meetings modal, the last page if 'number' is past the end.
+        """
+
+        pages = self.refresh().pages
+        return pages[max(0, min(number, len(pages) - 1))]
+
+
+meetings = MeetingArchive()
+
+
+def send_request_sinelefsi():
+    """
+    Creates the first page of the meetings modal, see 'meetings_page()'.
+
+    Returns:
+    dict: A dictionary representing a Slack modal with the first meetings and the buttons to the next page.
+    """
+
+    return meetings.page(0)
+
+
+def meetings_page(number):
+    """
+    Creates a page of the meetings modal.
+
+    The pages are rendered once per version of 'meetings.json', the 'meetings_page_prev' and 'meetings_page_next'
+    buttons of a page carry the number of the page they lead to.
+
+    Parameters:
+    number (int): The page, starting from 0.
+
+    Returns:
+    dict: A dictionary representing a Slack modal with the meetings of the page. Shared, not to be modified.
+    """
+
+    return meetings.page(number)
+
+
+def loading_view(title):
+    """
+    Creates the placeholder modal that is opened at once, while the real modal is being built.
+
+    The placeholder carries the title of the real modal, so only its content changes when the real
+    modal replaces it, see 'modal_loader.open_modal()'.
+
+    Parameters:
+    title (str): The title of the real modal.
+
+    Returns:
+    dict: A dictionary representing a Slack modal with a loading message.
+    """
+
+    return {
+        "type": "modal",
+        "title": {"type": "plain_text", "text": title, "emoji": True},
+        "blocks": [
+            {
+                "type": "section",
+                "text": {"type": "mrkdwn", "text": ":hourglass_flowing_sand: _Φόρτωση..._"},
+            }
+        ],
+    }
+
+
+def error_view(title):
+    """
+    Creates the modal shown in place of a modal that could not be built.
+
+    Parameters:
+    title (str): The title of the modal.
+
+    Returns:
+    dict: A dictionary representing a Slack modal with an error message.
+    """
+
+    return {
+        "type": "modal",
+        "title": {"type": "plain_text", "text": title, "emoji": True},
+        "blocks": [
+            {
+                "type": "section",
+                "text": {"type": "mrkdwn", "text": ":warning: Τα δεδομένα δεν είναι διαθέσιμα, δοκιμάστε ξανά αργότερα."},
+            }
+        ],
+    }
@@ -0,0 +1,260 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import contextvars
+import cProfile
+import hmac
+import json
+import logging
+import os
+import random
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import parse_qs
+from dev_slack import config
+
+config.load()
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'data/profiles')
+MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', 50))
+
+_lock = threading.Lock()
+_active = threading.Lock()
+_settings = {
+    'enabled': os.getenv('PROFILE_ENABLED', 'false').lower() in ('1', 'true', 'yes'),
+    'rate': float(os.getenv('PROFILE_SAMPLE_RATE', 0.01)),
+}
+_counters = {
+    'sampled': 0,
+    'saved': 0,
+    'skipped': 0,
+    'removed': 0,
+}
+
+# the session of the sampled request being dispatched, see ProfilingExecutor
+current = contextvars.ContextVar('profile_session', default=None)
+
+
+def _count(name, value=1):
+    with _lock:
+        _counters[name] += value
+
+
+def authorized(token):
+    """
+    Returns True if 'token' is the admin token PROFILE_ADMIN_TOKEN. Without a configured token nobody is authorized.
+    """
+
+    expected = os.getenv('PROFILE_ADMIN_TOKEN')
+    return bool(expected and token) and hmac.compare_digest(expected, token)
+
+
+def configure(enabled=None, rate=None):
+    """
+    Switches the request profiling on or off and sets the sampled fraction, at runtime.
+
+    Parameters:
+    enabled (bool, optional): Profile sampled requests. Defaults to None, unchanged.
+    rate (float, optional): The fraction of requests profiled, between 0 and 1. Defaults to None, unchanged.
+
+    Returns:
+    dict: The new status, see 'status()'.
+    """
+
+    with _lock:
+        if enabled is not None:
+            _settings['enabled'] = bool(enabled)
+        if rate is not None:
+            _settings['rate'] = min(1.0, max(0.0, float(rate)))
+    logger.warning(f"Request profiling {'enabled' if _settings['enabled'] else 'disabled'}, "
+                   f"sample rate {_settings['rate']}")
+    return status()
+
+
+def request_key(body):
+    """
+    Returns a tag for a Slack request: its event type, action_id, callback_id or command.
+
+    Parameters:
+    body (bytes): The raw body of the '/slack/events' request.
+
+    Returns:
+    str: The tag, e.g. 'event-app_home_opened' or 'action-request_arxeio'.
+    """
+
+    try:
+        text = body.decode('utf-8')
+        if text.startswith('{'):
+            data = json.loads(text)
+            if data.get('type') == 'event_callback':
+                return f"event-{data['event'].get('type')}"
+            return data.get('type') or 'unknown'
+        form = parse_qs(text)
+        if 'payload' not in form:
+            return f"command-{form.get('command', ['unknown'])[0].lstrip('/')}"
+        payload = json.loads(form['payload'][0])
+        kind = payload.get('type')
+        if kind in ('block_actions', 'block_suggestion'):
+            action = (payload.get('actions') or [payload])[0]
+            return f"action-{action.get('action_id')}"
+        if kind in ('view_submission', 'view_closed'):
+            return f"view-{payload['view'].get('callback_id')}"
+        return f"{kind}-{payload.get('callback_id')}"
+    except (ValueError, KeyError, AttributeError, TypeError):
+        return 'unknown'
+
+
+def sample(body):
+    """
+    Decides whether a request is profiled, by the configured sample rate.
+
+    Parameters:
+    body (bytes): The raw body of the '/slack/events' request, parsed only for sampled requests.
+
+    Returns:
+    str: The tag of the request (see 'request_key()') if it is sampled, None otherwise.
+    """
+
+    if not _settings['enabled'] or random.random() >= _settings['rate']:
+        return None
+    _count('sampled')
+    return request_key(body)
+
+
+class Session:
+    """
+    The profile of one sampled request.
+
+    cProfile watches every thread of the process (Python 3.12+), so only one session runs at a time. A session is
+    opened when a sampled request arrives and is held by the request and by every listener task it submits to
+    'ProfilingExecutor'. It is saved when the last of them releases it, so the profile covers the parsing,
+    middleware and ack of the request as well as its listener, and also the work of any request served meanwhile.
+
+    Parameters:
+    key (str): The tag of the request, see 'request_key()'.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.profiler = cProfile.Profile()
+        self._holders = 1
+        self._lock = threading.Lock()
+
+    def hold(self):
+        with self._lock:
+            self._holders += 1
+
+    def release(self):
+        with self._lock:
+            self._holders -= 1
+            if self._holders:
+                return
+        self.profiler.disable()
+        _active.release()
+        _save(self.profiler, self.key)
+
+
+def start(body):
+    """
+    Opens a profiling session if the request is sampled and no other session is running.
+
+    Parameters:
+    body (bytes): The raw body of the '/slack/events' request, parsed only for sampled requests.
+
+    Returns:
+    Session: The running session, to be released once the request is handled, or None.
+    """
+
+    key = sample(body)
+    if key is None:
+        return None
+    if not _active.acquire(blocking=False):
+        _count('skipped')
+        return None
+    session = Session(key)
+    try:
+        session.profiler.enable()
+    except ValueError:
+        # another profiler is already watching the process
+        _active.release()
+        _count('skipped')
+        return None
+    return session
+
+
+def _save(profiler, key):
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        tag = re.sub(r'[^A-Za-z0-9_.-]', '_', key)
+        name = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{tag}.prof"
+        profiler.dump_stats(os.path.join(PROFILE_DIR, name))
+        _count('saved')
+        _prune()
+    except OSError as e:
+        logger.error(f"Error saving request profile: {e}")
+
+
+def _prune():
+    """
+    Removes the oldest profiles beyond PROFILE_MAX_FILES.
+    """
+
+    with _lock:
+        names = profiles()
+        for name in names[:max(0, len(names) - MAX_FILES)]:
+            try:
+                os.remove(os.path.join(PROFILE_DIR, name))
+                _counters['removed'] += 1
+            except OSError:
+                pass
+
+
+def profiles():
+    """
+    Returns the file names of the kept profiles, oldest first. Load one with 'pstats.Stats(path)' or snakeviz.
+    """
+
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    return sorted(name for name in os.listdir(PROFILE_DIR) if name.endswith('.prof'))
+
+
+def status():
+    """
+    Returns the profiling settings, the sampled, saved, skipped and removed counters and the kept profiles.
+    """
+
+    with _lock:
+        settings, counters = dict(_settings), dict(_counters)
+    return {
+        **settings,
+        'directory': PROFILE_DIR,
+        'max_files': MAX_FILES,
+        **counters,
+        'profiles': profiles(),
+    }
+
+
+def _run(session, function, args, kwargs):
+    try:
+        return function(*args, **kwargs)
+    finally:
+        session.release()
+
+
+class ProfilingExecutor(ThreadPoolExecutor):
+    """
+    The listener executor of the Bolt App, which keeps the profile of a sampled request open until its listener ends.
+
+    Bolt runs the listeners in this executor, after the request has been acknowledged. A listener submitted while
+    a sampled request is dispatched (see 'current') holds the request's session until it returns.
+    """
+
+    def submit(self, function, /, *args, **kwargs):
+        session = current.get()
+        if session is None:
+            return super().submit(function, *args, **kwargs)
+        session.hold()
+        return super().submit(_run, session, function, args, kwargs)
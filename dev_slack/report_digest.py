@@ -0,0 +1,202 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import logging
+import os
+import threading
+from dev_slack import config, channels, slack_todo
+
+config.load()
+logger = logging.getLogger(__name__)
+
+MODE = os.getenv('REPORT_DIGEST', 'off').lower()
+WINDOW = float(os.getenv('REPORT_DIGEST_WINDOW', 30))
+# Slack accepts up to 50 blocks per message: the title plus 3 blocks per report
+MAX_BLOCKS = 50
+MAX_ENTRIES = (MAX_BLOCKS - 1) // 3
+SIZE = max(1, min(int(os.getenv('REPORT_DIGEST_SIZE', 10)), MAX_ENTRIES))
+TEXT = "ΔΗΜΟΣΙΕΥΜΑ"
+
+_lock = threading.Lock()
+_digest = None
+
+
+def merge(entries):
+    """
+    Merges the blocks of several activity reports into the blocks of one message.
+
+    The title is shown once with the number of reports, followed by the blocks of every report and its divider.
+    Block IDs are numbered per report, since Slack rejects a message with repeated block IDs.
+
+    Parameters:
+    entries (list): The blocks of each report, without the title block, see 'ReportDigest.add()'.
+
+    Returns:
+    list: The blocks of the message.
+    """
+
+    blocks = [{
+        "type": "section",
+        "text": {
+            "type": "mrkdwn",
+            "text": f"> *ΑΝΑΦΟΡΑ ΔΡΑΣΤΗΡΙΟΤΗΤΑΣ* ({len(entries)})"
+        }
+    }]
+    for n, entry in enumerate(entries):
+        for block in entry:
+            if 'block_id' in block:
+                block = {**block, 'block_id': f"{block['block_id']}-{n}"}
+            blocks.append(block)
+    return blocks
+
+
+class ReportDigest:
+    """
+    Buffers activity reports and publishes them as one message per window.
+
+    Reports are collected for 'window' seconds after the first one arrives, or until 'size' reports are
+    pending, and are then posted as a single message. In the rolling mode the digest keeps updating its
+    last message instead, until it is full, so a busy channel gets one message per MAX_ENTRIES reports.
+
+    Parameters:
+    channel_id (str): The ID of the channel the reports are posted to.
+    window (float, optional): Seconds a report may wait. Defaults to REPORT_DIGEST_WINDOW (30).
+    size (int, optional): The pending reports that trigger a publish. Defaults to REPORT_DIGEST_SIZE (10).
+    rolling (bool, optional): Update a single rolling message instead of posting new ones. Defaults to False.
+    """
+
+    def __init__(self, channel_id, window=WINDOW, size=SIZE, rolling=False):
+        self.channel_id = channel_id
+        self.window = window
+        self.size = max(1, min(size, MAX_ENTRIES))
+        self.rolling = rolling
+        self._pending = []
+        self._timer = None
+        self._rolling_ts = None
+        self._rolling_entries = []
+        self._lock = threading.Lock()
+        # publishing is serialized, so the rolling message is always updated in order
+        self._publish_lock = threading.Lock()
+        self._counters = {
+            'reports': 0,
+            'posted': 0,
+            'updated': 0,
+        }
+
+    def add(self, a, b):
+        """
+        Buffers the blocks of one activity report, publishing the digest if it is full.
+
+        Parameters:
+        a (list): The report blocks, see 'reports.report_blocks()'. The first block, the title, is left out.
+        b (list): The divider blocks that follow the report.
+        """
+
+        with self._lock:
+            self._pending.append(a[1:] + b)
+            self._counters['reports'] += 1
+            full = len(self._pending) >= self.size
+            if not full and self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def flush(self):
+        """
+        Publishes the pending reports now.
+        """
+
+        with self._publish_lock:
+            with self._lock:
+                entries, self._pending = self._pending, []
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            if not entries:
+                return
+            try:
+                if self.rolling:
+                    self._roll(entries)
+                else:
+                    for i in range(0, len(entries), MAX_ENTRIES):
+                        slack_todo.send_text(TEXT, self.channel_id, blocks=merge(entries[i:i + MAX_ENTRIES]))
+                        self._count('posted')
+            except Exception as e:
+                logger.error(f"Error publishing the activity digest: {e}")
+
+    def _roll(self, entries):
+        while entries:
+            room = MAX_ENTRIES - len(self._rolling_entries) if self._rolling_ts else 0
+            if room <= 0:
+                self._rolling_ts, self._rolling_entries = None, []
+                room = MAX_ENTRIES
+            self._rolling_entries += entries[:room]
+            entries = entries[room:]
+            blocks = merge(self._rolling_entries)
+            if self._rolling_ts and slack_todo.update_ts(TEXT, self.channel_id, self._rolling_ts, blocks):
+                self._count('updated')
+            else:
+                # first message, or the rolling message has been deleted
+                self._rolling_ts = slack_todo.send_text(TEXT, self.channel_id, blocks=blocks)
+                self._count('posted')
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self):
+        """
+        Returns the pending reports and the reports, posted and updated counters.
+        """
+
+        with self._lock:
+            return {
+                'pending': len(self._pending),
+                **self._counters,
+            }
+
+
+def enabled():
+    """
+    Returns True if the activity reports are published as digests, REPORT_DIGEST=post or REPORT_DIGEST=rolling.
+    """
+
+    return MODE in ('post', 'rolling')
+
+
+def get_digest():
+    """
+    Returns the digest of the activity report channel, creating it on first use.
+    """
+
+    global _digest
+    with _lock:
+        if _digest is None:
+            _digest = ReportDigest(channels.channels_id[1], rolling=MODE == 'rolling')
+        return _digest
+
+
+def add(a, b):
+    """
+    Buffers the blocks of one activity report in the digest of the activity report channel.
+    """
+
+    get_digest().add(a, b)
+
+
+def flush():
+    """
+    Publishes the pending reports, e.g. on shutdown. Does nothing if no report was buffered.
+    """
+
+    if _digest is not None:
+        _digest.flush()
+
+
+def stats():
+    """
+    Returns the digest mode and, once a report was buffered, the digest counters.
+    """
+
+    return {'mode': MODE if enabled() else 'off', **(_digest.stats() if _digest is not None else {})}
@@ -1,15 +1,16 @@
 #  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+import asyncio
 import os
 from datetime import datetime as dt
-from dev_slack import channels, slack_todo
-import csv
+from dev_slack import channels, slack_todo, user_cache, activity_stats, report_digest
 
 
 def log_to_csv(id, user_image, user_name, button, key):
     """
-    Logs the user interaction to a CSV file.
+    Logs the user interaction to the activity store.
 
-    The function records the details of user interaction into a CSV file named 'statistic_records.csv'.
+    The function records the details of user interaction into the activity store selected by 'ACTIVITY_STORE',
+    the SQLite database 'activity.sqlite3' or the CSV file 'statistic_records.csv'.
     It appends a row with the user's ID, their image, their name, the button they've clicked,
     the key associated with the button, and the current date and time.
 
@@ -19,51 +20,29 @@ def log_to_csv(id, user_image, user_name, button, key):
     user_name (str): The name of the user.
     button (str): The button the user has clicked.
     key (str): The key associated with the button.
+
+    Note:
+    The row is written through 'activity_stats', which also updates the in-memory statistics shown
+    on the Home tab, so the file never has to be read again.
     """
 
-    with open('data/statistic_records.csv', mode='a') as file:
-        writer = csv.writer(file)
-        writer.writerow([id, user_image, user_name, button, key, dt.now()])
+    activity_stats.record(id, user_image, user_name, button, key, dt.now())
 
 
-def button_reports(body, client, logger, text, key=None):
+def report_blocks(day, user_name, user_image, report):
     """
-    Reports a user interaction to Slack and logs it to a CSV file.
-
-    This function retrieves user information, logs the interaction and then broadcasts a
-    pre-formatted message in a Slack channel notifying about the user's interaction
-    (action) along with other related information.
+    Creates the blocks of an activity report.
 
     Parameters:
-    body (dict): A dictionary with Slack's action payload.
-    client (any): Slack client that contains methods to interact with Slack API.
-    logger (any): An instance of a logging class for logging purposes.
-    text (str): The text or description of the interaction to be reported.
-    key (str, optional): An optional key related to the interaction.
+    day (str): The formatted date and time of the interaction.
+    user_name (str): The name of the user.
+    user_image (str): The URL of the user's profile image.
+    report (str): The reported button, with its key if any.
 
-    Note:
-    This function handles errors by logging them and doesn't halt the execution
-    of the program if any error occurs in retrieving user's info.
+    Returns:
+    tuple: The list of report blocks and the list with the divider block that follows it.
     """
 
-    day = dt.now().strftime('%d/%m/%Y %H:%M:%S')
-    user = body["user"]["id"]
-    response = client.users_info(user=user)
-    # if user in os.getenv('SLACK_SUPER_USERS'):
-    #     return
-    if response["ok"]:
-        # Extract username from the response
-        user_name = response["user"]["profile"]["real_name"]
-        user_image = response['user']['profile']['image_original']
-    else:
-        logger.error("Failed to retrieve user info")
-    if key:
-        report = f'{text} || {key}'
-    else:
-        report = f'{text}'
-
-    log_to_csv(user, user_image, user_name, text, key)
-
     a = [
 
         {
@@ -110,9 +89,99 @@ def button_reports(body, client, logger, text, key=None):
         "type": "divider"
     }]
 
+    return a, b
+
+
+def button_reports(body, client, logger, text, key=None):
+    """
+    Reports a user interaction to Slack and logs it to a CSV file.
+
+    This function retrieves user information through the shared user profile cache, logs the interaction and then broadcasts a
+    pre-formatted message in a Slack channel notifying about the user's interaction
+    (action) along with other related information.
+
+    Parameters:
+    body (dict): A dictionary with Slack's action payload.
+    client (any): Slack client that contains methods to interact with Slack API.
+    logger (any): An instance of a logging class for logging purposes.
+    text (str): The text or description of the interaction to be reported.
+    key (str, optional): An optional key related to the interaction.
+
+    Note:
+    This function handles errors by logging them and doesn't halt the execution
+    of the program if any error occurs in retrieving user's info.
+    With REPORT_DIGEST=post or REPORT_DIGEST=rolling the report is buffered in 'report_digest'
+    and published together with the other reports of its window, instead of two messages per click.
+    """
+
+    day = dt.now().strftime('%d/%m/%Y %H:%M:%S')
+    user = body["user"]["id"]
+    user_info = user_cache.get_user(client, user)
+    # if user in os.getenv('SLACK_SUPER_USERS'):
+    #     return
+    if user_info:
+        # Extract username from the cached profile
+        user_name = user_info["profile"]["real_name"]
+        user_image = user_info['profile']['image_original']
+    else:
+        logger.error("Failed to retrieve user info")
+    if key:
+        report = f'{text} || {key}'
+    else:
+        report = f'{text}'
+
+    log_to_csv(user, user_image, user_name, text, key)
+
+    a, b = report_blocks(day, user_name, user_image, report)
+
+    if report_digest.enabled():
+        # -------------------- BUFFERED, POSTED AS ONE DIGEST MESSAGE --------------------
+        report_digest.add(a, b)
+        return
+
     # -------------------- DEFINE TEXT OUTPUT --------------------
     report = f"ΔΗΜΟΣΙΕΥΜΑ"
     # -------------------- SLACK BOT SEND TEXT --------------------
     slack_todo.send_text(report, channels.channels_id[1], blocks=a)
     # -------------------- SLACK BOT SEND DIVIDER --------------------
     slack_todo.send_text(report, channels.channels_id[1], blocks=b)
+
+
+async def button_reports_async(body, client, logger, text, key=None):
+    """
+    Reports a user interaction to Slack and logs it, on the AsyncWebClient.
+
+    The asynchronous counterpart of 'button_reports()', used in the async Bolt mode. The user's profile
+    is awaited through the shared user profile cache, the record is written in a worker thread and the
+    report is posted with 'slack_todo_async', so the event loop is never blocked.
+
+    Parameters:
+    body (dict): A dictionary with Slack's action payload.
+    client (AsyncWebClient): Async Slack client that contains methods to interact with Slack API.
+    logger (any): An instance of a logging class for logging purposes.
+    text (str): The text or description of the interaction to be reported.
+    key (str, optional): An optional key related to the interaction.
+    """
+
+    # imported here, the async client needs aiohttp which the sync mode does not
+    from dev_slack import slack_todo_async
+
+    day = dt.now().strftime('%d/%m/%Y %H:%M:%S')
+    user = body["user"]["id"]
+    user_info = await user_cache.get_user_async(client, user)
+    if not user_info:
+        logger.error("Failed to retrieve user info")
+        return
+    user_name = user_info["profile"]["real_name"]
+    user_image = user_info['profile']['image_original']
+    report = f'{text} || {key}' if key else f'{text}'
+
+    await asyncio.to_thread(log_to_csv, user, user_image, user_name, text, key)
+
+    a, b = report_blocks(day, user_name, user_image, report)
+    if report_digest.enabled():
+        # a full digest is published by the caller, keep it off the event loop
+        await asyncio.to_thread(report_digest.add, a, b)
+        return
+    await slack_todo_async.send_text("ΔΗΜΟΣΙΕΥΜΑ", channels.channels_id[1], blocks=a)
+    await slack_todo_async.send_text("ΔΗΜΟΣΙΕΥΜΑ", channels.channels_id[1], blocks=b)
@@ -0,0 +1,195 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import asyncio
+import logging
+import os
+import random
+import socket
+import sys
+import threading
+import time
+from collections import defaultdict
+from urllib.error import URLError
+from slack_sdk.errors import SlackApiError
+from dev_slack import config
+
+config.load()
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = int(os.getenv('SLACK_RETRY_ATTEMPTS', 5))
+BASE_DELAY = float(os.getenv('SLACK_RETRY_BASE_DELAY', 1))
+MAX_DELAY = float(os.getenv('SLACK_RETRY_MAX_DELAY', 30))
+DEADLINE = float(os.getenv('SLACK_RETRY_DEADLINE', 60))
+# methods that post something: a timeout or a server error may come after Slack accepted the call,
+# so they are only retried when rate limited or when the request was never sent
+NON_IDEMPOTENT = {'chat_postMessage', 'chat_postEphemeral', 'chat_scheduleMessage', 'chat_meMessage',
+                  'files_upload', 'files_upload_v2', 'files_completeUploadExternal'}
+# errors raised while connecting, before the request was sent
+UNSENT_ERRORS = (ConnectionRefusedError, socket.gaierror)
+
+_lock = threading.Lock()
+_counters = defaultdict(lambda: {'retries': 0, 'giveups': 0})
+
+
+def retry_after(error, default=1.0):
+    """
+    Returns the number of seconds Slack asks to wait after a rate limited call.
+
+    Parameters:
+    error (SlackApiError): The error raised by the call.
+    default (float, optional): The delay used when the response has no 'Retry-After' header. Defaults to 1.
+
+    Returns:
+    float: The delay in seconds.
+    """
+
+    try:
+        return float(error.response.headers.get('Retry-After', default))
+    except (AttributeError, TypeError, ValueError):
+        return default
+
+
+def unsent(error):
+    """
+    Returns True if 'error' was raised before the request reached Slack, e.g. a refused connection or a
+    failed DNS lookup, so retrying it cannot repeat the call.
+    """
+
+    if isinstance(error, URLError) and not isinstance(error.reason, str):
+        error = error.reason
+    # aiohttp is only loaded by the async mode, its connection errors are raised before sending as well
+    aiohttp = sys.modules.get('aiohttp')
+    return isinstance(error, UNSENT_ERRORS) or (aiohttp is not None and isinstance(error, aiohttp.ClientConnectorError))
+
+
+def count(name, event):
+    """
+    Increments the 'retries' or 'giveups' counter of a Slack method.
+    """
+
+    with _lock:
+        _counters[name][event] += 1
+
+
+def stats():
+    """
+    Returns the retry and give-up counters of every Slack method that was retried.
+
+    Returns:
+    dict: The counters, keyed by method name.
+    """
+
+    with _lock:
+        return {name: dict(counters) for name, counters in _counters.items()}
+
+
+class RetryPolicy:
+    """
+    Retries Slack API calls with exponential backoff, jitter and 'Retry-After' awareness.
+
+    Rate limited calls wait for the delay Slack asks for, server and connection errors wait a random
+    delay of up to 'base_delay * 2 ** attempt' seconds (capped at 'max_delay'). Other errors are raised
+    at once. A call is given up after 'max_attempts' attempts, or when the next wait would pass the
+    per-call 'deadline'. The methods of NON_IDEMPOTENT, e.g. 'chat_postMessage', are retried only when
+    rate limited or when the request was never sent: after a timeout or a server error Slack may have
+    posted the message already, and a retry would post it twice.
+
+    Parameters:
+    max_attempts (int, optional): The maximum number of attempts. Defaults to SLACK_RETRY_ATTEMPTS (5).
+    base_delay (float, optional): The first backoff delay in seconds. Defaults to SLACK_RETRY_BASE_DELAY (1).
+    max_delay (float, optional): The maximum backoff delay in seconds. Defaults to SLACK_RETRY_MAX_DELAY (30).
+    deadline (float, optional): The maximum seconds spent on a call. Defaults to SLACK_RETRY_DEADLINE (60).
+    """
+
+    def __init__(self, max_attempts=MAX_ATTEMPTS, base_delay=BASE_DELAY, max_delay=MAX_DELAY, deadline=DEADLINE):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+    def delay(self, error, attempt, idempotent=True):
+        """
+        Returns the seconds to wait before retrying after 'error', or None if the error is not retryable.
+
+        Parameters:
+        error (Exception): The error raised by the call.
+        attempt (int): The number of attempts that failed before this one.
+        idempotent (bool, optional): False for a call that must not be repeated once it reached Slack,
+                                     only rate limits and errors raised before sending are retried.
+                                     Defaults to True.
+        """
+
+        if isinstance(error, SlackApiError):
+            if error.response.get('error') == 'ratelimited' or error.response.status_code == 429:
+                return retry_after(error, self.base_delay)
+            if error.response.status_code < 500:
+                return None
+        if not idempotent and not unsent(error):
+            return None
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, name, function, *args, **kwargs):
+        """
+        Calls 'function' and retries it according to the policy.
+
+        Parameters:
+        name (str): The name of the Slack method, used for the counters and the logs, and to tell the
+                    NON_IDEMPOTENT methods.
+        function (function): The client method to call.
+
+        Returns:
+        any: The result of the call.
+
+        Raises:
+        SlackApiError: The last error, if the call is not retryable or is given up.
+        """
+
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            try:
+                return function(*args, **kwargs)
+            except (SlackApiError, URLError, ConnectionError, TimeoutError) as e:
+                delay = self.delay(e, attempt, name not in NON_IDEMPOTENT)
+                if delay is None:
+                    raise
+                attempt += 1
+                if attempt >= self.max_attempts or time.monotonic() - started + delay > self.deadline:
+                    count(name, 'giveups')
+                    logger.error(f"Giving up {name} after {attempt} attempts: {e}")
+                    raise
+                count(name, 'retries')
+                logger.warning(f"Retrying {name} in {delay:.1f}s (attempt {attempt}): {e}")
+                time.sleep(delay)
+
+    async def call_async(self, name, function, *args, **kwargs):
+        """
+        Awaits the coroutine function 'function' and retries it according to the policy.
+
+        The asynchronous counterpart of 'call()', used with the AsyncWebClient. Waits are spent
+        in 'asyncio.sleep', so the event loop keeps serving other requests. The connection errors of
+        aiohttp ('aiohttp.ClientError') are retried like the 'URLError' of the synchronous client.
+        """
+
+        # imported here, like the AsyncWebClient, since only the async mode needs aiohttp
+        import aiohttp
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            try:
+                return await function(*args, **kwargs)
+            except (SlackApiError, aiohttp.ClientError, ConnectionError, TimeoutError) as e:
+                delay = self.delay(e, attempt, name not in NON_IDEMPOTENT)
+                if delay is None:
+                    raise
+                attempt += 1
+                if attempt >= self.max_attempts or time.monotonic() - started + delay > self.deadline:
+                    count(name, 'giveups')
+                    logger.error(f"Giving up {name} after {attempt} attempts: {e}")
+                    raise
+                count(name, 'retries')
+                logger.warning(f"Retrying {name} in {delay:.1f}s (attempt {attempt}): {e}")
+                await asyncio.sleep(delay)
+
+
+policy = RetryPolicy()
@@ -0,0 +1,181 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import json
+import logging
+import os
+import threading
+from dev_slack import config, functions, text_index
+
+config.load()
+logger = logging.getLogger(__name__)
+
+MEETINGS_FILE = 'data/meetings.json'
+# two blocks per result, Slack shows at most 100 blocks in a modal
+RESULTS = max(1, min(int(os.getenv('SEARCH_RESULTS', 20)), 45))
+# the stages shown by 'functions.display_status()', the OneDrive links and PINs are not searchable
+STATUS_FIELDS = {
+    'management_a': 'ΣΥΝΕΛΕΥΣΗ ΔΣ',
+    'management_b': 'ΥΠΟΓΡΑΦΗ',
+    'municipality_a': 'ΠΡΩΤΟΚΟΛΛΟ ΔΗΜΟΥ',
+    'municipality_b': 'ΑΡΜΟΔΙΑ ΥΠΗΡΕΣΙΑ',
+    'municipality_c': 'ΘΕΜΑ ΣΤΟ ΣΥΜΒΟΥΛΙΟ',
+    'municipality_d': 'ΑΠΟΦΑΣΗ',
+}
+# a word of a title counts as much as three words of a detail
+TITLE_WEIGHT = 3
+
+
+def request_fields(protocol, request):
+    """
+    Returns the searchable fields of a request: its name, its protocol number and its status stages.
+    """
+
+    return ((request.get('name') or '', TITLE_WEIGHT), (protocol, TITLE_WEIGHT),
+            *((f"{label}: {request[field]}", 1) for field, label in STATUS_FIELDS.items() if request.get(field)))
+
+
+def meeting_fields(year, meeting, details):
+    """
+    Returns the searchable fields of a meeting of 'meetings.json': its name, its year and its details.
+    """
+
+    return ((meeting, TITLE_WEIGHT), (year, 1), *((f"{key}: {value}", 1) for key, value in details.items()))
+
+
+class ArchiveSearch:
+    """
+    Process-wide full-text search over the request archive and the meetings of the general assemblies.
+
+    The index is built on first use and kept up to date as the files change: 'requests.json' is followed through
+    'functions.archive', 'meetings.json' by its modification time and size. When a file changes, it is parsed
+    again and only the documents that were added, changed or removed are re-indexed.
+    """
+
+    def __init__(self, meetings_path=MEETINGS_FILE):
+        self.meetings_path = meetings_path
+        self.index = text_index.InvertedIndex()
+        self.versions = {}
+        self._lock = threading.Lock()
+
+    def _sync(self, source, documents):
+        # documents: {doc_id: fields} of one source, the documents of the source missing from it are removed
+        changed = sum(self.index.add(doc_id, fields) for doc_id, fields in documents.items())
+        stale = [doc_id for doc_id in self.index.documents if doc_id[0] == source and doc_id not in documents]
+        for doc_id in stale:
+            self.index.remove(doc_id)
+        if changed or stale:
+            logger.info(f"Search index: {changed} {source} documents indexed, {len(stale)} removed")
+
+    def _requests(self):
+        try:
+            archive = functions.archive.refresh()
+        except FileNotFoundError:
+            return None, {}
+        # the version is read first, the archive replaces its records before its version
+        version = archive.version
+        if version == self.versions.get('request'):
+            return version, None
+        return version, {('request', protocol): request_fields(protocol, request)
+                         for protocol, request in archive.records.items()}
+
+    def _meetings(self):
+        try:
+            stat = os.stat(self.meetings_path)
+        except FileNotFoundError:
+            return None, {}
+        version = (stat.st_mtime_ns, stat.st_size)
+        if version == self.versions.get('meeting'):
+            return version, None
+        with open(self.meetings_path, 'r', encoding='utf-8') as read_file:
+            data = json.load(read_file)
+        return version, {('meeting', year, meeting): meeting_fields(year, meeting, details)
+                         for year, meetings in data.items() for meeting, details in meetings.items()}
+
+    def refresh(self):
+        """
+        Re-indexes the documents of the files that changed since the last refresh.
+
+        Returns:
+        ArchiveSearch: The search itself, so calls can be chained.
+        """
+
+        with self._lock:
+            for source, load in (('request', self._requests), ('meeting', self._meetings)):
+                version, documents = load()
+                if documents is not None and version != self.versions.get(source, False):
+                    self._sync(source, documents)
+                    self.versions[source] = version
+        return self
+
+    def search(self, query, limit=RESULTS):
+        """
+        Searches the requests and the meetings.
+
+        The results are ranked by 'text_index.InvertedIndex.search()', a request whose protocol number is the
+        whole query comes first.
+
+        Parameters:
+        query (str): The words searched, accents and case are ignored.
+        limit (int, optional): The most results. Defaults to SEARCH_RESULTS.
+
+        Returns:
+        list: The results, best first, as dictionaries with the 'kind' ('request' or 'meeting'), the 'title',
+              the 'key' of a request or the 'year' of a meeting, and the 'details' fields with matched words.
+        """
+
+        self.refresh()
+        with self._lock:
+            hits = self.index.search(query, limit)
+            exact = ('request', query.strip())
+            if exact in self.index:
+                # a protocol number typed in full comes first, as in the archive picker
+                hits = [(exact, 0.0, text_index.words(exact[1]))] + [hit for hit in hits if hit[0] != exact]
+            return [self._result(doc_id, set(words)) for doc_id, _, words in hits[:limit]]
+
+    def _result(self, doc_id, matched):
+        fields = self.index.documents[doc_id]
+        details = [text for text, weight in fields[2:] if matched.intersection(text_index.words(text))]
+        if doc_id[0] == 'request':
+            return {'kind': 'request', 'key': doc_id[1], 'title': fields[0][0], 'details': details}
+        return {'kind': 'meeting', 'year': doc_id[1], 'title': doc_id[2], 'details': details}
+
+
+archive_search = ArchiveSearch()
+
+
+def warm():
+    """
+    Builds the search index ahead of the first search, errors are logged.
+    """
+
+    try:
+        archive_search.refresh()
+    except Exception as e:
+        logger.error(f"Error building the search index: {e}")
+
+
+def stats():
+    """
+    Returns the size of the search index.
+
+    Returns:
+    dict: The indexed requests, meetings and words, and the version of the indexed files.
+    """
+
+    archive = archive_search
+    with archive._lock:
+        documents = [doc_id[0] for doc_id in archive.index.documents]
+        return {
+            'requests': documents.count('request'),
+            'meetings': documents.count('meeting'),
+            'words': len(archive.index.postings),
+            'versions': {source: list(version) if version else None for source, version in archive.versions.items()},
+        }
+
+
+def search(query, limit=RESULTS):
+    """
+    Searches the requests and the meetings, see 'ArchiveSearch.search()'.
+    """
+
+    return archive_search.search(query, limit)
@@ -0,0 +1,408 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import http.client
+import io
+import logging
+import os
+import ssl
+import threading
+import time
+from urllib.error import HTTPError
+from urllib.parse import urlsplit
+from slack_sdk import WebClient
+from dev_slack import config, metrics, retry
+
+config.load()
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.getenv('SLACK_POOL_SIZE', 10))
+CONNECT_TIMEOUT = float(os.getenv('SLACK_CONNECT_TIMEOUT', 5))
+READ_TIMEOUT = int(os.getenv('SLACK_READ_TIMEOUT', 30))
+IDLE_TIMEOUT = float(os.getenv('SLACK_POOL_IDLE_TIMEOUT', 60))
+# points every client to another Slack API, e.g. the stub of the load test harness
+API_URL = os.getenv('SLACK_API_URL', WebClient.BASE_URL)
+
+_lock = threading.Lock()
+_pools = {}
+_clients = {}
+_async_clients = {}
+_async_session = None
+_async_client_class = None
+
+
+class ConnectionPool:
+    """
+    A thread safe pool of kept-alive HTTPS (or HTTP) connections to one host.
+
+    Connections are handed out newest first and returned after the response has been read, so consecutive
+    calls reuse the same TLS connection instead of paying a new handshake. At most 'size' connections are
+    open at a time, callers beyond that wait for a connection to be returned. Connections idle for longer
+    than 'idle_timeout' are closed instead of reused, since the server may already have dropped them.
+
+    Parameters:
+    host (str): The host (and optional port) of the connections, e.g. 'slack.com'.
+    size (int, optional): The maximum number of connections. Defaults to SLACK_POOL_SIZE (10).
+    connect_timeout (float, optional): Seconds to wait for a connection. Defaults to SLACK_CONNECT_TIMEOUT (5).
+    read_timeout (float, optional): Seconds to wait for a response. Defaults to SLACK_READ_TIMEOUT (30).
+    idle_timeout (float, optional): Seconds a connection may stay idle. Defaults to SLACK_POOL_IDLE_TIMEOUT (60).
+    context (ssl.SSLContext, optional): The SSL context of the connections. Defaults to the system defaults,
+                                        loaded on the first connection.
+    scheme (str, optional): 'https' or 'http'. Defaults to 'https'.
+    """
+
+    def __init__(self, host, size=POOL_SIZE, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT,
+                 idle_timeout=IDLE_TIMEOUT, context=None, scheme='https'):
+        self.host = host
+        self.scheme = scheme
+        self.size = max(1, size)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.idle_timeout = idle_timeout
+        self._context = context
+        self._idle = []
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._counters = {
+            'requests': 0,
+            'created': 0,
+            'reused': 0,
+            'discarded': 0,
+            'errors': 0,
+        }
+
+    @property
+    def context(self):
+        # loading the CA certificates takes tens of milliseconds, which the app should not pay at import
+        if self._context is None and self.scheme == 'https':
+            self._context = ssl.create_default_context()
+        return self._context
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _connect(self):
+        if self.scheme == 'https':
+            connection = http.client.HTTPSConnection(self.host, timeout=self.connect_timeout, context=self.context)
+        else:
+            connection = http.client.HTTPConnection(self.host, timeout=self.connect_timeout)
+        connection.connect()
+        connection.sock.settimeout(self.read_timeout)
+        self._count('created')
+        return connection
+
+    def _acquire(self):
+        """
+        Returns an idle connection that is still fresh, or None if a new one has to be opened.
+        """
+
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                connection, used = self._idle.pop()
+                if now - used < self.idle_timeout:
+                    self._counters['reused'] += 1
+                    return connection
+                self._counters['discarded'] += 1
+                connection.close()
+        return None
+
+    def _release(self, connection, reuse):
+        if reuse:
+            with self._lock:
+                self._idle.append((connection, time.monotonic()))
+        else:
+            connection.close()
+
+    def request(self, method, path, body=None, headers=None, replay=True):
+        """
+        Sends a request on a pooled connection and reads the whole response.
+
+        A reused connection that turns out to be closed by the server is replaced by a new one and
+        the request is sent once more. If the connection failed before the request was sent, it is
+        always sent again. If it failed while the response was awaited, the server may have handled
+        the request, so it is sent again only when 'replay' is set. Any other error closes the
+        connection and is raised.
+
+        Parameters:
+        method (str): The HTTP method.
+        path (str): The path and query of the URL.
+        body (bytes, optional): The body of the request. Defaults to None.
+        headers (dict, optional): The headers of the request. Defaults to None.
+        replay (bool, optional): Send the request again when a reused connection is dropped after the
+                                 request was sent. Set it to False for requests that must not be repeated,
+                                 e.g. posts. Defaults to True.
+
+        Returns:
+        tuple: The status code, the headers (http.client.HTTPMessage), the reason phrase and the body (bytes).
+        """
+
+        self._count('requests')
+        self._slots.acquire()
+        try:
+            connection = self._acquire()
+            reused = connection is not None
+            while True:
+                if connection is None:
+                    connection = self._connect()
+                sent = False
+                try:
+                    connection.request(method, path, body=body, headers=headers or {})
+                    sent = True
+                    response = connection.getresponse()
+                    data = response.read()
+                except (http.client.RemoteDisconnected, http.client.CannotSendRequest,
+                        ConnectionResetError, BrokenPipeError) as e:
+                    connection.close()
+                    unsent = not sent and isinstance(e, (http.client.CannotSendRequest, BrokenPipeError))
+                    if not reused or not (unsent or replay):
+                        self._count('errors')
+                        raise
+                    logger.info(f"Stale connection to {self.host} replaced: {e}")
+                    self._count('discarded')
+                    connection, reused = None, False
+                    continue
+                except Exception:
+                    connection.close()
+                    self._count('errors')
+                    raise
+                self._release(connection, not response.will_close)
+                return response.status, response.headers, response.reason, data
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """
+        Closes every idle connection of the pool.
+        """
+
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            connection.close()
+
+    def stats(self):
+        """
+        Returns the state of the pool.
+
+        Returns:
+        dict: The host and size of the pool, the idle connections and the requests, created, reused,
+              discarded and errors counters.
+        """
+
+        with self._lock:
+            return {
+                'host': self.host,
+                'size': self.size,
+                'idle': len(self._idle),
+                **self._counters,
+            }
+
+
+class PooledWebClient(WebClient):
+    """
+    A slack_sdk WebClient that sends its requests on a shared 'ConnectionPool'.
+
+    Only the transport is replaced: requests are built and parsed by WebClient as before. Requests to other
+    hosts (e.g. file uploads), through a proxy, or with an 'ssl' context other than the one of the pool use
+    the default urllib transport. Every call is recorded in the per-method metrics of 'metrics.observe_api()'.
+    The built-in retry handlers of WebClient are off unless 'retry_handlers' is given, since the calls are
+    retried by 'retry.policy'. The pool does not send the methods of 'retry.NON_IDEMPOTENT' again once they
+    may have reached Slack.
+
+    Parameters:
+    pool (ConnectionPool): The pool of the API host.
+    **kwargs: The arguments of slack_sdk's WebClient.
+
+    Note:
+    The transport is replaced by overriding '_perform_urllib_http_request_internal', a private method of
+    slack_sdk's BaseClient, so slack_sdk is pinned in requirements.txt.
+    """
+
+    def __init__(self, pool, **kwargs):
+        kwargs.setdefault('retry_handlers', [])
+        super().__init__(**kwargs)
+        self.pool = pool
+
+    def api_call(self, api_method, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = super().api_call(api_method, **kwargs)
+        except Exception as e:
+            metrics.observe_api(api_method, time.perf_counter() - started, e)
+            raise
+        metrics.observe_api(api_method, time.perf_counter() - started)
+        return response
+
+    def _perform_urllib_http_request_internal(self, url, req):
+        parts = urlsplit(url)
+        if self.proxy or parts.scheme != self.pool.scheme or parts.netloc != self.pool.host or \
+                (self.ssl is not None and self.ssl is not self.pool.context):
+            return super()._perform_urllib_http_request_internal(url, req)
+        path = f'{parts.path}?{parts.query}' if parts.query else parts.path
+        # '/api/chat.postMessage' is called as 'chat_postMessage'
+        name = parts.path.rsplit('/', 1)[-1].replace('.', '_')
+        status, headers, reason, body = self.pool.request(req.get_method(), path, req.data, dict(req.header_items()),
+                                                          replay=name not in retry.NON_IDEMPOTENT)
+        if status >= 400:
+            # handled by WebClient exactly as the errors of urllib
+            raise HTTPError(url, status, reason, headers, io.BytesIO(body))
+        if headers.get_content_type() == 'application/gzip':
+            return {'status': status, 'headers': headers, 'body': body}
+        return {'status': status, 'headers': headers, 'body': body.decode(headers.get_content_charset() or 'utf-8')}
+
+
+def get_pool(host='slack.com', scheme='https'):
+    """
+    Returns the shared connection pool of a host, creating it on first use.
+    """
+
+    with _lock:
+        if host not in _pools:
+            _pools[host] = ConnectionPool(host, scheme=scheme)
+        return _pools[host]
+
+
+def get_client(token=None):
+    """
+    Returns the shared WebClient of a token, which keeps its connections to Slack alive.
+
+    Every module that talks to Slack (the Bolt listeners of main.py, slack_todo and, through it, reports
+    and bot_presence) gets its client from here, so all of them share one pool of connections.
+
+    Parameters:
+    token (str, optional): The bot token. Defaults to the environment variable SLACK_TOKEN.
+
+    Returns:
+    PooledWebClient: The client of the token.
+    """
+
+    token = token or os.getenv('SLACK_TOKEN')
+    with _lock:
+        client = _clients.get(token)
+    if client is None:
+        parts = urlsplit(API_URL)
+        client = PooledWebClient(get_pool(parts.netloc, parts.scheme), token=token, base_url=API_URL,
+                                 timeout=READ_TIMEOUT)
+        with _lock:
+            client = _clients.setdefault(token, client)
+    return client
+
+
+def async_client_class():
+    """
+    Returns the class of the async clients, an AsyncWebClient whose calls are recorded by 'metrics.observe_api()'.
+
+    The class is built on first use, since the AsyncWebClient pulls in aiohttp, which only the async mode needs.
+
+    Returns:
+    type: The InstrumentedAsyncWebClient class.
+
+    Raises:
+    ImportError: If aiohttp is not installed.
+    """
+
+    global _async_client_class
+    if _async_client_class is None:
+        from slack_sdk.web.async_client import AsyncWebClient
+
+        class InstrumentedAsyncWebClient(AsyncWebClient):
+            def __init__(self, **kwargs):
+                # the calls are retried by 'retry.policy', not by the built-in retry handlers
+                kwargs.setdefault('retry_handlers', [])
+                super().__init__(**kwargs)
+
+            async def api_call(self, api_method, **kwargs):
+                started = time.perf_counter()
+                try:
+                    response = await super().api_call(api_method, **kwargs)
+                except Exception as e:
+                    metrics.observe_api(api_method, time.perf_counter() - started, e)
+                    raise
+                metrics.observe_api(api_method, time.perf_counter() - started)
+                return response
+
+        _async_client_class = InstrumentedAsyncWebClient
+    return _async_client_class
+
+
+def _open_async_session():
+    global _async_session
+    import aiohttp
+
+    if _async_session is None or _async_session.closed:
+        _async_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=POOL_SIZE, keepalive_timeout=IDLE_TIMEOUT),
+            timeout=aiohttp.ClientTimeout(total=READ_TIMEOUT, connect=CONNECT_TIMEOUT))
+    return _async_session
+
+
+def get_async_client(token=None):
+    """
+    Returns the shared AsyncWebClient of a token, for the async Bolt mode.
+
+    The clients share one aiohttp session, whose connector keeps up to SLACK_POOL_SIZE connections alive.
+    The session is created on the first call from the running event loop.
+
+    Parameters:
+    token (str, optional): The bot token. Defaults to the environment variable SLACK_TOKEN.
+
+    Returns:
+    InstrumentedAsyncWebClient: The client of the token.
+    """
+
+    token = token or os.getenv('SLACK_TOKEN')
+    session = _open_async_session()
+    client = _async_clients.get(token)
+    if client is None or client.session is not session:
+        client = _async_clients[token] = async_client_class()(token=token, base_url=API_URL, timeout=READ_TIMEOUT,
+                                                              session=session)
+    return client
+
+
+async def close_async():
+    """
+    Closes the shared aiohttp session of the async clients.
+    """
+
+    global _async_session
+    if _async_session is not None and not _async_session.closed:
+        await _async_session.close()
+    _async_session = None
+
+
+def stats():
+    """
+    Returns the state of the connection pools.
+
+    Returns:
+    dict: The stats of every connection pool keyed by host and, in the async mode, the
+          limit and state of the aiohttp session.
+    """
+
+    with _lock:
+        pools = list(_pools.values())
+    report = {pool.host: pool.stats() for pool in pools}
+    if _async_session is not None:
+        report['aiohttp'] = {
+            'size': POOL_SIZE,
+            'open': not _async_session.closed,
+        }
+    return report
+
+
+def _pool_metrics():
+    lines = []
+    pools = stats()
+    pools.pop('aiohttp', None)
+    for event in ('requests', 'created', 'reused', 'discarded', 'errors'):
+        name = f'slack_pool_{event}_total'
+        lines += [f'# HELP {name} Slack connection pool {event}.', f'# TYPE {name} counter']
+        lines += [f'{name}{{host="{host}"}} {pool[event]}' for host, pool in sorted(pools.items())]
+    lines += ['# HELP slack_pool_idle_connections Idle kept-alive connections to Slack.',
+              '# TYPE slack_pool_idle_connections gauge']
+    lines += [f'slack_pool_idle_connections{{host="{host}"}} {pool["idle"]}' for host, pool in sorted(pools.items())]
+    return lines
+
+
+metrics.Collector(_pool_metrics)
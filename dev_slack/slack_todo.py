@@ -1,17 +1,39 @@
 #  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
 
+import functools
 import logging
 from slack_sdk.errors import SlackApiError
-from slack_sdk import WebClient
 import json
 import os
-from dev_slack import channels
-from dotenv import load_dotenv
+from dev_slack import channels, message_index, bulk_delete, retry, slack_client
+from dev_slack import config
 
 
-load_dotenv()
+config.load()
 logger = logging.getLogger(__name__)
-client = WebClient(token=os.getenv('SLACK_TOKEN'))
+# shared with the Bolt listeners, see slack_client.get_client()
+client = slack_client.get_client()
+
+
+def _call(method, **kwargs):
+    """
+    Calls a method of the module's WebClient under the shared retry policy.
+
+    Rate limited, server and connection errors are retried with exponential backoff and jitter,
+    honouring 'Retry-After', up to the attempt limit and the per-call deadline of 'retry.policy'.
+    Posts and uploads are only retried when rate limited or not sent, see 'retry.NON_IDEMPOTENT'.
+
+    Parameters:
+    method (str): The name of the WebClient method, e.g. 'chat_postMessage'.
+
+    Returns:
+    SlackResponse: The response of the call.
+
+    Raises:
+    SlackApiError: If the call fails with a non retryable error or is given up.
+    """
+
+    return retry.policy.call(method, getattr(client, method), **kwargs)
 
 
 def delete(channel_id, message_id):
@@ -25,37 +47,47 @@ def delete(channel_id, message_id):
     channel_id (str): The ID of the channel from which the message is to be deleted.
     message_id (str): The timestamp of the message to be deleted.
 
+    Returns:
+    bool: True if the message was deleted, False otherwise.
+
     Exceptions:
     SlackApiError: If there is any error in deleting the message, a SlackApiError is raised which is then caught and logged.
     """
 
     try:
         # Call the chat.chatDelete method using the built-in WebClient
-        result = client.chat_delete(
+        result = _call('chat_delete',
             channel=channel_id,
             ts=message_id
         )
         logger.info(result)
-
+        message_index.forget(channel_id, message_id)
+        return True
 
     except SlackApiError as e:
 
         if e.response['error'] == 'ratelimited':
             logger.error('Rate limit hit')
         else:
+            if e.response['error'] == 'message_not_found':
+                message_index.forget(channel_id, message_id)
             logger.error(f"Error deleting message: {e}")
+        return False
 
 
-def get_from_text_history(channel_id, text):
+def get_from_text_history(channel_id, text, use_index=True):
     """
     Fetches the timestamp of a message starting with a specific text from the channel's history.
 
-    This function goes through the messages in a channel's history and returns the timestamp
-    (Thread ID) of the first message starting with the given text.
+    This function first looks the text up in the index of the messages posted by the bot. On a miss
+    it streams the messages in a channel's history, newest first, and returns the timestamp
+    (Thread ID) of the first message starting with the given text. Only the pages read until the
+    match are fetched.
 
     Parameters:
     channel_id (str): The ID of the channel from which the history is to be fetched.
     text (str): The beginning text of the message whose Thread ID is to be returned.
+    use_index (bool, optional): Look the text up in the message index first. Defaults to True.
 
     Returns:
     str: The timestamp (Thread ID) of the message. Empty string if such message is not found.
@@ -63,16 +95,20 @@ def get_from_text_history(channel_id, text):
     Raises:
     SlackApiError: If an error occurs while fetching the history, a SlackApiError is raised
     and the error info is logged.
+
+    Note:
+    When several messages start with the text, the newest one is returned. Before the history was
+    streamed, the last match of the first history page was returned, which is the oldest one of that page.
     """
 
+    if use_index and (thread_id := message_index.lookup(channel_id, text, prefix=True)):
+        return thread_id
     try:
-        x = (history(channel_id))
-        thread_id = ''
-        for message in x:
+        for message in iter_history(channel_id):
             # print(message.get('text'))
-            if message.get('text').startswith(text):
-                thread_id = message.get('ts')
-        return thread_id
+            if (message.get('text') or '').startswith(text):
+                return message.get('ts')
+        return ''
     except SlackApiError as e:
         logger.error("Error creating conversation: {}".format(e))
 
@@ -91,92 +127,135 @@ def delete_with_specific_text(channel_id, text):
 
     Note:
     This function deletes the first occurrence of a message starting with the specified text from the channel's history. It doesn't affect any subsequent messages in the channel that start with the same text.
+    A message found in the message index that can no longer be deleted is dropped from the index and searched again in the history.
     """
 
-    delete(channel_id, get_from_text_history(channel_id, text))
+    thread_id = message_index.lookup(channel_id, text, prefix=True)
+    if not (thread_id and delete(channel_id, thread_id)):
+        delete(channel_id, get_from_text_history(channel_id, text, use_index=False))
 
 
-def history(channel_id):
+def iter_history(channel_id, oldest=None, latest=None, limit=None, page_size=200, raise_errors=False):
+    """
+    Streams the history of messages from a given Slack channel, newest first.
+
+    This generator calls the method 'conversations_history' lazily, one page at a time, and follows
+    'next_cursor' only when the caller asks for more messages. Callers that stop iterating once they
+    found what they look for only pay for the pages they actually read.
+
+    Parameters:
+    channel_id (str): The ID of the channel from which the history is fetched.
+    oldest (str, optional): Only messages after this timestamp are returned. Defaults to None.
+    latest (str, optional): Only messages before this timestamp are returned. Defaults to None.
+    limit (int, optional): The maximum number of messages returned. Defaults to None (the whole history).
+    page_size (int, optional): The number of messages requested per page. Defaults to 200.
+    raise_errors (bool, optional): Raise the error of a page that could not be fetched, instead of ending
+                                   the iteration as if the history was over. Defaults to False.
+
+    Yields:
+    dict: The messages of the conversation's history.
+
+    Raises:
+    SlackApiError: If any error occurs while fetching a page, the error info is logged and
+    the iteration stops, or the error is raised when 'raise_errors' is set.
+    """
+
+    arguments = {'channel': channel_id, 'limit': min(page_size, limit) if limit else page_size}
+    if oldest:
+        arguments['oldest'] = oldest
+    if latest:
+        arguments['latest'] = latest
+    count = 0
+    while True:
+        try:
+            result = _call('conversations_history', **arguments)
+        except SlackApiError as e:
+            logger.error("Error fetching conversation history: {}".format(e))
+            if raise_errors:
+                raise
+            return
+        logger.info("{} messages found in {}".format(len(result["messages"]), channel_id))
+        for message in result["messages"]:
+            yield message
+            count += 1
+            if limit and count >= limit:
+                return
+        cursor = (result.get('response_metadata') or {}).get('next_cursor')
+        if not result.get('has_more') or not cursor:
+            return
+        arguments['cursor'] = cursor
+
+
+def history(channel_id, oldest=None, latest=None, limit=None):
     """
     Fetches the history of messages from a given Slack channel.
 
-    This function uses the method 'conversations_history' from the Slack client to get a
-    conversation's history and logs the number of messages it found.
+    This function collects the messages streamed by 'iter_history', following the pagination
+    cursor until the whole history (or 'limit' messages) has been read.
 
     Parameters:
     channel_id (str): The ID of the channel from which the history is fetched.
+    oldest (str, optional): Only messages after this timestamp are returned. Defaults to None.
+    latest (str, optional): Only messages before this timestamp are returned. Defaults to None.
+    limit (int, optional): The maximum number of messages returned. Defaults to None (the whole history).
 
     Returns:
     list: A list of messages found in the conversation's history.
-
-    Raises:
-    SlackApiError: If any error occurs while fetching the conversation's history, a
-    SlackApiError is raised and the error info is logged.
     """
 
-    try:
-        result = client.conversations_history(channel=channel_id)
-        conversation_history = result["messages"]
-        logger.info("{} messages found in {}".format(len(conversation_history), id))
-        return conversation_history
-    except SlackApiError as e:
-        logger.error("Error creating conversation: {}".format(e))
+    return list(iter_history(channel_id, oldest=oldest, latest=latest, limit=limit))
+
 
+def _removable(message):
+    return message.get('user') == os.getenv('SLACK_BOT') and \
+        message.get('reply_count', 0) == 0 and \
+        message.get('reactions', 0) == 0
 
-def remove(channel_id, lenght=0):
+
+def remove(channel_id, lenght=0, runs=3):
     """
     Deletes certain messages from a specified Slack channel based on particular criteria.
 
-    This function retrieves the message history from a channel based on the channel ID
-    and filters for messages sent by a particular bot that have no replies or reactions.
-    It deletes any such messages found and repeats the process until no such messages remain.
+    This function streams the message history from a channel based on the channel ID, newest first,
+    one page at a time, and deletes the messages sent by a particular bot that have no replies or
+    reactions, stopping at the first message that does not qualify. The deletions run on the small
+    worker pool of 'bulk_delete.BulkDeleter', under a token bucket that honours Slack's 'Retry-After'.
 
     Parameters:
     channel_id (str): The ID of the channel from which the messages are to be deleted.
-    lenght (int, optional): A placeholder parameter with no apparent usage in the current function context.
-                            Defaults to 0.
+    lenght (int, optional): Messages are only deleted while the channel holds more than this number of
+                            messages. Defaults to 0.
+    runs (int, optional): The number of times an interrupted deletion is resumed. Defaults to 3.
+
+    Returns:
+    dict: The progress report of the deletion (deleted, failed, rate_limited, seconds, per_second),
+          or None if the channel holds no more than 'lenght' messages.
 
     Raises:
-    Exception: If any exception occurs during the process, a recursive call is made to
-               try the deletion process again.
+    Exception: If any exception occurs during the process, it is logged and the deletion resumes from
+               the checkpoint of the run, before the oldest message it could not delete, up to 'runs' times.
 
     Note:
     The function aims to delete bot messages only if they have no replies or reactions.
-    If a non-bot message or a bot message with replies/reactions is encountered, the function breaks the deletion phase
-    and repeats the fetching and filtering process.
+    If a non-bot message or a bot message with replies/reactions is encountered, the deletion stops.
 
     Environment Variables:
     SLACK_BOT: This should contain the user id of the bot whose messages are to be deleted.
                This id is used to filter out the messages in the channel's history.
     """
 
-    try:
-        while True:
-            x = (history(channels.channels_id[channel_id]))
-            bot_messages = []
-            if len(x) > lenght:
-                for message in x:
-                    if message.get('user') == os.getenv('SLACK_BOT') and \
-                            message.get('reply_count', 0) == 0 and \
-                            message.get('reactions', 0) == 0:
-                        bot_messages.append(message)
-
-                    else:
-                        break
-            if len(bot_messages) > 0:
-                for i, message in enumerate(bot_messages):
-                    percent = int((100 * (i + 1)) / len(bot_messages))
-                    filler = "█" * (percent // 2)
-                    remaining = '-' * ((100 - percent) // 2)
-                    timer = (bot_messages[i]['ts'])
-                    delete(channels.channels_id[channel_id], timer)
-                    # print(f'\rDELETING SLACK FILES DONE:[{filler}{remaining}]{percent}%', end='', flush=True)
-            else:
-                break
-            # print()
-    except Exception:
-        print("Slack Remove Exception")
-        return remove(channel_id)
+    channel = channels.channels_id[channel_id]
+    if len(history(channel, limit=lenght + 1)) <= lenght:
+        return None
+    # a page that could not be read must interrupt the run, not end it, so it can be resumed
+    deleter = bulk_delete.BulkDeleter(client, functools.partial(iter_history, raise_errors=True))
+    for attempt in range(runs):
+        try:
+            return deleter.run(channel, _removable, resume=attempt > 0)
+        except Exception as e:
+            print("Slack Remove Exception")
+            logger.error(f"Error removing messages, resuming from {deleter.checkpoint(channel)}: {e}")
+    return deleter.report()
 
 
 def send_text(txt, channel_id, blocks=None):
@@ -192,19 +271,27 @@ def send_text(txt, channel_id, blocks=None):
     channel_id (str): The ID of the channel to which the message is to be sent.
     blocks (list, optional): A list of block structures to include in the message. Defaults to None.
 
+    Returns:
+    str: The timestamp of the posted message, or None if it was not posted.
+
     Raises:
     SlackApiError: If any error occurs while posting the message, a SlackApiError is raised
     and the error info is logged.
+
+    Note:
+    The timestamp of the posted message is recorded in the message index, by its text and the text of its first block.
     """
 
     try:
         # Call the chat.postMessage method using the WebClient
-        result = client.chat_postMessage(
+        result = _call('chat_postMessage',
             channel=channel_id,
             text=txt,
             blocks=json.dumps(blocks) if blocks else None
         )
         logger.info(result)
+        message_index.record(channel_id, result.get('ts'), txt, blocks)
+        return result.get('ts')
 
     except SlackApiError as e:
         logger.error(f"Error posting message: {e}")
@@ -226,17 +313,21 @@ def send_text_to_user(txt, channel_id, blocks=None):
     Raises:
     SlackApiError: If an error occurs while posting the message, a SlackApiError is raised
     and the error info is logged.
+
+    Note:
+    The timestamp of the posted message is recorded in the message index, by its text and the text of its first block.
     """
 
     try:
         # Call the chat.postMessage method using the WebClient
-        result = client.chat_postMessage(
+        result = _call('chat_postMessage',
             channel=channel_id,
             text=txt,
             blocks=json.dumps(blocks) if blocks else None,
             as_user = True
         )
         logger.info(result)
+        message_index.record(channel_id, result.get('ts'), txt, blocks)
 
     except SlackApiError as e:
         logger.error(f"Error posting message: {e}")
@@ -265,7 +356,7 @@ def send_files(txt, file_name, channel_id):
     try:
         # Call the files.upload method using the WebClient
         # Uploading files requires the `files:write` scope
-        result = client.files_upload(
+        result = _call('files_upload',
             channels=channel_id,
             initial_comment=txt,
             file=file_name,
@@ -277,6 +368,41 @@ def send_files(txt, file_name, channel_id):
         logger.error("Error uploading file: {}".format(e))
 
 
+def _message_text(message):
+    return message.get('text')
+
+
+def _find_message_ts(channel_id, posted_text, message_text, use_index=True):
+    """
+    Finds the timestamp of the newest message whose text starts with 'posted_text'.
+
+    The message index is used first when 'use_index' is set, otherwise (or on a miss) the channel
+    history is streamed until the first match.
+
+    Parameters:
+    channel_id (str): The ID of the channel where the message is located.
+    posted_text (str): The starting text of the message.
+    message_text (function): Returns the text of a history message that is compared with 'posted_text'.
+    use_index (bool, optional): Look the text up in the message index first. Defaults to True.
+
+    Returns:
+    str: The timestamp of the message, or None if no message matches.
+
+    Note:
+    'update()' and 'chat_block_update()' used to edit the last match of the first history page, the oldest one.
+    """
+
+    if use_index and (timestamp := message_index.lookup(channel_id, posted_text, prefix=True)):
+        return timestamp
+    for message in iter_history(channel_id):
+        try:
+            if message_text(message).startswith(posted_text):
+                return message.get('ts')
+        except Exception:
+            continue
+    return None
+
+
 def chat_block_update(txt, channel_id, posted_text, blocks=None):
     """
     Updates a message in a specified Slack channel, optionally with blocks.
@@ -296,31 +422,33 @@ def chat_block_update(txt, channel_id, posted_text, blocks=None):
     and the error info is logged.
 
     Note:
-    The function retrieves the history of the channel and updates the first message it finds
-    which starts with the 'posted_text'. If no such message is found, it may throw an error due
-    to undefined 'timestamp' variable.
+    The message is looked up in the message index first. On a miss, or if the indexed message no
+    longer exists, the function streams the history of the channel and updates the first message it
+    finds which starts with the 'posted_text', without reading the pages after the match. If no such
+    message is found, the error is logged and nothing is updated.
     """
 
-    x = history(channel_id)
-    # print(x)
-    for message in x:
+    for use_index in (True, False):
+        timestamp = _find_message_ts(channel_id, posted_text, message_index.block_text, use_index)
+        if timestamp is None:
+            logger.error(f"No message starting with '{posted_text}' found in {channel_id}")
+            return
         try:
-            # print(message['blocks'][0]['text'].get('text'))
-            if message['blocks'][0]['text'].get('text').startswith(posted_text):
-                timestamp = message.get('ts')
-        except Exception:
-            continue
-    try:
-        result = client.chat_update(
-            channel=channel_id,
-            text=txt,
-            ts=timestamp,
-            blocks=json.dumps(blocks) if blocks else None
-        )
-        logger.info(result)
+            result = _call('chat_update',
+                channel=channel_id,
+                text=txt,
+                ts=timestamp,
+                blocks=json.dumps(blocks) if blocks else None
+            )
+            logger.info(result)
+            return
 
-    except SlackApiError as e:
-        logger.error(f"Error posting message: {e}")
+        except SlackApiError as e:
+            if use_index and e.response['error'] == 'message_not_found':
+                message_index.forget(channel_id, timestamp)
+                continue
+            logger.error(f"Error posting message: {e}")
+            return
 
 
 def update(txt, channel_id, posted_text, blocks=None):
@@ -344,40 +472,78 @@ def update(txt, channel_id, posted_text, blocks=None):
                    and the error message is logged.
 
     Note:
-    The function retrieves the history of the channel and identifies the first message it
-    finds that starts with the 'posted_text'. This is the message that will be updated.
-    If no such message is found, it may produce an error due to the 'timestamp' variable
-    being undefined.
+    The message is looked up in the message index first. On a miss, or if the indexed message
+    no longer exists, the function streams the history of the channel and identifies the first
+    message it finds that starts with the 'posted_text', without reading the pages after the match.
+    This is the message that will be updated. If no such message is found, the error is
+    logged and nothing is updated.
     """
 
-    x = history(channel_id)
-    # print(x)
-    for message in x:
+    for use_index in (True, False):
+        timestamp = _find_message_ts(channel_id, posted_text, _message_text, use_index)
+        if timestamp is None:
+            logger.error(f"No message starting with '{posted_text}' found in {channel_id}")
+            return
         try:
-            # print(message.get('text'))
-            if message.get('text').startswith(posted_text):
-                timestamp = message.get('ts')
-        except Exception:
-            continue
+            result = _call('chat_update',
+                channel=channel_id,
+                text=txt,
+                ts=timestamp,
+                blocks=json.dumps(blocks) if blocks else None
+            )
+            logger.info(result)
+            return
+
+        except SlackApiError as e:
+            if use_index and e.response['error'] == 'message_not_found':
+                message_index.forget(channel_id, timestamp)
+                continue
+            logger.error(f"Error posting message: {e}")
+            return
+
+
+def update_ts(txt, channel_id, timestamp, blocks=None):
+    """
+    Updates the message with a known timestamp in a specified Slack channel.
+
+    Unlike 'update()', the message is not searched for: the caller already holds the timestamp
+    returned by 'send_text()'.
+
+    Parameters:
+    txt (str): The updated text for the message.
+    channel_id (str): The ID of the channel where the message is located.
+    timestamp (str): The timestamp of the message.
+    blocks (list, optional): A list of block structures to include in the updated message. Defaults to None.
+
+    Returns:
+    bool: True if the message was updated, False otherwise (e.g. it has been deleted).
+    """
+
     try:
-        result = client.chat_update(
+        result = _call('chat_update',
             channel=channel_id,
             text=txt,
             ts=timestamp,
             blocks=json.dumps(blocks) if blocks else None
         )
         logger.info(result)
+        message_index.record(channel_id, timestamp, txt, blocks)
+        return True
 
     except SlackApiError as e:
-        logger.error(f"Error posting message: {e}")
+        if e.response['error'] == 'message_not_found':
+            message_index.forget(channel_id, timestamp)
+        logger.error(f"Error updating message: {e}")
+        return False
 
 
 def get_thread_ts(c_id, posted_text):
     """
     Retrieves the thread timestamp for a specific message in a given Slack channel.
 
-    This function pulls the history of a provided channel and searches for a message
-    that matches the 'posted_text'. It then retrieves the timestamp of that message,
+    This function looks the 'posted_text' up in the message index and, on a miss, streams the history
+    of a provided channel and stops at the first message that matches the 'posted_text'. It then
+    retrieves the timestamp of that message,
     which is used as identifiers for threads in Slack.
 
     Parameters:
@@ -385,8 +551,8 @@ def get_thread_ts(c_id, posted_text):
     posted_text (str): The exact text of the message whose thread timestamp is to be retrieved.
 
     Returns:
-    str: The timestamp of the thread corresponding to the 'posted_text' message. If no such
-    message is found, it recursively calls itself until a message is found.
+    str: The timestamp of the thread corresponding to the 'posted_text' message. Empty string if
+    no such message is found or the history could not be read.
 
     Raises:
     Exception: If an error occurs while fetching the thread timestamp, an Exception is raised
@@ -394,22 +560,23 @@ def get_thread_ts(c_id, posted_text):
 
     Note:
     In this context, 'consumer key' is assumed to be a unique identifier for the channel.
+    When several messages have the text, the newest one is returned, not the oldest one of the first page.
     """
 
     try:
-        x = (history(channels.channels_id[c_id]))
-        thread_id = ''
-        for message in x:
+        if thread_id := message_index.lookup(channels.channels_id[c_id], posted_text):
+            return thread_id
+        for message in iter_history(channels.channels_id[c_id]):
             # prints the names of the threads copy Paste them
             # print(message.get('text'))
             if message.get('text') == posted_text:
-                thread_id = message.get('ts')
+                return message.get('ts')
         # quit()
-        return thread_id
+        return ''
     except Exception as e:
         print("Slack Thread TS Exception")
         logger.error(f"Error posting message: {e}")
-        return get_thread_ts(c_id, posted_text)
+        return ''
 
 
 def send_text_on_specific_thread(text, channel, posted_text, c_id, blocks=None):
@@ -429,8 +596,8 @@ def send_text_on_specific_thread(text, channel, posted_text, c_id, blocks=None):
     blocks (list, optional): A list of block structures to include in the message. Defaults to None.
 
     Returns:
-    Same function: If an error occurs while posting the message, the function recursively
-    calls itself to try posting the message again.
+    None: Failed calls are retried by the shared retry policy ('retry.policy') with backoff,
+    up to its attempt limit and deadline.
 
     Raises:
     SlackApiError: If an error occurs while posting the message, a SlackApiError is raised
@@ -438,23 +605,24 @@ def send_text_on_specific_thread(text, channel, posted_text, c_id, blocks=None):
 
     Note:
     In this context, 'consumer key' is assumed to be a unique identifier for the channel.
+    The timestamp of the reply is recorded in the message index under its thread.
     """
 
     try:
         ts = get_thread_ts(c_id, posted_text)
         # Call the chat.postMessage method using the WebClient
-        result = client.chat_postMessage(
+        result = _call('chat_postMessage',
             channel=channel,
             text=text,
             thread_ts=ts,
             blocks=json.dumps(blocks) if blocks else None
         )
         logger.info(result)
+        message_index.record(channel, result.get('ts'), text, blocks, thread_ts=ts)
 
     except SlackApiError as e:
         logger.error(f"Error posting message: {e}")
         print("Slack Text on Thread Exception")
-        return send_text_on_specific_thread(text, channel, posted_text, c_id, blocks=None)
 
 
 def send_files_on_specific_thread(file_name, file_path, file_type, channel, c_id, posted_text):
@@ -474,8 +642,8 @@ def send_files_on_specific_thread(file_name, file_path, file_type, channel, c_id
     posted_text (str): The text of the message that identifies the thread.
 
     Returns:
-    Same function: If an error occurs while uploading the file, the function recursively
-    calls itself to try uploading the file again.
+    None: Failed uploads are retried by the shared retry policy ('retry.policy') with backoff,
+    up to its attempt limit and deadline.
 
     Raises:
     SlackApiError: If an error occurs while uploading the file, a SlackApiError is raised
@@ -490,7 +658,7 @@ def send_files_on_specific_thread(file_name, file_path, file_type, channel, c_id
         ts = get_thread_ts(c_id, posted_text)
         # Call the files.upload method using the WebClient
         # Uploading files requires the `files:write` scope
-        result = client.files_upload(
+        result = _call('files_upload',
             channels=channel,
             initial_comment='',
             file=file_name,
@@ -502,7 +670,6 @@ def send_files_on_specific_thread(file_name, file_path, file_type, channel, c_id
     except SlackApiError as e:
         logger.error("Error uploading file: {}".format(e))
         print("Slack File on Thread Exception")
-        return send_files_on_specific_thread(file_name, file_path, file_type, channel, c_id, posted_text)
 
 
 def replies(channel, thread_ts):
@@ -519,8 +686,8 @@ def replies(channel, thread_ts):
 
     Returns:
     result: The result of the API call, which contains the replies to the message in the thread.
-            If an error occurs while fetching the replies, the function recursively
-            calls itself to try fetching the replies again.
+            Failed calls are retried by the shared retry policy ('retry.policy'); None if the
+            replies could not be fetched.
 
     Raises:
     SlackApiError: If an error occurs while fetching the replies, a SlackApiError is raised
@@ -528,7 +695,7 @@ def replies(channel, thread_ts):
     """
 
     try:
-        result = client.conversations_replies(
+        result = _call('conversations_replies',
             channel=channel,
             ts=thread_ts
         )
@@ -538,7 +705,7 @@ def replies(channel, thread_ts):
     except SlackApiError as e:
         logger.error("Error on replies {}".format(e))
         print("Slack Replies Exception")
-        return replies(channel, thread_ts)
+        return None
 
 
 def remove_from_specific_thread(c_id, posted_text):
@@ -555,8 +722,8 @@ def remove_from_specific_thread(c_id, posted_text):
     posted_text (str): The text of the message that identifies the thread.
 
     Returns:
-    Same function: If an error occurs while retrieving the messages or removing the
-    messages, the function recursively calls itself to try the operation again.
+    None: Failed calls are retried by the shared retry policy ('retry.policy') with backoff,
+    up to its attempt limit and deadline.
 
     Raises:
     SlackApiError: If an error occurs while retrieving the messages or removing the
@@ -570,6 +737,8 @@ def remove_from_specific_thread(c_id, posted_text):
     try:
         thread_id = get_thread_ts(c_id, posted_text)
         x = replies(channels.channels_id[c_id], thread_id)
+        if x is None:
+            return
         try:
             for message in x['messages']:
                 if message.get('ts') != thread_id and message.get('user') == os.getenv('SLACK_BOT'):
@@ -581,4 +750,4 @@ def remove_from_specific_thread(c_id, posted_text):
             print('error occured')
     except SlackApiError as e:
         print("Slack Remove from Thread Exception")
-        return remove_from_specific_thread(c_id, posted_text)
+        logger.error(f"Error removing messages from thread: {e}")
@@ -0,0 +1,173 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import asyncio
+import logging
+from slack_sdk.errors import SlackApiError
+import json
+from dev_slack import message_index, retry, slack_client
+from dev_slack import config
+
+
+config.load()
+logger = logging.getLogger(__name__)
+
+
+async def _call(method, **kwargs):
+    """
+    Awaits a method of the shared AsyncWebClient under the shared retry policy.
+
+    The asynchronous counterpart of 'slack_todo._call()'. The client is looked up on every call, since
+    its aiohttp session belongs to the running event loop, see 'slack_client.get_async_client()'.
+
+    Parameters:
+    method (str): The name of the AsyncWebClient method, e.g. 'chat_postMessage'.
+
+    Returns:
+    AsyncSlackResponse: The response of the call.
+
+    Raises:
+    SlackApiError: If the call fails with a non retryable error or is given up.
+    """
+
+    return await retry.policy.call_async(method, getattr(slack_client.get_async_client(), method), **kwargs)
+
+
+async def delete(channel_id, message_id):
+    """
+    Deletes a specified message from a specific Slack channel.
+
+    The asynchronous counterpart of 'slack_todo.delete()'.
+
+    Parameters:
+    channel_id (str): The ID of the channel from which the message is to be deleted.
+    message_id (str): The timestamp of the message to be deleted.
+
+    Returns:
+    bool: True if the message was deleted, False otherwise.
+    """
+
+    try:
+        result = await _call('chat_delete',
+            channel=channel_id,
+            ts=message_id
+        )
+        logger.info(result)
+        await asyncio.to_thread(message_index.forget, channel_id, message_id)
+        return True
+
+    except SlackApiError as e:
+        if e.response['error'] == 'message_not_found':
+            await asyncio.to_thread(message_index.forget, channel_id, message_id)
+        logger.error(f"Error deleting message: {e}")
+        return False
+
+
+async def iter_history(channel_id, oldest=None, latest=None, limit=None, page_size=200):
+    """
+    Streams the history of messages from a given Slack channel, newest first.
+
+    The asynchronous counterpart of 'slack_todo.iter_history()': pages are awaited lazily, following
+    'next_cursor' only when the caller asks for more messages.
+
+    Parameters:
+    channel_id (str): The ID of the channel from which the history is fetched.
+    oldest (str, optional): Only messages after this timestamp are returned. Defaults to None.
+    latest (str, optional): Only messages before this timestamp are returned. Defaults to None.
+    limit (int, optional): The maximum number of messages returned. Defaults to None (the whole history).
+    page_size (int, optional): The number of messages requested per page. Defaults to 200.
+
+    Yields:
+    dict: The messages of the conversation's history.
+    """
+
+    arguments = {'channel': channel_id, 'limit': min(page_size, limit) if limit else page_size}
+    if oldest:
+        arguments['oldest'] = oldest
+    if latest:
+        arguments['latest'] = latest
+    count = 0
+    while True:
+        try:
+            result = await _call('conversations_history', **arguments)
+        except SlackApiError as e:
+            logger.error("Error fetching conversation history: {}".format(e))
+            return
+        for message in result["messages"]:
+            yield message
+            count += 1
+            if limit and count >= limit:
+                return
+        cursor = (result.get('response_metadata') or {}).get('next_cursor')
+        if not result.get('has_more') or not cursor:
+            return
+        arguments['cursor'] = cursor
+
+
+async def get_from_text_history(channel_id, text, use_index=True):
+    """
+    Fetches the timestamp of a message starting with a specific text from the channel's history.
+
+    The asynchronous counterpart of 'slack_todo.get_from_text_history()': the message index is
+    looked up first and the history is only streamed on a miss.
+
+    Parameters:
+    channel_id (str): The ID of the channel from which the history is to be fetched.
+    text (str): The beginning text of the message whose Thread ID is to be returned.
+    use_index (bool, optional): Look the text up in the message index first. Defaults to True.
+
+    Returns:
+    str: The timestamp (Thread ID) of the message. Empty string if such message is not found.
+    """
+
+    if use_index and (thread_id := await asyncio.to_thread(message_index.lookup, channel_id, text, prefix=True)):
+        return thread_id
+    async for message in iter_history(channel_id):
+        if (message.get('text') or '').startswith(text):
+            return message.get('ts')
+    return ''
+
+
+async def delete_with_specific_text(channel_id, text):
+    """
+    Deletes a message starting with a specific text from a given channel.
+
+    The asynchronous counterpart of 'slack_todo.delete_with_specific_text()'.
+
+    Parameters:
+    channel_id (str): The ID of the channel from which the message is to be deleted.
+    text (str): The beginning text of the message to be deleted.
+    """
+
+    thread_id = await asyncio.to_thread(message_index.lookup, channel_id, text, prefix=True)
+    if not (thread_id and await delete(channel_id, thread_id)):
+        await delete(channel_id, await get_from_text_history(channel_id, text, use_index=False))
+
+
+async def send_text(txt, channel_id, blocks=None):
+    """
+    Sends a message with optional blocks to a specified Slack channel.
+
+    The asynchronous counterpart of 'slack_todo.send_text()'. The timestamp of the posted message
+    is recorded in the message index, in a worker thread.
+
+    Parameters:
+    txt (str): The main text of the message to be sent.
+    channel_id (str): The ID of the channel to which the message is to be sent.
+    blocks (list, optional): A list of block structures to include in the message. Defaults to None.
+
+    Returns:
+    str: The timestamp of the posted message, or None if it was not posted.
+    """
+
+    try:
+        result = await _call('chat_postMessage',
+            channel=channel_id,
+            text=txt,
+            blocks=json.dumps(blocks) if blocks else None
+        )
+        logger.info(result)
+        await asyncio.to_thread(message_index.record, channel_id, result.get('ts'), txt, blocks)
+        return result.get('ts')
+
+    except SlackApiError as e:
+        logger.error(f"Error posting message: {e}")
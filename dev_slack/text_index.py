@@ -0,0 +1,310 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import bisect
+import functools
+import heapq
+import math
+import re
+import unicodedata
+from collections import defaultdict
+from dev_slack.cache import TTLCache
+
+_WORD = re.compile(r'\w+')
+# the combining diacritical marks, e.g. the Greek tonos and dialytika once decomposed
+_MARKS = re.compile('[\u0300-\u036f]')
+
+
+def normalize(text):
+    """
+    Folds a text for searching: Greek (and Latin) accents are dropped and the case is folded, so
+    'Αίτηση', 'ΑΙΤΗΣΗ' and 'αιτηση' are the same text, and the final sigma 'ς' matches 'σ'.
+
+    Parameters:
+    text (str): The text to fold.
+
+    Returns:
+    str: The folded text.
+    """
+
+    return _MARKS.sub('', unicodedata.normalize('NFD', str(text))).casefold()
+
+
+def words(text):
+    """
+    Returns the folded words of a text, see 'normalize()'. Punctuation separates words, so the protocol
+    '101/2024' is the words '101' and '2024'.
+    """
+
+    return _WORD.findall(normalize(text))
+
+
+@functools.lru_cache(maxsize=65536)
+def _word_grams(word):
+    # the prefixes of one to three letters of a word, marked with '^', and its trigrams
+    return tuple({word[:length] + '^' for length in (1, 2, 3) if len(word) >= length} |
+                 {word[i:i + 3] for i in range(len(word) - 2)})
+
+
+class TrigramIndex:
+    """
+    An in-memory typeahead index over short texts, e.g. the names and protocol numbers of the requests.
+
+    Every word of a text is indexed by its trigrams and by its prefixes of up to three letters. A query word of
+    three letters or more matches the texts that contain it anywhere in a word, a shorter one the texts with a word
+    starting with it. A query matches a text when all its words do. Only the postings of the rarest trigram or
+    prefix of the query are scanned, and the scan stops once 'limit' texts are found, so a query costs about the
+    same for a few hundred or tens of thousands of texts.
+
+    Parameters:
+    entries (iterable): (key, text) pairs, in the order results are returned.
+    """
+
+    def __init__(self, entries):
+        self.keys = []
+        self.words = []
+        postings = defaultdict(list)
+        for position, (key, text) in enumerate(entries):
+            folded = tuple(dict.fromkeys(words(text)))
+            self.keys.append(key)
+            self.words.append(folded)
+            for gram in set().union(*map(_word_grams, folded)):
+                postings[gram].append(position)
+        self.postings = dict(postings)
+        self._exact = {}
+        for position, key in enumerate(self.keys):
+            self._exact.setdefault(key, position)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _rarest(self, grams):
+        return min((self.postings.get(gram, ()) for gram in grams), key=len)
+
+    def search(self, query, limit=100):
+        """
+        Returns the keys of the texts matching a query, best first.
+
+        The key equal to the whole query (e.g. a protocol number) comes first, then the texts where every query
+        word starts a word of the text, then the texts where a query word is found inside a word. Texts of the
+        same rank keep the order of the entries. An empty query returns the first 'limit' keys.
+
+        Parameters:
+        query (str): The text typed by the user.
+        limit (int, optional): The most keys returned. Defaults to 100, the most options of a Slack menu.
+
+        Returns:
+        list: The matching keys.
+        """
+
+        terms = words(query)
+        if not terms:
+            return self.keys[:limit]
+        exact = self._exact.get(query.strip())
+        ranked = [exact] if exact is not None else []
+        # every term starts a word: only the texts with a word starting with the rarest term are scanned
+        for position in self._rarest(term[:3] + '^' for term in terms):
+            if len(ranked) >= limit:
+                break
+            if position != exact and self._starts(self.words[position], terms):
+                ranked.append(position)
+        if len(ranked) < limit and any(len(term) >= 3 for term in terms):
+            # a term is found inside a word, the shorter terms still start one
+            found = set(ranked)
+            grams = [gram for term in terms
+                     for gram in ([term + '^'] if len(term) < 3 else
+                                  [term[i:i + 3] for i in range(len(term) - 2)])]
+            for position in self._rarest(grams):
+                if len(ranked) >= limit:
+                    break
+                if position not in found and self._inside(self.words[position], terms):
+                    ranked.append(position)
+        return [self.keys[position] for position in ranked]
+
+    @staticmethod
+    def _starts(text_words, terms):
+        for term in terms:
+            for word in text_words:
+                if word.startswith(term):
+                    break
+            else:
+                return False
+        return True
+
+    @staticmethod
+    def _inside(text_words, terms):
+        for term in terms:
+            for word in text_words:
+                if word.startswith(term) or (len(term) >= 3 and term in word):
+                    break
+            else:
+                return False
+        return True
+
+
+class InvertedIndex:
+    """
+    An in-memory full-text index of documents made of weighted fields, ranked with BM25.
+
+    A document is indexed by the folded words of its fields (see 'words()'), a word counting as many times as
+    the weight of its field, so a word of a title outranks the same word in a detail. Documents are added,
+    replaced and removed one by one, so a source that changed is updated by re-indexing only the documents
+    that differ. The scores of the searched words are cached until the index changes. Not thread safe, the
+    owner serializes updates and searches.
+
+    Parameters:
+    k1 (float, optional): The BM25 term frequency saturation. Defaults to 1.2.
+    b (float, optional): The BM25 document length normalization. Defaults to 0.75.
+    """
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}
+        self.documents = {}
+        self._terms = {}
+        self._lengths = {}
+        self._total = 0
+        self._vocabulary = None
+        self._scores = TTLCache(maxsize=256)
+
+    def __len__(self):
+        return len(self.documents)
+
+    def __contains__(self, doc_id):
+        return doc_id in self.documents
+
+    def add(self, doc_id, fields):
+        """
+        Indexes a document, replacing the document of the same id unless its fields are unchanged.
+
+        Parameters:
+        doc_id (hashable): The id of the document.
+        fields (tuple): (text, weight) pairs.
+
+        Returns:
+        bool: True if the index changed.
+        """
+
+        if self.documents.get(doc_id) == fields:
+            return False
+        self.remove(doc_id)
+        texts = {}
+        for text, weight in fields:
+            texts.setdefault(weight, []).append(text)
+        counts = {}
+        for weight, parts in texts.items():
+            for word in words('\n'.join(parts)):
+                counts[word] = counts.get(word, 0) + weight
+        postings = self.postings
+        for term, count in counts.items():
+            posting = postings.get(term)
+            if posting is None:
+                posting = postings[term] = {}
+                self._vocabulary = None
+            posting[doc_id] = count
+        length = sum(counts.values())
+        self.documents[doc_id] = fields
+        self._terms[doc_id] = tuple(counts)
+        self._lengths[doc_id] = length
+        self._total += length
+        self._scores.clear()
+        return True
+
+    def remove(self, doc_id):
+        """
+        Removes a document from the index.
+
+        Returns:
+        bool: True if the document was indexed.
+        """
+
+        if doc_id not in self.documents:
+            return False
+        for term in self._terms.pop(doc_id):
+            posting = self.postings[term]
+            del posting[doc_id]
+            if not posting:
+                del self.postings[term]
+                self._vocabulary = None
+        self._total -= self._lengths.pop(doc_id)
+        del self.documents[doc_id]
+        self._scores.clear()
+        return True
+
+    def _expand(self, term, most=50):
+        # the indexed words starting with 'term', the sorted vocabulary is rebuilt after words are added or removed
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        start = bisect.bisect_left(self._vocabulary, term)
+        expanded = []
+        for word in self._vocabulary[start:start + most]:
+            if not word.startswith(term):
+                break
+            expanded.append(word)
+        return expanded
+
+    def _term_scores(self, term, complete):
+        # {doc_id: (score, word)} of one query word, the best of its completions, and the doc_ids by score
+        key = (term, complete)
+        cached = self._scores.get(key)
+        if cached is not None:
+            return cached
+        variants = [(term, 1.0)] if term in self.postings else []
+        if complete:
+            variants += [(word, 0.7) for word in self._expand(term) if word != term]
+        count = len(self.documents)
+        lengths = self._lengths
+        base = self.k1 * (1 - self.b)
+        factor = self.k1 * self.b * count / self._total
+        best = {}
+        for word, boost in variants:
+            posting = self.postings[word]
+            weight = boost * (self.k1 + 1) * math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc_id, frequency in posting.items():
+                score = weight * frequency / (frequency + base + factor * lengths[doc_id])
+                if doc_id not in best or score > best[doc_id][0]:
+                    best[doc_id] = (score, word)
+        cached = (best, sorted(best, key=lambda doc_id: best[doc_id][0], reverse=True))
+        self._scores.set(key, cached)
+        return cached
+
+    def search(self, query, limit=20, prefix=3):
+        """
+        Returns the documents best matching a query.
+
+        Documents with every query word come first, by their BM25 score. If they are fewer than 'limit', they are
+        followed by the documents with some of the words, picked among the best scoring documents of each word.
+        The last query word also matches the words it starts, at a lower score, once it has 'prefix' letters,
+        so results show up as the user types.
+
+        Parameters:
+        query (str): The text searched, accents and case are ignored.
+        limit (int, optional): The most documents returned. Defaults to 20.
+        prefix (int, optional): The letters from which the last word is completed. Defaults to 3.
+
+        Returns:
+        list: (doc_id, score, matched words) tuples, best first. The matched words are the indexed words found.
+        """
+
+        terms = list(dict.fromkeys(words(query)))
+        if not terms or not self._total:
+            # no words indexed, e.g. only documents with empty fields
+            return []
+        scored = [self._term_scores(term, position == len(terms) - 1 and len(term) >= prefix)
+                  for position, term in enumerate(terms)]
+        tables = sorted((best for best, _ in scored), key=len)
+
+        def total(doc_id):
+            return sum(best[doc_id][0] for best in tables if doc_id in best)
+
+        common = set(tables[0]).intersection(*tables[1:])
+        if len(tables) == 1:
+            ranked = scored[0][1][:limit]
+        else:
+            ranked = heapq.nlargest(limit, common, key=total)
+        if len(ranked) < limit:
+            partial = {doc_id for _, order in scored for doc_id in order[:limit] if doc_id not in common}
+            ranked += heapq.nlargest(limit - len(ranked), partial,
+                                     key=lambda doc_id: (sum(doc_id in best for best in tables), total(doc_id)))
+        return [(doc_id, total(doc_id), [best[doc_id][1] for best in tables if doc_id in best])
+                for doc_id in ranked]
@@ -0,0 +1,81 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import logging
+import os
+from dev_slack import config
+from dev_slack.cache import TTLCache
+
+config.load()
+logger = logging.getLogger(__name__)
+
+_users = TTLCache(maxsize=int(os.getenv('USER_CACHE_SIZE', 512)),
+                  ttl=float(os.getenv('USER_CACHE_TTL', 3600)))
+
+
+def get_user(client, user_id):
+    """
+    Returns the Slack user object of a user, calling 'users.info' only on a cache miss.
+
+    Parameters:
+    client (any): Slack client that contains methods to interact with Slack API.
+    user_id (str): The ID of the user.
+
+    Returns:
+    dict: The 'user' object of the 'users.info' response, or None if the user could not be retrieved.
+    """
+
+    user = _users.get(user_id)
+    if user is not None:
+        return user
+    response = client.users_info(user=user_id)
+    if not response["ok"]:
+        logger.error(f"Failed to retrieve user info for {user_id}")
+        return None
+    user = response["user"]
+    _users.set(user_id, user)
+    return user
+
+
+async def get_user_async(client, user_id):
+    """
+    Returns the Slack user object of a user, awaiting 'users.info' only on a cache miss.
+
+    The asynchronous counterpart of 'get_user()', for the AsyncWebClient. Both share the same cache.
+
+    Parameters:
+    client (AsyncWebClient): Async Slack client that contains methods to interact with Slack API.
+    user_id (str): The ID of the user.
+
+    Returns:
+    dict: The 'user' object of the 'users.info' response, or None if the user could not be retrieved.
+    """
+
+    user = _users.get(user_id)
+    if user is not None:
+        return user
+    response = await client.users_info(user=user_id)
+    if not response["ok"]:
+        logger.error(f"Failed to retrieve user info for {user_id}")
+        return None
+    user = response["user"]
+    _users.set(user_id, user)
+    return user
+
+
+def invalidate(user_id):
+    """
+    Removes a user from the cache, so the next lookup reads the profile from Slack again.
+
+    Parameters:
+    user_id (str): The ID of the user.
+    """
+
+    _users.pop(user_id)
+
+
+def stats():
+    """
+    Returns the size and the hit/miss counters of the user profile cache.
+    """
+
+    return _users.stats()
@@ -1,25 +1,52 @@
 #  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
 
+import asyncio
+import re
 import socket
+import threading
 import uvicorn
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response, Header, HTTPException
+from fastapi.responses import PlainTextResponse
 from slack_bolt import App
 from slack_bolt.adapter.fastapi import SlackRequestHandler
-from dotenv import load_dotenv
-from dev_slack import home_page, modals, reports, bot_presence
+from dev_slack import home_page, modals, functions, bot_presence, activity_queue, user_cache, activity_stats, retry
+from dev_slack import activity_store, dedup, message_index, modal_loader, search
+from dev_slack import config, slack_client, report_digest, metrics, profiling
 import os
 from contextlib import asynccontextmanager
 
 # load .env file
-load_dotenv()
+config.load()
+# SLACK_ASYNC_MODE=true serves /slack/events with AsyncApp and AsyncWebClient, see create_async_app()
+SLACK_ASYNC_MODE = os.getenv('SLACK_ASYNC_MODE', 'false').lower() in ('1', 'true', 'yes')
 app = App(signing_secret=os.getenv('SLACK_SECRET'),
-          token=os.getenv('SLACK_TOKEN'))
+          # without a name Bolt derives it from inspect.stack(), which reads the source of every caller
+          name='main.py',
+          client=slack_client.get_client(os.getenv('SLACK_TOKEN')),
+          # runs the listeners, profiling those of the sampled requests, see profiling.py
+          listener_executor=profiling.ProfilingExecutor(max_workers=5),
+          # the token is checked with auth.test on the first request instead of at import, see benchmarks/bench_import.py
+          token_verification_enabled=False)
 
 app_handler = SlackRequestHandler(app)
 token_holder = {}
 
 
+@app.middleware
+def use_pooled_client(context, next):
+    """
+    Replaces the client that Bolt builds for every request with the shared pooled client.
+
+    Bolt hands each listener a new WebClient, which opens a new connection to Slack for every call.
+    The shared client of 'slack_client.get_client()' keeps its connections alive and is the same one
+    used by slack_todo, reports and bot_presence.
+    """
+    context["client"] = slack_client.get_client(context.token)
+    next()
+
+
 @app.event("message")
+@metrics.timed("event", "message")
 def handle_message_events(body, logger, ):
     """
     Handles message events occurring within a Slack App.
@@ -43,6 +70,7 @@ def handle_message_events(body, logger, ):
     logger.info(body)
 
 @app.action("request_katastatiko")
+@metrics.timed("action", "request_katastatiko")
 def action_button_click(body, ack, say, logger, client):
     """
     Handles the click of a button named 'request_arxeio' within a Slack App.
@@ -79,9 +107,10 @@ def action_button_click(body, ack, say, logger, client):
     except Exception as e:
         logger.error(f"Error responding to 'archive_step_b' button click: {e}")
     finally:
-        reports.button_reports(body, client, logger, text)
+        activity_queue.enqueue(body, client, logger, text)
 
 @app.action("request_arxeio")
+@metrics.timed("action", "request_arxeio")
 def action_button_click(body, ack, say, logger, client):
     """
     Handles the click of a button named 'request_arxeio' within a Slack App.
@@ -117,15 +146,16 @@ def action_button_click(body, ack, say, logger, client):
 
 
 @app.action("reuest_phones")
+@metrics.timed("action", "reuest_phones")
 def action_button_click(body, ack, say, logger, client):
     """
     Handles the click of a button named 'reuest_phones' within a Slack App.
 
     This function is activated when a button with the action_id 'reuest_phones' is clicked within a Slack App.
-    The click event first triggers a report using 'reports.button_reports()'. The button click event
+    The click event first queues a report using 'activity_queue.enqueue()'. The button click event
     'body', authenticated Slack client, logger, and a specific text 'ΤΗΛΕΦΩΝΑ ΕΠΙΚΟΙΝΩΝΙΑΣ' are sent to this function.
     Next, it sends an acknowledgment to Slack using 'ack()', and opens a new modal window in Slack using
-    'client.views_open()' method. The content of the modal window is specified by the function 'modals.send_phones()'.
+    'modal_loader.open_modal()'. The content of the modal window is specified by the function 'modals.send_phones()'.
 
     Parameters:
     body (dict): The event payload from the button click event.
@@ -139,41 +169,49 @@ def action_button_click(body, ack, say, logger, client):
 
     Note:
     The 'ack()' function should be called immediately at the start of the event handler to acknowledge Slack.
-    The 'client.views_open()' function opens a new view (modal) within the Slack interface.
+    The 'modal_loader.open_modal()' function opens a loading modal at once and fills it in with the phones
+    once they are read.
     """
     text = 'ΤΗΛΕΦΩΝΑ ΕΠΙΚΟΙΝΩΝΙΑΣ'
     try:
         # Acknowledge the shortcut request
         ack()
-        # Call the views_open method using the built-in WebClient
-
-        client.views_open(
-            trigger_id=body["trigger_id"],
-            view=modals.send_phones())
+        modal_loader.open_modal(client, body["trigger_id"], "ΤΗΛΕΦΩΝΑ", modals.send_phones)
     except Exception as e:
         logger.error(f"Error responding to 'archive_step_b' button click: {e}")
     finally:
-        reports.button_reports(body, client, logger, text)
+        activity_queue.enqueue(body, client, logger, text)
 
 
 @app.action("request_sinelefsi")
+@metrics.timed("action", "request_sinelefsi")
 def action_button_click(body, ack, say, logger, client):
     text = 'ΠΡΑΚΤΙΚΑ ΓΕΝΙΚΩΝ ΣΥΝΕΛΕΥΣΕΩΝ'
     try:
         # Acknowledge the shortcut request
         ack()
-        # Call the views_open method using the built-in WebClient
-
-        client.views_open(
-            trigger_id=body["trigger_id"],
-            view=modals.send_request_sinelefsi())
+        # the meetings modal grows with the archive, a loading modal is shown until it is built
+        modal_loader.open_modal(client, body["trigger_id"], "Meeting Info", modals.send_request_sinelefsi)
     except Exception as e:
         logger.error(f"Error responding to 'archive_step_b' button click: {e}")
     finally:
-        reports.button_reports(body, client, logger, text)
+        activity_queue.enqueue(body, client, logger, text)
+
+
+@app.action(re.compile("^meetings_page_(prev|next)$"))
+@metrics.timed("action", "meetings_page")
+def action_button_click(body, ack, logger, client):
+    ack()
+    try:
+        # the pages are rendered once per version of meetings.json, the button carries the page it leads to
+        client.views_update(view_id=body["view"]["id"], hash=body["view"]["hash"],
+                            view=modals.meetings_page(int(body["actions"][0]["value"])))
+    except Exception as e:
+        logger.error(f"Error turning the page of the meetings modal: {e}")
 
 
 @app.view("button_archive_step_b")
+@metrics.timed("view", "button_archive_step_b")
 def handle_submission(ack, body, view, logger, client):
     """
     Handles the submission of a modal view form named 'button_archive_step_b' within a Slack App.
@@ -181,9 +219,9 @@ def handle_submission(ack, body, view, logger, client):
     This function is activated upon the submission of a modal view form with the callback_id 'button_archive_step_b'.
     It first responds back with an acknowledgment to Slack using the 'ack()' function. Then, it logs the submission
     body using logger and processes the view submission using the 'modals.handle_archive_step_b()' function.
-    The button reports are created based on the submission body, a predefined text 'ΑΡΧΕΙΟ ΟΙ ΑΙΤΗΣΕΙΣ ΜΑΣ ', and the 'key'
-    returned by 'handle_archive_step_b()', using the 'reports.button_reports()' function.
-    Finally, a new modal window is opened in Slack using 'client.views_open()' method, with the modal contents
+    The button reports are queued based on the submission body, a predefined text 'ΑΡΧΕΙΟ ΟΙ ΑΙΤΗΣΕΙΣ ΜΑΣ ', and the 'key'
+    returned by 'handle_archive_step_b()', using the 'activity_queue.enqueue()' function.
+    Finally, a new modal window is opened in Slack using 'modal_loader.open_modal()', with the modal contents
     specified by 'modals.represent_data(key)' function based on the 'key'.
 
     Parameters:
@@ -201,7 +239,8 @@ def handle_submission(ack, body, view, logger, client):
 
     Note:
     The 'ack()' function should be called immediately at the start of the event handler to acknowledge Slack.
-    The 'client.views_open()' function opens a new view (modal) within the Slack interface.
+    The 'modal_loader.open_modal()' function opens a loading modal at once and fills it in with the results
+    once they are rendered.
     """
 
     text = 'ΑΡΧΕΙΟ ΟΙ ΑΙΤΗΣΕΙΣ ΜΑΣ '
@@ -210,16 +249,15 @@ def handle_submission(ack, body, view, logger, client):
     try:
         logger.info(body)
         key = modals.handle_archive_step_b(view)
-        client.views_open(
-            trigger_id=body["trigger_id"],
-            view=modals.represent_data(key))
+        modal_loader.open_modal(client, body["trigger_id"], "ΑΠΟΤΕΛΕΣΜΑΤΑ", modals.represent_data, key)
     except Exception as e:
         logger.error(f"Error responding to 'archive_step_b' button click: {e}")
     finally:
-        reports.button_reports(body, client, logger, text, key)
+        activity_queue.enqueue(body, client, logger, text, key)
 
 
 @app.action("archive_step_b")
+@metrics.timed("action", "archive_step_b")
 def handle_some_action(ack, body, logger):
     """
     Handles the action of a component named 'archive_step_b' within a Slack App.
@@ -244,7 +282,107 @@ def handle_some_action(ack, body, logger):
     logger.info(body)
 
 
+@app.shortcut("search_archive")
+@metrics.timed("shortcut", "search_archive")
+def open_search(ack, body, logger, client):
+    """
+    Opens the search modal of the archive, from the global shortcut with the callback_id 'search_archive'.
+
+    Parameters:
+    ack (function): A function to send acknowledgments from a callback to Slack's APIs.
+    body (dict): The payload from the shortcut.
+    logger (Logger): A Logger instance for logging errors.
+    client (SlackClient): An authenticated Slack client for making API calls.
+
+    Returns:
+    None
+
+    Note:
+    The modal is built without reading any file, so it is opened at once with 'views.open', without the loading
+    modal of 'modal_loader'. The use of the shortcut is reported like the clicks of the Home tab buttons.
+    """
+
+    text = 'ΑΝΑΖΗΤΗΣΗ ΣΤΟ ΑΡΧΕΙΟ'
+    try:
+        ack()
+        client.views_open(trigger_id=body["trigger_id"], view=modals.search_view())
+    except Exception as e:
+        logger.error(f"Error opening the search modal: {e}")
+    finally:
+        activity_queue.enqueue(body, client, logger, text)
+
+
+@app.view("search_archive")
+@metrics.timed("view", "search_archive")
+def handle_search(ack, view, logger):
+    """
+    Handles the submission of the search modal opened by the 'search_archive' shortcut.
+
+    The query is looked up in the full-text index of the requests and the meetings, see 'search.search()', and
+    the submission is acknowledged with the modal updated in place with the results, so no other Slack call is made.
+
+    Parameters:
+    ack (function): A function to send acknowledgments from a callback to Slack's APIs.
+    view (dict): The submitted view, with the query in its 'search' input.
+    logger (Logger): A Logger instance for logging errors.
+    """
+
+    query = view["state"]["values"]["search"]["query"].get("value") or ""
+    try:
+        results = search.search(query)
+    except Exception as e:
+        logger.error(f"Error searching the archive for '{query}': {e}")
+        results = []
+    ack(response_action="update", view=modals.search_view(query, results))
+
+
+@app.action("search_open_request")
+@metrics.timed("action", "search_open_request")
+def open_search_result(ack, body, logger, client):
+    """
+    Shows the status of a request picked among the results of the search modal.
+
+    The button 'search_open_request' of a result carries the protocol number of the request. Its status modal is
+    opened with 'modal_loader.open_modal()', like the results of the archive picker, but pushed on top of the search
+    results, which are shown again when the status is closed.
+
+    Parameters:
+    ack (function): A function to send acknowledgments from a callback to Slack's APIs.
+    body (dict): The payload from the action event.
+    logger (Logger): A Logger instance for logging errors.
+    client (SlackClient): An authenticated Slack client for making API calls.
+
+    Returns:
+    None
+    """
+
+    ack()
+    try:
+        modal_loader.open_modal(client, body["trigger_id"], "ΑΠΟΤΕΛΕΣΜΑΤΑ", modals.represent_data,
+                                body["actions"][0]["value"], push=True)
+    except Exception as e:
+        logger.error(f"Error showing the request of a search result: {e}")
+
+
+@app.options("archive_step_b")
+@metrics.timed("options", "archive_step_b")
+def archive_step_b_options(ack, payload):
+    """
+    Answers the external select of the archive picker as the user types.
+
+    The requests whose name or protocol number match the typed text are looked up in the search index of the
+    request archive, built once per version of 'requests.json', see 'functions.request_options()'.
+
+    Parameters:
+    ack (function): A function to send the options back to Slack.
+    payload (dict): The block_suggestion payload, with the typed text in 'value'.
+    """
+
+    ack(options=functions.request_options(payload.get("value", "")))
+
+
 @app.event("app_home_opened")
+@metrics.timed("event", "app_home_opened")
 def publish_home_view(client, event, logger):
     """
     The Home tab is a persistent, yet dynamic interface for apps.
@@ -267,7 +405,8 @@ def publish_home_view(client, event, logger):
     conversation list within Slack or by clicking on the app's name in messages. The function retrieves the user 
     details and checks if the user is an admin. Depending on the user status ('is_admin'), it delivers a specific 
     home page view to the user by calling 'home_page.run()' and publishes it to the user's home using 
-    'client.views_publish()' method.
+    'client.views_publish()' method. User details are read through 'user_cache', so 'users.info' is only called
+    when the profile is not cached.
 
     Parameters:
     client (SlackClient): An authenticated Slack client for making API calls.
@@ -287,14 +426,13 @@ def publish_home_view(client, event, logger):
 
     admin_users = os.getenv('SLACK_ADMINISTRATORS')
     super_users = os.getenv('SLACK_SUPER_USERS')
-    user_info = client.users_info(user=event["user"])
-    user_image = user_info['user']['profile']['image_original']
+    user_info = user_cache.get_user(client, event["user"]) or {}
     is_admin = event["user"] in admin_users
     is_super_user = event["user"] in super_users
     if is_admin:
-        print(f'Admin User {event["user"]}, {user_info['user'].get('real_name')}\n')
+        print(f'Admin User {event["user"]}, {user_info.get('real_name')}\n')
     else:
-        print(f'Single User {event["user"]}, {user_info['user'].get('real_name')}')
+        print(f'Single User {event["user"]}, {user_info.get('real_name')}')
     try:
         client.views_publish(
             user_id=event["user"],
@@ -303,21 +441,243 @@ def publish_home_view(client, event, logger):
         logger.error(f"Error publishing view to Home Tab: {e}")
 
 
+@app.event("user_change")
+@metrics.timed("event", "user_change")
+def handle_user_change(event, logger):
+    """
+    Handles the 'user_change' event within a Slack App.
+
+    This function is activated when a member's profile changes. The cached profile of the user is invalidated,
+    so the next Home tab or activity report reads the new name and image from Slack.
+
+    Parameters:
+    event (dict): The payload from the 'user_change' event.
+    logger (Logger): A Logger instance for logging the event.
+
+    Returns:
+    None
+
+    Note:
+    The 'user_change' event requires the 'users:read' scope and an event subscription to 'user_change'.
+    """
+
+    user_cache.invalidate(event["user"]["id"])
+    logger.info(f"User profile cache invalidated for {event['user']['id']}")
+
+
+def create_async_app():
+    """
+    Creates the Slack App of the async mode, with the same listeners as the sync App.
+
+    Every listener is a coroutine running on the event loop of uvicorn: Slack calls are awaited on the
+    'AsyncWebClient' injected by Bolt, and the activity reports are queued to the async worker tasks of
+    'activity_queue'. Hundreds of concurrent interactions can then be served without a thread per request.
+    The views that read files (the Home tab, the archive, the meetings) are built with 'asyncio.to_thread',
+    so a cold cache never blocks the event loop.
+    The listeners mirror the sync listeners above, see their docstrings for the details of each one.
+
+    Returns:
+    AsyncApp: The Slack App of the async mode.
+
+    Note:
+    The async mode needs the 'aiohttp' package and is enabled with the environment variable SLACK_ASYNC_MODE=true.
+    """
+
+    from slack_bolt.async_app import AsyncApp
+
+    async_app = AsyncApp(signing_secret=os.getenv('SLACK_SECRET'),
+                         name='main.py',
+                         client=slack_client.async_client_class()(token=os.getenv('SLACK_TOKEN'),
+                                                                  base_url=slack_client.API_URL))
+
+    @async_app.middleware
+    async def use_pooled_client(context, next):
+        # the shared AsyncWebClient keeps its aiohttp connections alive, see slack_client.get_async_client()
+        context["client"] = slack_client.get_async_client(context.token)
+        await next()
+
+    @async_app.event("message")
+    @metrics.timed("event", "message")
+    async def handle_message_events(body, logger):
+        logger.info(body)
+
+    async def open_view(body, ack, logger, client, view, text=None, key=None, title=None):
+        await ack()
+        try:
+            if title:
+                # built in a worker thread behind a loading modal, see modal_loader.open_modal()
+                await modal_loader.open_modal_async(client, body["trigger_id"], title, view)
+            else:
+                await client.views_open(trigger_id=body["trigger_id"], view=await asyncio.to_thread(view))
+        except Exception as e:
+            logger.error(f"Error responding to 'archive_step_b' button click: {e}")
+        finally:
+            if text:
+                activity_queue.enqueue_async(body, client, logger, text, key)
+
+    @async_app.action("request_katastatiko")
+    @metrics.timed("action", "request_katastatiko")
+    async def action_button_click(body, ack, logger, client):
+        await open_view(body, ack, logger, client, modals.choose_katastatiko, 'ΚΑΤΑΣΤΑΤΙΚΟ ΣΥΛΛΟΓΟΥ')
+
+    @async_app.action("request_arxeio")
+    @metrics.timed("action", "request_arxeio")
+    async def action_button_click(body, ack, logger, client):
+        await open_view(body, ack, logger, client, modals.choose_archive)
+
+    @async_app.action("reuest_phones")
+    @metrics.timed("action", "reuest_phones")
+    async def action_button_click(body, ack, logger, client):
+        await open_view(body, ack, logger, client, modals.send_phones, 'ΤΗΛΕΦΩΝΑ ΕΠΙΚΟΙΝΩΝΙΑΣ', title="ΤΗΛΕΦΩΝΑ")
+
+    @async_app.action("request_sinelefsi")
+    @metrics.timed("action", "request_sinelefsi")
+    async def action_button_click(body, ack, logger, client):
+        await open_view(body, ack, logger, client, modals.send_request_sinelefsi, 'ΠΡΑΚΤΙΚΑ ΓΕΝΙΚΩΝ ΣΥΝΕΛΕΥΣΕΩΝ',
+                        title="Meeting Info")
+
+    @async_app.action(re.compile("^meetings_page_(prev|next)$"))
+    @metrics.timed("action", "meetings_page")
+    async def action_button_click(body, ack, logger, client):
+        await ack()
+        try:
+            await client.views_update(view_id=body["view"]["id"], hash=body["view"]["hash"],
+                                      view=await asyncio.to_thread(modals.meetings_page,
+                                                                   int(body["actions"][0]["value"])))
+        except Exception as e:
+            logger.error(f"Error turning the page of the meetings modal: {e}")
+
+    @async_app.view("button_archive_step_b")
+    @metrics.timed("view", "button_archive_step_b")
+    async def handle_submission(ack, body, view, logger, client):
+        text = 'ΑΡΧΕΙΟ ΟΙ ΑΙΤΗΣΕΙΣ ΜΑΣ '
+        await ack()
+        key = ''
+        try:
+            logger.info(body)
+            key = modals.handle_archive_step_b(view)
+            await modal_loader.open_modal_async(client, body["trigger_id"], "ΑΠΟΤΕΛΕΣΜΑΤΑ", modals.represent_data, key)
+        except Exception as e:
+            logger.error(f"Error responding to 'archive_step_b' button click: {e}")
+        finally:
+            activity_queue.enqueue_async(body, client, logger, text, key)
+
+    @async_app.action("archive_step_b")
+    @metrics.timed("action", "archive_step_b")
+    async def handle_some_action(ack, body, logger):
+        await ack()
+        logger.info(body)
+
+    @async_app.shortcut("search_archive")
+    @metrics.timed("shortcut", "search_archive")
+    async def open_search(body, ack, logger, client):
+        await open_view(body, ack, logger, client, modals.search_view, 'ΑΝΑΖΗΤΗΣΗ ΣΤΟ ΑΡΧΕΙΟ')
+
+    @async_app.view("search_archive")
+    @metrics.timed("view", "search_archive")
+    async def handle_search(ack, view, logger):
+        query = view["state"]["values"]["search"]["query"].get("value") or ""
+        try:
+            results = await asyncio.to_thread(search.search, query)
+        except Exception as e:
+            logger.error(f"Error searching the archive for '{query}': {e}")
+            results = []
+        await ack(response_action="update", view=modals.search_view(query, results))
+
+    @async_app.action("search_open_request")
+    @metrics.timed("action", "search_open_request")
+    async def open_search_result(ack, body, logger, client):
+        await ack()
+        try:
+            await modal_loader.open_modal_async(client, body["trigger_id"], "ΑΠΟΤΕΛΕΣΜΑΤΑ", modals.represent_data,
+                                                body["actions"][0]["value"], push=True)
+        except Exception as e:
+            logger.error(f"Error showing the request of a search result: {e}")
+
+    @async_app.options("archive_step_b")
+    @metrics.timed("options", "archive_step_b")
+    async def archive_step_b_options(ack, payload):
+        await ack(options=await asyncio.to_thread(functions.request_options, payload.get("value", "")))
+
+    @async_app.event("app_home_opened")
+    @metrics.timed("event", "app_home_opened")
+    async def publish_home_view(client, event, logger):
+        admin_users = os.getenv('SLACK_ADMINISTRATORS')
+        super_users = os.getenv('SLACK_SUPER_USERS')
+        user_info = await user_cache.get_user_async(client, event["user"]) or {}
+        is_admin = event["user"] in admin_users
+        is_super_user = event["user"] in super_users
+        if is_admin:
+            print(f'Admin User {event["user"]}, {user_info.get('real_name')}\n')
+        else:
+            print(f'Single User {event["user"]}, {user_info.get('real_name')}')
+        try:
+            await client.views_publish(
+                user_id=event["user"],
+                view=await asyncio.to_thread(home_page.run, event, is_admin, is_super_user))
+        except Exception as e:
+            logger.error(f"Error publishing view to Home Tab: {e}")
+
+    @async_app.event("user_change")
+    @metrics.timed("event", "user_change")
+    async def handle_user_change(event, logger):
+        user_cache.invalidate(event["user"]["id"])
+        logger.info(f"User profile cache invalidated for {event['user']['id']}")
+
+    return async_app
+
+
+if SLACK_ASYNC_MODE:
+    from slack_bolt.adapter.fastapi.async_handler import AsyncSlackRequestHandler
+
+    app_handler = AsyncSlackRequestHandler(create_async_app())
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Asynchronous context manager to manage the lifespan of the FastAPI application.
     On entering the context, the status is set to "🟢 FILARMONIKI IS ONLINE" for the specified channel.
     On exiting the context, the status is changed to "🔴 FILARMONIKI IS OFFLINE" for the specified channel.
+    The status is only posted with BOT_PRESENCE=true, and by a single worker in the production mode.
+    The activity report workers (threads, or tasks in the async mode) are started on enter and drained on exit,
+    and the buffered report digest is published, so no queued report is lost on shutdown.
+    The Home tab statistics and the static Home tab templates of every role are built once on enter, and the
+    search index of the archives is built in the background.
+    In the async mode the shared aiohttp session of the Slack clients is closed on exit.
 
     Args:
         app (FastAPI): The FastAPI application instance
     """
     cid = 2
-    # bot_presence.set_status("🟢 FILARMONIKI APP IS ONLINE ", cid)
+    # with several workers only the one holding the presence lock posts the status, see bot_presence.claim()
+    presence = bot_presence.claim()
+    if presence and SLACK_ASYNC_MODE:
+        await bot_presence.set_status_async("🟢 FILARMONIKI APP IS ONLINE ", cid)
+    elif presence:
+        bot_presence.set_status("🟢 FILARMONIKI APP IS ONLINE ", cid)
+    activity_stats.load()
+    home_page.build_templates()
+    # the search index of the archives is built in the background, a search meanwhile waits for it
+    threading.Thread(target=search.warm, name='search-warm', daemon=True).start()
+    if SLACK_ASYNC_MODE:
+        activity_queue.start_async()
+    else:
+        activity_queue.start()
     print("ONLINE")
     yield
-    # bot_presence.set_status("🔴 FILARMONIKI APP IS OFFLINE ",  cid)
+    if SLACK_ASYNC_MODE:
+        await activity_queue.drain_async()
+        await asyncio.to_thread(report_digest.flush)
+        if presence:
+            await bot_presence.set_status_async("🔴 FILARMONIKI APP IS OFFLINE ", cid)
+        await slack_client.close_async()
+    else:
+        activity_queue.drain()
+        report_digest.flush()
+        if presence:
+            bot_presence.set_status("🔴 FILARMONIKI APP IS OFFLINE ", cid)
+    bot_presence.release()
     print("OFFLINE")
 
 
@@ -336,7 +696,8 @@ async def endpoint(req: Request):
 
     This function receives POST requests on the '/slack/events' endpoint and passes them to the Slack app's event
     handler 'app_handler'. The 'app_handler.handle()' method processes the incoming request and generates
-    the appropriate response.
+    the appropriate response. With SLACK_ASYNC_MODE=true the handler serves the AsyncApp of 'create_async_app()',
+    otherwise the sync App.
 
     Parameters:
     req (Request): The incoming HTTP request.
@@ -347,9 +708,39 @@ async def endpoint(req: Request):
     Note:
     The end point '/slack/events' is commonly used to listen to incoming events from Slack. Make sure your app is
     verified and 'Event Subscriptions' is enabled in your app configuration on Slack API.
+    While the request profiling is switched on (see '/profiling'), a sampled request is handled under cProfile
+    and its profile is saved, tagged with its action_id, callback_id or event type.
+    A delivery already in progress or handled (a Slack retry with 'X-Slack-Retry-Num' or a duplicate) is
+    acknowledged right away, with 'X-Slack-No-Retry: 1', without being dispatched again, see 'dedup.claim()'.
     """
 
-    return await app_handler.handle(req)
+    body = await req.body()
+    key, duplicate = await asyncio.to_thread(dedup.claim, body, req.headers)
+    if duplicate:
+        return Response(status_code=200, headers={'X-Slack-No-Retry': '1'})
+    try:
+        response = await dispatch(req, body)
+    except Exception:
+        await asyncio.to_thread(dedup.finish, key)
+        raise
+    await asyncio.to_thread(dedup.finish, key, response.status_code)
+    return response
+
+
+async def dispatch(req, body):
+    """
+    Passes a request to 'app_handler', under cProfile if it is sampled by the request profiling.
+    """
+
+    session = profiling.start(body)
+    if session is None:
+        return await app_handler.handle(req)
+    token = profiling.current.set(session)
+    try:
+        return await app_handler.handle(req)
+    finally:
+        profiling.current.reset(token)
+        session.release()
 
 
 @api.get("/status")
@@ -364,13 +755,92 @@ async def get_status():
     None
 
     Returns:
-    dict: A dictionary with the key 'status' and the value 'Server is running' as the response to indicate that the server is up and running.
+    dict: A dictionary with the key 'status' and the value 'Server is running' as the response to indicate that the server is up and running,
+    the key 'activity_queue' with the queue depth and the dropped reports of the activity report pipeline,
+    the key 'user_cache' with the size and hit/miss counters of the user profile cache,
+    the key 'status_cache' with the size and hit rate of the request status blocks cache,
+    the key 'slack_retries' with the retry and give-up counters of the Slack API calls,
+    the key 'slack_pool' with the state of the pooled connections to Slack,
+    the key 'report_digest' with the mode and the pending, posted and updated counters of the report digest,
+    the key 'event_dedup' with the retried and duplicate Slack deliveries and the size of the seen-set,
+    and the key 'search_index' with the indexed requests, meetings and words of the archive search.
 
     Note:
     This endpoint is commonly used for health checking the server or the application.
     """
 
-    return {"status": "Server is running"}
+    return {"status": "Server is running",
+            "activity_queue": activity_queue.stats(),
+            "user_cache": user_cache.stats(),
+            "status_cache": functions.status_cache_stats(),
+            "slack_retries": retry.stats(),
+            "slack_pool": slack_client.stats(),
+            "report_digest": report_digest.stats(),
+            "event_dedup": dedup.stats(),
+            "search_index": search.stats()}
+
+
+@api.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Handles GET requests to the '/metrics' endpoint.
+
+    This function returns the metrics of the app in the Prometheus text format, to be scraped by Prometheus
+    or a compatible agent.
+
+    Parameters:
+    None
+
+    Returns:
+    PlainTextResponse: The latency histograms of every Bolt listener (by action_id, callback_id or event type),
+    the latency, result and rate limit counters of every Slack Web API method, the retry counters and
+    the state of the Slack connection pool.
+
+    Note:
+    Only the calls made through the shared clients of 'slack_client' are measured, which covers slack_todo,
+    reports, bot_presence and the clients Bolt hands to the listeners.
+    """
+
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@api.get("/profiling")
+async def get_profiling(x_admin_token: str = Header(default=None)):
+    """
+    Handles GET requests to the '/profiling' endpoint.
+
+    Returns the settings and the counters of the request profiling and the names of the kept profiles.
+    Only available to admins, with the header 'X-Admin-Token' set to PROFILE_ADMIN_TOKEN.
+
+    Returns:
+    dict: The profiling status, see 'profiling.status()'.
+    """
+
+    if not profiling.authorized(x_admin_token):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    return profiling.status()
+
+
+@api.post("/profiling")
+async def set_profiling(enabled: bool = None, rate: float = None, x_admin_token: str = Header(default=None)):
+    """
+    Handles POST requests to the '/profiling' endpoint.
+
+    Switches the profiling of '/slack/events' requests on or off and sets the sampled fraction, without a restart,
+    e.g. 'POST /profiling?enabled=true&rate=0.05'. Only available to admins, with the header 'X-Admin-Token'
+    set to PROFILE_ADMIN_TOKEN.
+
+    Parameters:
+    enabled (bool, optional): Profile sampled requests. Unchanged if omitted.
+    rate (float, optional): The fraction of requests profiled, between 0 and 1. Unchanged if omitted.
+
+    Returns:
+    dict: The new profiling status, see 'profiling.status()'.
+    """
+
+    if not profiling.authorized(x_admin_token):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    return profiling.configure(enabled, rate)
 
 
 @api.get("/")
@@ -419,6 +889,23 @@ def get_ip_address():
     return s.getsockname()[0]
 
 
+def prepare():
+    """
+    Prepares the state the workers of the production mode share on disk, once, before they start.
+
+    The workers are separate processes that each build their own caches and statistics in their lifespan,
+    from the activity store. Creating the store here, and importing a legacy 'statistic_records.csv' into
+    it, spares every worker that work and keeps them from racing each other on the first start. The index
+    of the messages posted by the bot is a SQLite database all the workers read and write, it is created
+    (and a legacy 'message_index.json' imported) here as well, as is the seen-set of the Slack deliveries,
+    through which a retry of Slack reaching another worker is not dispatched twice.
+    """
+
+    activity_store.get_store()
+    message_index.index.prepare()
+    dedup.prepare()
+
+
 if __name__ == "__main__":
     """
     This block of code is usually placed at the bottom of a Python script. It checks if the script is being run 
@@ -428,6 +915,8 @@ if __name__ == "__main__":
     Then it starts a Uvicorn server with the application 'main:api' bound to localhost on port 3200 by calling 'uvicorn.run()'.
     The server's logging level is set to 'info' and the 'reload' option is set to 'True' which enables auto reloading of 
     the server when it detects code changes.
+    With APP_WORKERS set, the server runs in production mode instead: APP_WORKERS worker processes share
+    the port, without reloading, after 'prepare()' has set up their shared state.
 
     Parameters:
     None
@@ -443,4 +932,10 @@ if __name__ == "__main__":
     """
 
     my_ip = get_ip_address()
-    uvicorn.run("main:api", host=my_ip, port=3200, log_level="info", reload=True)
+    workers = int(os.getenv('APP_WORKERS', 0))
+    if workers:
+        prepare()
+        uvicorn.run("main:api", host=my_ip, port=3200, log_level="info", workers=workers,
+                    timeout_graceful_shutdown=30)
+    else:
+        uvicorn.run("main:api", host=my_ip, port=3200, log_level="info", reload=True)
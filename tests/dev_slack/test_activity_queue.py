@@ -0,0 +1,117 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import asyncio
+import logging
+import queue
+import threading
+import unittest
+from unittest import mock
+from dev_slack import activity_queue
+
+logger = logging.getLogger(__name__)
+
+
+class TestActivityQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.published = []
+        self.late = None
+        self.release = threading.Event()
+        self.release.set()
+        counters = {name: 0 for name in ('enqueued', 'processed', 'failed', 'dropped')}
+        for patcher in (mock.patch.object(activity_queue, '_queue', queue.Queue(maxsize=2)),
+                        mock.patch.object(activity_queue, '_workers', []),
+                        mock.patch.object(activity_queue, '_async_workers', []),
+                        mock.patch.object(activity_queue, '_closing', False),
+                        mock.patch.object(activity_queue, '_counters', counters),
+                        mock.patch.object(activity_queue.reports, 'button_reports', self.button_reports)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(activity_queue.drain, 1)
+        self.addCleanup(self.release.set)
+
+    def button_reports(self, body, client, job_logger, text, key):
+        self.release.wait(5)
+        if text == 'fails':
+            raise RuntimeError('Slack is down')
+        if text == 'late':
+            # a listener that reports again while the app shuts down
+            self.late = activity_queue.enqueue(body, client, job_logger, 'too late')
+        self.published.append((body, text, key))
+
+    def test_reports_are_published_by_the_workers(self):
+        self.assertTrue(activity_queue.enqueue({'user': 'U1'}, None, logger, 'ΤΗΛΕΦΩΝΑ', 'key'))
+        activity_queue.drain(5)
+        self.assertEqual(self.published, [({'user': 'U1'}, 'ΤΗΛΕΦΩΝΑ', 'key')])
+        stats = activity_queue.stats()
+        self.assertEqual((stats['enqueued'], stats['processed'], stats['workers']), (1, 1, 0))
+
+    def test_reports_are_dropped_when_the_queue_is_full(self):
+        self.release.clear()
+        activity_queue.start(workers=1)
+        activity_queue.enqueue({}, None, logger, 'report 0')
+        # wait until the worker holds the first report, the queue then takes two more
+        for _ in range(500):
+            if activity_queue._queue.empty():
+                break
+            threading.Event().wait(0.01)
+        results = [activity_queue.enqueue({}, None, logger, f'report {number}') for number in range(1, 5)]
+        self.assertEqual(results, [True, True, False, False])
+        self.assertEqual(activity_queue.stats()['dropped'], 2)
+        self.release.set()
+        activity_queue.drain(5)
+        self.assertEqual(len(self.published), 3)
+
+    def test_failures_are_counted_and_do_not_stop_the_workers(self):
+        activity_queue.start(workers=1)
+        activity_queue.enqueue({}, None, logger, 'fails')
+        activity_queue.enqueue({}, None, logger, 'works')
+        activity_queue.drain(5)
+        self.assertEqual([text for _, text, _ in self.published], ['works'])
+        self.assertEqual((activity_queue.stats()['failed'], activity_queue.stats()['processed']), (1, 1))
+
+    def test_drain_publishes_the_pending_reports(self):
+        self.release.clear()
+        activity_queue.start(workers=2)
+        for number in range(2):
+            activity_queue.enqueue({}, None, logger, f'report {number}')
+        threading.Timer(0.05, self.release.set).start()
+        activity_queue.drain(5)
+        self.assertEqual(sorted(text for _, text, _ in self.published), ['report 0', 'report 1'])
+        self.assertFalse(any(worker.is_alive() for worker in activity_queue._workers))
+
+    def test_reports_queued_during_the_drain_are_dropped(self):
+        activity_queue.start(workers=2)
+        activity_queue.enqueue({}, None, logger, 'late')
+        activity_queue.drain(5)
+        self.assertFalse(self.late)
+        self.assertEqual([text for _, text, _ in self.published], ['late'])
+        self.assertEqual((activity_queue.stats()['dropped'], activity_queue.stats()['workers']), (1, 0))
+        self.assertFalse(activity_queue.enqueue({}, None, logger, 'after the drain'))
+        # an explicit start opens the queue again
+        activity_queue.start(workers=1)
+        self.assertTrue(activity_queue.enqueue({}, None, logger, 'restarted'))
+
+    def test_async_reports_queued_during_the_drain_are_dropped(self):
+        async def button_reports_async(body, client, job_logger, text, key):
+            await asyncio.sleep(0.01)
+            if text == 'late':
+                self.late = activity_queue.enqueue_async(body, client, job_logger, 'too late')
+            self.published.append((body, text, key))
+
+        async def run():
+            activity_queue.start_async(workers=2)
+            for text in ('first', 'late', 'last'):
+                activity_queue.enqueue_async({}, None, logger, text)
+            await activity_queue.drain_async(5)
+
+        with mock.patch.object(activity_queue.reports, 'button_reports_async', button_reports_async):
+            asyncio.run(run())
+        self.assertFalse(self.late)
+        self.assertEqual(sorted(text for _, text, _ in self.published), ['first', 'last', 'late'])
+        stats = activity_queue.stats()
+        self.assertEqual((stats['enqueued'], stats['processed'], stats['dropped'], stats['workers']), (3, 3, 1, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import os
+import tempfile
+import unittest
+from dev_slack import activity_stats, activity_store
+
+
+class TestStatisticsAggregator(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'statistic_records.csv')
+        self.store = activity_store.CsvActivityStore(self.path)
+        self.aggregator = activity_stats.StatisticsAggregator(self.store)
+
+    def test_counters_are_loaded_from_the_store(self):
+        self.store.append('U1', 'img1', 'Γιάννης', 'ΤΗΛΕΦΩΝΑ', '', '2024-05-01 10:00:00')
+        self.store.append('U1', 'img1', 'Γιάννης', 'ΑΙΤΗΣΕΙΣ', '', '2024-05-01 10:01:00')
+        self.store.append('U2', 'img2', 'Μαρία', 'ΤΗΛΕΦΩΝΑ', '', '2024-05-01 10:02:00')
+        snapshot = self.aggregator.snapshot()
+        self.assertEqual(snapshot['total'], 3)
+        self.assertEqual(snapshot['buttons'], {'ΤΗΛΕΦΩΝΑ': 2, 'ΑΙΤΗΣΕΙΣ': 1})
+        self.assertEqual(snapshot['users'], {'Γιάννης': 2, 'Μαρία': 1})
+        self.assertEqual(snapshot['user_buttons']['Γιάννης'], {'ΤΗΛΕΦΩΝΑ': 1, 'ΑΙΤΗΣΕΙΣ': 1})
+        self.assertEqual(snapshot['user_ids'], {'Γιάννης': 'U1', 'Μαρία': 'U2'})
+        self.assertEqual(self.aggregator.cursor, self.store.cursor())
+
+    def test_append_updates_the_counters_in_place(self):
+        self.aggregator.load()
+        self.aggregator.append('U1', 'img1', 'Γιάννης', 'ΤΗΛΕΦΩΝΑ', '', '2024-05-01 10:00:00')
+        self.aggregator.append('U1', 'img3', 'Γιάννης', 'ΤΗΛΕΦΩΝΑ', '', '2024-05-01 10:01:00')
+        snapshot = self.aggregator.snapshot()
+        self.assertEqual(snapshot['user_buttons'], {'Γιάννης': {'ΤΗΛΕΦΩΝΑ': 2}})
+        self.assertEqual(snapshot['user_images'], {'Γιάννης': 'img3'})
+        self.assertEqual(self.aggregator.cursor, self.store.cursor())
+
+    def test_records_of_other_writers_are_read_once(self):
+        self.aggregator.append('U1', 'img1', 'Γιάννης', 'ΤΗΛΕΦΩΝΑ', '', '2024-05-01 10:00:00')
+        # another worker of the production mode appends through its own store
+        activity_store.CsvActivityStore(self.path).append('U2', 'img2', 'Μαρία', 'ΑΙΤΗΣΕΙΣ', '', '2024-05-01 10:01:00')
+        self.aggregator.append('U1', 'img1', 'Γιάννης', 'ΑΙΤΗΣΕΙΣ', '', '2024-05-01 10:02:00')
+        self.assertEqual(self.aggregator.snapshot()['buttons'], {'ΤΗΛΕΦΩΝΑ': 1, 'ΑΙΤΗΣΕΙΣ': 2})
+        self.assertEqual(self.aggregator.snapshot()['total'], 3)
+
+    def test_partially_written_line_is_left_for_the_next_read(self):
+        self.store.append('U1', 'img1', 'Γιάννης', 'ΤΗΛΕΦΩΝΑ', '', '2024-05-01 10:00:00')
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write('U2,img2,Μαρία,ΑΙΤ')
+        self.assertEqual(self.aggregator.snapshot()['total'], 1)
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write('ΗΣΕΙΣ,,2024-05-01 10:01:00\n')
+        self.assertEqual(self.aggregator.snapshot()['buttons'], {'ΤΗΛΕΦΩΝΑ': 1, 'ΑΙΤΗΣΕΙΣ': 1})
+
+    def test_header_row_is_skipped(self):
+        with open(self.path, 'w', encoding='utf-8') as file:
+            file.write('id,user_image,username,report\nU1,img1,Γιάννης,ΤΗΛΕΦΩΝΑ,,2024-05-01 10:00:00\n')
+        self.assertEqual(self.aggregator.snapshot()['buttons'], {'ΤΗΛΕΦΩΝΑ': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
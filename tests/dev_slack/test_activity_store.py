@@ -0,0 +1,101 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from dev_slack import activity_stats, activity_store
+
+
+class TestCsvActivityStore(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = activity_store.CsvActivityStore(os.path.join(directory.name, 'statistic_records.csv'))
+
+    def test_missing_file_is_empty(self):
+        self.assertEqual(self.store.cursor(), 0)
+        self.assertEqual(self.store.read_since(0), ([], 0))
+
+    def test_cursor_reads_only_newer_records(self):
+        first = self.store.append('U1', 'img1', 'Γιάννης', 'ΤΗΛΕΦΩΝΑ', '', '2024-05-01 10:00:00')
+        self.assertEqual(first, self.store.cursor())
+        self.store.append('U2', 'img2', 'Μαρία', 'ΑΙΤΗΣΕΙΣ', '', '2024-05-01 10:01:00')
+        rows, cursor = self.store.read_since(first)
+        self.assertEqual(rows, [('U2', 'img2', 'Μαρία', 'ΑΙΤΗΣΕΙΣ', 1)])
+        self.assertEqual(cursor, self.store.cursor())
+        self.assertEqual(self.store.read_since(cursor), ([], cursor))
+
+
+class TestSqliteActivityStore(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.path = os.path.join(directory.name, 'activity.sqlite3')
+        self.store = activity_store.SqliteActivityStore(self.path)
+        self.addCleanup(self.store._connection.close)
+
+    def test_rollup_sums_the_presses_of_every_day(self):
+        self.store.append('U1', 'img1', 'Γιάννης', 'ΤΗΛΕΦΩΝΑ', None, datetime(2024, 5, 1, 10))
+        self.store.append('U1', 'img1', 'Γιάννης', 'ΤΗΛΕΦΩΝΑ', None, datetime(2024, 5, 2, 10))
+        self.store.append('U1', 'img4', 'Γιάννης', 'ΤΗΛΕΦΩΝΑ', None, datetime(2024, 5, 2, 11))
+        self.store.append('U2', 'img2', 'Μαρία', 'ΑΙΤΗΣΕΙΣ', None, datetime(2024, 5, 2, 12))
+        days = self.store._query("SELECT day, presses FROM daily_user_button WHERE user = 'U1' ORDER BY day")
+        self.assertEqual(days, [('2024-05-01', 1), ('2024-05-02', 2)])
+        rows, cursor = self.store.read_since(0)
+        self.assertEqual(sorted(rows), [('U1', 'img4', 'Γιάννης', 'ΤΗΛΕΦΩΝΑ', 3), ('U2', 'img2', 'Μαρία', 'ΑΙΤΗΣΕΙΣ', 1)])
+        self.assertEqual(cursor, 4)
+
+    def test_cursor_reads_only_newer_rows(self):
+        cursor = self.store.append('U1', 'img1', 'Γιάννης', 'ΤΗΛΕΦΩΝΑ', None, datetime(2024, 5, 1, 10))
+        self.assertEqual(cursor, self.store.cursor())
+        self.store.append('U2', 'img2', 'Μαρία', 'ΑΙΤΗΣΕΙΣ', None, datetime(2024, 5, 1, 11))
+        self.store.append('U2', 'img2', 'Μαρία', 'ΑΙΤΗΣΕΙΣ', None, datetime(2024, 5, 1, 12))
+        self.assertEqual(self.store.read_since(cursor), ([('U2', 'img2', 'Μαρία', 'ΑΙΤΗΣΕΙΣ', 2)], 3))
+
+    def test_csv_is_imported_once(self):
+        csv_path = os.path.join(self.directory, 'statistic_records.csv')
+        csv_store = activity_store.CsvActivityStore(csv_path)
+        csv_store.append('U1', 'img1', 'Γιάννης', 'ΤΗΛΕΦΩΝΑ', '', '2024-05-01 10:00:00')
+        csv_store.append('U2', 'img2', 'Μαρία', 'ΑΙΤΗΣΕΙΣ', 'key', '2024-05-02 10:00:00')
+        self.assertEqual(self.store.import_csv(csv_path), 2)
+        self.assertEqual(self.store.import_csv(csv_path), 0)
+        self.assertEqual(self.store._query("SELECT key FROM activity ORDER BY id"), [(None,), ('key',)])
+        self.assertEqual(self.store.cursor(), 2)
+
+    def test_statistics_are_loaded_from_the_rollup(self):
+        self.store.append('U1', 'img1', 'Γιάννης', 'ΤΗΛΕΦΩΝΑ', None, datetime(2024, 5, 1, 10))
+        self.store.append('U1', 'img1', 'Γιάννης', 'ΤΗΛΕΦΩΝΑ', None, datetime(2024, 5, 2, 10))
+        aggregator = activity_stats.StatisticsAggregator(self.store)
+        aggregator.load()
+        aggregator.append('U2', 'img2', 'Μαρία', 'ΑΙΤΗΣΕΙΣ', None, datetime(2024, 5, 2, 11))
+        snapshot = aggregator.snapshot()
+        self.assertEqual(snapshot['total'], 3)
+        self.assertEqual(snapshot['users'], {'Γιάννης': 2, 'Μαρία': 1})
+        self.assertEqual(aggregator.cursor, 3)
+
+    def test_append_of_another_worker_during_snapshot_is_counted_once(self):
+        self.store.append('U1', 'img1', 'Γιάννης', 'ΤΗΛΕΦΩΝΑ', None, datetime(2024, 5, 1, 10))
+        other = activity_store.SqliteActivityStore(self.path)
+        self.addCleanup(other._connection.close)
+
+        def append_during_rollup(statement):
+            # another worker appends after the cursor was read, before the rollup is summed
+            if 'daily_user_button r' in statement and not other.cursor() > 1:
+                other.append('U2', 'img2', 'Μαρία', 'ΑΙΤΗΣΕΙΣ', None, datetime(2024, 5, 1, 11))
+
+        self.store._connection.set_trace_callback(append_during_rollup)
+        aggregator = activity_stats.StatisticsAggregator(self.store)
+        snapshot = aggregator.snapshot()
+        self.store._connection.set_trace_callback(None)
+        self.assertEqual(other.cursor(), 2)
+        self.assertEqual(snapshot['total'], 2)
+        self.assertEqual(snapshot['buttons'], {'ΤΗΛΕΦΩΝΑ': 1, 'ΑΙΤΗΣΕΙΣ': 1})
+        self.assertEqual(aggregator.snapshot()['total'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import functools
+import time
+import unittest
+from unittest import mock
+from slack_sdk.errors import SlackApiError
+from dev_slack import bulk_delete, slack_todo
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_rate_has_to_be_positive(self):
+        for rate in (0, -1):
+            with self.assertRaises(ValueError):
+                bulk_delete.TokenBucket(rate, 10)
+        with self.assertRaises(ValueError):
+            bulk_delete.TokenBucket(1, 0)
+
+    def test_burst_then_rate(self):
+        bucket = bulk_delete.TokenBucket(50, 3)
+        started = time.monotonic()
+        for _ in range(3):
+            bucket.acquire()
+        self.assertLess(time.monotonic() - started, 0.01)
+        bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - started, 0.015)
+
+    def test_pause(self):
+        bucket = bulk_delete.TokenBucket(1000, 10)
+        bucket.pause(0.05)
+        started = time.monotonic()
+        bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - started, 0.045)
+
+
+class Client:
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.deleted = []
+
+    def chat_delete(self, channel, ts):
+        self.deleted.append(ts)
+        if ts in self.failing:
+            raise SlackApiError('cant_delete_message', {'error': 'cant_delete_message'})
+
+
+class TestBulkDeleter(unittest.TestCase):
+
+    def setUp(self):
+        self.messages = [{'ts': f'{number}.0'} for number in range(20, 0, -1)]
+        self.interrupt = None
+        for patcher in (mock.patch.object(bulk_delete, 'PAGE_SIZE', 3),
+                        mock.patch.object(bulk_delete.message_index, 'forget')):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def history(self, channel_id, latest=None, limit=None):
+        if latest is not None and latest == self.interrupt:
+            self.interrupt = None
+            raise ConnectionError('history unavailable')
+        return [message for message in self.messages
+                if latest is None or float(message['ts']) < float(latest)][:limit]
+
+    def deleter(self, client):
+        return bulk_delete.BulkDeleter(client, self.history, rate=1000, burst=1000, progress=lambda report: None)
+
+    def test_deletes_until_the_first_kept_message(self):
+        client = Client()
+        report = self.deleter(client).run('C1', lambda message: float(message['ts']) > 12)
+        self.assertEqual(report['deleted'], 8)
+        self.assertEqual(sorted(client.deleted, key=float), [f'{number}.0' for number in range(13, 21)])
+
+    def test_resume_retries_the_messages_that_failed(self):
+        client = Client(failing={'16.0'})
+        deleter = self.deleter(client)
+        self.interrupt = '15.0'
+        with self.assertRaises(ConnectionError):
+            deleter.run('C1', lambda message: True)
+        # the checkpoint stays before the message that could not be deleted
+        self.assertEqual(deleter.checkpoint('C1'), '17.0')
+        client.failing.clear()
+        deleter.run('C1', lambda message: True, resume=True)
+        self.assertEqual(client.deleted.count('16.0'), 2)
+        self.assertNotIn('17.0', client.deleted[6:])
+        self.assertIsNone(deleter.checkpoint('C1'))
+
+    def test_checkpoint_is_only_used_when_resuming(self):
+        client = Client()
+        deleter = self.deleter(client)
+        self.interrupt = '15.0'
+        with self.assertRaises(ConnectionError):
+            deleter.run('C1', lambda message: True)
+        self.assertIsNone(self.deleter(client).checkpoint('C1'))
+        deleter.run('C1', lambda message: True)
+        self.assertEqual(client.deleted.count('20.0'), 2)
+
+    def test_failed_history_page_interrupts_the_run(self):
+        client = Client()
+        pages = iter([{'ok': True, 'messages': self.messages[:3], 'has_more': True}])
+
+        def conversations_history(method, **kwargs):
+            page = next(pages, None)
+            if page is None:
+                raise SlackApiError('ratelimited', {'ok': False, 'error': 'ratelimited'})
+            return page
+
+        deleter = self.deleter(client)
+        deleter.history = functools.partial(slack_todo.iter_history, raise_errors=True)
+        with mock.patch.object(slack_todo, '_call', conversations_history):
+            with self.assertRaises(SlackApiError):
+                deleter.run('C1', lambda message: True)
+        # the run can be resumed after the last page it read
+        self.assertEqual(deleter.checkpoint('C1'), '18.0')
+        self.assertEqual(deleter.report()['deleted'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import unittest
+from unittest import mock
+from dev_slack import cache
+from dev_slack.cache import TTLCache
+
+
+class TestTTLCache(unittest.TestCase):
+
+    def test_least_recently_used_entry_is_evicted(self):
+        entries = TTLCache(maxsize=2)
+        entries.set('a', 1)
+        entries.set('b', 2)
+        self.assertEqual(entries.get('a'), 1)
+        entries.set('c', 3)
+        self.assertIsNone(entries.get('b'))
+        self.assertEqual((entries.get('a'), entries.get('c')), (1, 3))
+
+    def test_entries_expire(self):
+        entries = TTLCache(ttl=10)
+        with mock.patch.object(cache.time, 'monotonic', return_value=100):
+            entries.set('a', 1)
+        with mock.patch.object(cache.time, 'monotonic', return_value=109):
+            self.assertEqual(entries.get('a'), 1)
+        with mock.patch.object(cache.time, 'monotonic', return_value=110):
+            self.assertIsNone(entries.get('a'))
+            self.assertEqual(entries.get('a', 'missing'), 'missing')
+
+    def test_pop(self):
+        entries = TTLCache()
+        entries.set('a', 1)
+        self.assertEqual(entries.pop('a'), 1)
+        self.assertIsNone(entries.pop('a'))
+        self.assertEqual(entries.pop('a', 'missing'), 'missing')
+
+    def test_stats(self):
+        entries = TTLCache(maxsize=4)
+        entries.set('a', 1)
+        entries.get('a')
+        entries.get('b')
+        self.assertEqual(entries.stats(), {'size': 1, 'maxsize': 4, 'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+        entries.clear()
+        self.assertEqual(len(entries), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
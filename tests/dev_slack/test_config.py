@@ -0,0 +1,18 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import unittest
+from unittest import mock
+from dev_slack import config
+
+
+class TestLoad(unittest.TestCase):
+
+    def test_env_file_is_loaded_once(self):
+        with mock.patch.object(config, '_loaded', False), mock.patch.object(config, 'load_dotenv') as load_dotenv:
+            self.assertTrue(config.load())
+            self.assertTrue(config.load())
+        load_dotenv.assert_called_once_with()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+from urllib.parse import urlencode
+from slack_sdk.signature import SignatureVerifier
+from dev_slack import dedup
+
+SECRET = 'test-secret'
+
+
+def signed_headers(body, **extra):
+    timestamp = str(int(time.time()))
+    return {
+        'x-slack-request-timestamp': timestamp,
+        'x-slack-signature': SignatureVerifier(SECRET).generate_signature(timestamp=timestamp, body=body),
+        **extra,
+    }
+
+
+class TestDeliveryKey(unittest.TestCase):
+
+    def test_event(self):
+        body = json.dumps({'type': 'event_callback', 'event_id': 'Ev01'}).encode()
+        self.assertEqual(dedup.delivery_key(body), 'event:Ev01')
+
+    def test_interaction(self):
+        body = urlencode({'payload': json.dumps({'type': 'block_actions', 'trigger_id': '123.456'})}).encode()
+        self.assertEqual(dedup.delivery_key(body), 'block_actions:123.456')
+
+    def test_command(self):
+        body = urlencode({'command': '/status', 'trigger_id': '789.1'}).encode()
+        self.assertEqual(dedup.delivery_key(body), 'command:789.1')
+
+    def test_untracked_requests(self):
+        self.assertIsNone(dedup.delivery_key(json.dumps({'type': 'url_verification', 'challenge': 'x'}).encode()))
+        self.assertIsNone(dedup.delivery_key(b'\xff\xfe'))
+        self.assertIsNone(dedup.delivery_key(urlencode({'payload': '{not json'}).encode()))
+
+
+class TestClaim(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'deliveries.sqlite3')
+        self.log = dedup.DeliveryLog(self.path, ttl=60)
+        for patcher in (mock.patch.object(dedup, '_seen', self.log),
+                        mock.patch.dict(os.environ, {'SLACK_SECRET': SECRET})):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.body = json.dumps({'type': 'event_callback', 'event_id': 'Ev02'}).encode()
+
+    def test_retry_of_a_delivery_in_progress_is_a_duplicate(self):
+        self.assertEqual(dedup.claim(self.body, signed_headers(self.body)), ('event:Ev02', False))
+        retry = signed_headers(self.body, **{'x-slack-retry-num': '1'})
+        self.assertEqual(dedup.claim(self.body, retry), ('event:Ev02', True))
+
+    def test_handled_delivery_stays_claimed(self):
+        key, _ = dedup.claim(self.body, signed_headers(self.body))
+        dedup.finish(key, 200)
+        self.assertTrue(dedup.claim(self.body, signed_headers(self.body))[1])
+
+    def test_failed_delivery_is_released(self):
+        for status_code in (None, 500):
+            key, duplicate = dedup.claim(self.body, signed_headers(self.body))
+            self.assertFalse(duplicate)
+            dedup.finish(key, status_code)
+
+    def test_unsigned_requests_are_not_claimed(self):
+        self.assertEqual(dedup.claim(self.body, {}), (None, False))
+        self.assertEqual(dedup.claim(self.body, {}), (None, False))
+
+    def test_claims_are_shared_by_the_workers(self):
+        dedup.claim(self.body, signed_headers(self.body))
+        # another worker opens the same file
+        self.assertFalse(dedup.DeliveryLog(self.path, ttl=60).add('event:Ev02'))
+
+    def test_claims_expire(self):
+        log = dedup.DeliveryLog(self.path, ttl=0)
+        self.assertTrue(log.add('event:Ev03'))
+        self.assertTrue(log.add('event:Ev03'))
+        self.assertEqual(len(log), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import os
+import tempfile
+import threading
+import unittest
+from dev_slack import file_lock
+
+
+class TestFileLock(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'locks', 'store.lock')
+
+    def test_creates_the_lock_file(self):
+        with file_lock.FileLock(self.path) as lock:
+            self.assertTrue(lock.locked())
+            self.assertTrue(os.path.exists(self.path))
+        self.assertFalse(lock.locked())
+
+    @unittest.skipIf(file_lock.fcntl is None, 'flock() is not available')
+    def test_excludes_other_holders_of_the_file(self):
+        # a second FileLock opens the file again, as another worker process would
+        first, second = file_lock.FileLock(self.path), file_lock.FileLock(self.path)
+        self.assertTrue(first.acquire())
+        self.assertFalse(second.acquire(blocking=False))
+        first.release()
+        self.assertTrue(second.acquire(blocking=False))
+        second.release()
+
+    def test_serializes_threads(self):
+        lock = file_lock.FileLock(self.path)
+        self.assertTrue(lock.acquire())
+        acquired = []
+        thread = threading.Thread(target=lambda: acquired.append(lock.acquire(blocking=False)))
+        thread.start()
+        thread.join()
+        self.assertEqual(acquired, [False])
+        lock.release()
+        self.assertTrue(lock.acquire(blocking=False))
+        lock.release()
+
+
+if __name__ == '__main__':
+    unittest.main()
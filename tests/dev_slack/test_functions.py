@@ -1,3 +1,56 @@
 #  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
 
-import unittest
\ No newline at end of file
+import json
+import os
+import tempfile
+import unittest
+from dev_slack import functions
+
+
+class TestRequestArchive(unittest.TestCase):
+
+    requests = {
+        '101/2024': {'name': 'Αίτηση ύδρευσης'},
+        '7/2023': {'name': 'Ανάπλαση πλατείας'},
+        '12/2023': {'name': 'αίτηση για την πλατεία'},
+    }
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'requests.json')
+        self.write(self.requests)
+        self.archive = functions.RequestArchive(self.path)
+
+    def write(self, data):
+        with open(self.path, 'w', encoding='utf-8') as file:
+            json.dump(data, file)
+        # a new modification time, as a later edit of the file would have
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_mtime_ns + 1000, stat.st_mtime_ns + 1000))
+
+    def options(self, query):
+        self.archive.refresh()
+        return [self.archive.options[key] for key in self.archive.index.search(query)]
+
+    def test_options_of_the_picker(self):
+        option, = self.options('101/2024')
+        self.assertEqual(option, {'text': {'type': 'plain_text', 'emoji': True, 'text': 'ΑΊΤΗΣΗ ΎΔΡΕΥΣΗΣ'},
+                                  'value': '101/2024'})
+
+    def test_names_are_searched_regardless_of_accents_and_case(self):
+        self.assertEqual([option['value'] for option in self.options('ΑΙΤΗΣ')], ['101/2024', '12/2023'])
+        self.assertEqual([option['value'] for option in self.options('πλατεια')], ['7/2023', '12/2023'])
+
+    def test_empty_query_lists_the_requests(self):
+        self.assertEqual([option['value'] for option in self.options('')], list(self.requests))
+
+    def test_archive_is_reloaded_when_the_file_changes(self):
+        records = self.archive.refresh().records
+        self.assertIs(self.archive.refresh().records, records)
+        self.write({'8/2024': {'name': 'Νέα αίτηση'}})
+        self.assertEqual([option['value'] for option in self.options('αιτηση')], ['8/2024'])
+
+
+if __name__ == '__main__':
+    unittest.main()
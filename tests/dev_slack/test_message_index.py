@@ -0,0 +1,68 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from dev_slack import message_index
+
+
+class TestMessageIndex(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'message_index.sqlite3')
+        self.legacy = os.path.join(directory.name, 'message_index.json')
+        self.index = message_index.MessageIndex(self.path, max_entries=3, legacy_path=self.legacy)
+
+    def test_lookup(self):
+        self.index.record('C1', '1.0', ['ONLINE', 'Status: ONLINE', ''])
+        self.index.record('C1', '2.0', ['ONLINE'])
+        self.assertEqual(self.index.lookup('C1', 'ONLINE'), '2.0')
+        self.assertEqual(self.index.lookup('C1', 'Status: ONLINE'), '1.0')
+        self.assertIsNone(self.index.lookup('C1', 'ONL'))
+        self.assertIsNone(self.index.lookup('C2', 'ONLINE'))
+
+    def test_prefix_lookup_returns_the_newest_message(self):
+        self.index.record('C1', '9.5', ['Report 1'])
+        self.index.record('C1', '10.25', ['Report 2'])
+        self.assertEqual(self.index.lookup('C1', 'Report', prefix=True), '10.25')
+        self.assertIsNone(self.index.lookup('C1', 'Other', prefix=True))
+
+    def test_forget(self):
+        self.index.record('C1', '1.0', ['a', 'b'])
+        self.index.record('C1', '2.0', ['c'])
+        self.index.forget('C1', '1.0')
+        self.assertEqual([self.index.lookup('C1', text) for text in 'abc'], [None, None, '2.0'])
+
+    def test_channels_are_trimmed(self):
+        with mock.patch.object(message_index, 'TRIM_EVERY', 1):
+            for number in range(5):
+                self.index.record('C1', f'{number}.0', [f'text {number}'])
+        self.assertEqual([self.index.lookup('C1', f'text {number}') for number in range(5)],
+                         [None, None, '2.0', '3.0', '4.0'])
+
+    def test_shared_by_the_workers(self):
+        self.index.record('C1', '1.0', ['posted by a worker'])
+        other = message_index.MessageIndex(self.path, legacy_path=self.legacy)
+        self.assertEqual(other.lookup('C1', 'posted by a worker'), '1.0')
+
+    def test_legacy_index_is_imported(self):
+        with open(self.legacy, 'w', encoding='utf-8') as file:
+            json.dump({'C1': {'old': '1.0', 'older': '0.5'}}, file)
+        self.assertEqual(self.index.lookup('C1', 'old'), '1.0')
+        self.assertEqual(self.index.lookup('C1', 'old', prefix=True), '1.0')
+
+    def test_replies_are_recorded_under_their_thread(self):
+        with mock.patch.object(message_index, 'index', self.index):
+            message_index.record('C1', '2.0', 'reply', thread_ts='1.0')
+            message_index.record('C1', '3.0', 'message', blocks=[{'type': 'section', 'text': {'text': 'first'}}])
+            self.assertIsNone(message_index.lookup('C1', 'reply'))
+            self.assertEqual(message_index.lookup('C1:1.0', 'reply'), '2.0')
+            self.assertEqual(message_index.lookup('C1', 'first'), '3.0')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import asyncio
+import inspect
+import unittest
+from unittest import mock
+from slack_sdk.errors import SlackApiError
+from slack_sdk.web import SlackResponse
+from dev_slack import metrics
+
+
+class MetricsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(metrics, '_registry', [])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestRender(MetricsTestCase):
+
+    def test_counter(self):
+        counter = metrics.Counter('clicks_total', 'Button clicks.', ('button',))
+        counter.inc(button='ΤΗΛΕΦΩΝΑ')
+        counter.inc(2, button='say "hi"')
+        self.assertEqual(metrics.render(), '# HELP clicks_total Button clicks.\n'
+                                           '# TYPE clicks_total counter\n'
+                                           'clicks_total{button="say \\"hi\\""} 2\n'
+                                           'clicks_total{button="ΤΗΛΕΦΩΝΑ"} 1\n')
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = metrics.Histogram('latency_seconds', 'Latency.', buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 3.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.render()[2:], ['latency_seconds_bucket{le="0.1"} 1',
+                                                  'latency_seconds_bucket{le="1"} 3',
+                                                  'latency_seconds_bucket{le="+Inf"} 4',
+                                                  'latency_seconds_sum 4.250000',
+                                                  'latency_seconds_count 4'])
+
+    def test_collector(self):
+        metrics.Collector(lambda: ['# TYPE queue_depth gauge', 'queue_depth 3'])
+        self.assertEqual(metrics.render(), '# TYPE queue_depth gauge\nqueue_depth 3\n')
+
+
+class TestObserveApi(MetricsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        for name in ('api_duration', 'api_requests', 'api_rate_limited'):
+            patcher = mock.patch.object(metrics, name, mock.Mock())
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_rate_limited_call(self):
+        response = SlackResponse(client=None, http_verb='POST', api_url='https://slack.com/api/chat.delete',
+                                 req_args={}, data={'ok': False, 'error': 'ratelimited'}, headers={},
+                                 status_code=429)
+        metrics.observe_api('chat.delete', 0.2, SlackApiError('ratelimited', response))
+        metrics.api_requests.inc.assert_called_once_with(method='chat.delete', status='ratelimited')
+        metrics.api_rate_limited.inc.assert_called_once_with(method='chat.delete')
+
+    def test_connection_error(self):
+        metrics.observe_api('views.open', 0.2, ConnectionResetError())
+        metrics.api_requests.inc.assert_called_once_with(method='views.open', status='ConnectionResetError')
+        metrics.api_duration.observe.assert_called_once_with(0.2, method='views.open')
+
+
+class TestTimed(MetricsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        for name, metric in (('listener_duration', metrics.Histogram('duration', 'Duration.', ('type', 'listener'))),
+                             ('listener_errors', metrics.Counter('errors', 'Errors.', ('type', 'listener')))):
+            patcher = mock.patch.object(metrics, name, metric)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_signature_is_kept(self):
+        @metrics.timed('action', 'request_arxeio')
+        def listener(ack, body, client):
+            return body
+
+        self.assertEqual(list(inspect.signature(listener).parameters), ['ack', 'body', 'client'])
+        self.assertEqual(listener(None, 'body', None), 'body')
+        self.assertIn('duration_count{type="action",listener="request_arxeio"} 1', metrics.render())
+
+    def test_errors_are_counted_and_raised(self):
+        @metrics.timed('view', 'search_archive')
+        async def listener(ack):
+            raise ValueError('bad view')
+
+        self.assertTrue(inspect.iscoroutinefunction(listener))
+        with self.assertRaises(ValueError):
+            asyncio.run(listener(None))
+        rendered = metrics.render()
+        self.assertIn('errors{type="view",listener="search_archive"} 1', rendered)
+        self.assertIn('duration_count{type="view",listener="search_archive"} 1', rendered)
+
+
+if __name__ == '__main__':
+    unittest.main()
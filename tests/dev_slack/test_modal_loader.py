@@ -0,0 +1,81 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import asyncio
+import unittest
+from unittest import mock
+from slack_sdk.errors import SlackApiError
+from dev_slack import modal_loader, modals
+
+OPENED = {'ok': True, 'view': {'id': 'V1', 'hash': 'h1'}}
+VIEW = {'type': 'modal', 'title': {'type': 'plain_text', 'text': 'ΤΗΛΕΦΩΝΑ'}, 'blocks': []}
+
+
+def build(value):
+    return {**VIEW, 'private_metadata': value}
+
+
+def fail():
+    raise FileNotFoundError('data/phones.txt')
+
+
+class TestOpenModal(unittest.TestCase):
+
+    def setUp(self):
+        self.client = mock.Mock()
+        self.client.views_open.return_value = OPENED
+        self.client.views_push.return_value = OPENED
+
+    def test_placeholder_then_update_with_hash(self):
+        view = modal_loader.open_modal(self.client, 'T1', 'ΤΗΛΕΦΩΝΑ', build, '101/2024').result(5)
+        self.assertEqual(view['private_metadata'], '101/2024')
+        self.client.views_open.assert_called_once_with(trigger_id='T1', view=modals.loading_view('ΤΗΛΕΦΩΝΑ'))
+        self.client.views_update.assert_called_once_with(view_id='V1', hash='h1', view=view)
+
+    def test_error_view_when_the_build_fails(self):
+        self.assertIsNone(modal_loader.open_modal(self.client, 'T1', 'ΤΗΛΕΦΩΝΑ', fail).result(5))
+        self.client.views_update.assert_called_once_with(view_id='V1', hash='h1', view=modals.error_view('ΤΗΛΕΦΩΝΑ'))
+
+    def test_push(self):
+        modal_loader.open_modal(self.client, 'T1', 'ΑΠΟΤΕΛΕΣΜΑΤΑ', build, 'x', push=True).result(5)
+        self.client.views_push.assert_called_once()
+        self.client.views_open.assert_not_called()
+
+    def test_stale_view_is_not_an_error(self):
+        self.client.views_update.side_effect = SlackApiError('hash_conflict', {'ok': False, 'error': 'hash_conflict'})
+        with self.assertLogs(modal_loader.logger, 'INFO') as logs:
+            modal_loader.open_modal(self.client, 'T1', 'ΤΗΛΕΦΩΝΑ', build, 'x').result(5)
+        self.assertEqual([record.levelname for record in logs.records], ['INFO'])
+
+    def test_expired_trigger_is_raised(self):
+        self.client.views_open.side_effect = SlackApiError('expired_trigger_id',
+                                                           {'ok': False, 'error': 'expired_trigger_id'})
+        with self.assertRaises(SlackApiError):
+            modal_loader.open_modal(self.client, 'T1', 'ΤΗΛΕΦΩΝΑ', build, 'x')
+        self.client.views_update.assert_not_called()
+
+
+class TestOpenModalAsync(unittest.TestCase):
+
+    def setUp(self):
+        self.client = mock.Mock()
+        for method in ('views_open', 'views_push', 'views_update'):
+            setattr(self.client, method, mock.AsyncMock(return_value=OPENED))
+
+    def test_placeholder_then_update_with_hash(self):
+        view = asyncio.run(modal_loader.open_modal_async(self.client, 'T1', 'ΤΗΛΕΦΩΝΑ', build, '101/2024'))
+        self.client.views_open.assert_awaited_once_with(trigger_id='T1', view=modals.loading_view('ΤΗΛΕΦΩΝΑ'))
+        self.client.views_update.assert_awaited_once_with(view_id='V1', hash='h1', view=view)
+
+    def test_error_view_when_the_build_fails(self):
+        self.assertIsNone(asyncio.run(modal_loader.open_modal_async(self.client, 'T1', 'ΤΗΛΕΦΩΝΑ', fail)))
+        self.client.views_update.assert_awaited_once_with(view_id='V1', hash='h1',
+                                                          view=modals.error_view('ΤΗΛΕΦΩΝΑ'))
+
+    def test_push(self):
+        asyncio.run(modal_loader.open_modal_async(self.client, 'T1', 'ΑΠΟΤΕΛΕΣΜΑΤΑ', build, 'x', push=True))
+        self.client.views_push.assert_awaited_once()
+        self.client.views_open.assert_not_awaited()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,87 @@
 #  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
 
-import unittest
\ No newline at end of file
+import json
+import os
+import tempfile
+import unittest
+from dev_slack import modals
+
+
+def texts(blocks):
+    return [block['text']['text'] for block in blocks if block['type'] == 'section']
+
+
+class TestChooseArchive(unittest.TestCase):
+
+    def test_requests_are_picked_as_the_user_types(self):
+        picker, = [block['accessory'] for block in modals.choose_archive()['blocks']
+                   if block.get('accessory', {}).get('type') == 'external_select']
+        self.assertEqual(picker['action_id'], 'archive_step_b')
+        self.assertEqual(picker['min_query_length'], 0)
+        self.assertNotIn('options', picker)
+
+
+class TestPaginateMeetings(unittest.TestCase):
+
+    data = {
+        '2024': {f'Meeting {number}': {'Place': 'Town hall', 'Topic': f'Topic {number}'} for number in range(5)},
+        '2023': {'Meeting A': {'Place': 'School'}},
+    }
+
+    def test_single_page(self):
+        self.assertEqual(modals.paginate_meetings(self.data, 97), [modals.format_data_for_slack(self.data)])
+
+    def test_pages_break_between_meetings(self):
+        pages = modals.paginate_meetings(self.data, 10)
+        self.assertEqual([len(page) for page in pages], [9, 9, 9])
+        for page in pages:
+            # every page starts with its year and ends with the divider of a meeting
+            self.assertEqual(page[0]['accessory']['type'], 'image')
+            self.assertEqual(page[-1], {'type': 'divider'})
+        self.assertEqual(texts(pages[1])[:2], ['*2024*', '_Meeting 2_'])
+        # a new year starts on the same page when its first meeting fits
+        self.assertEqual(texts(pages[2])[4:6], ['*2023*', '_Meeting A_'])
+        self.assertEqual([block for page in pages for block in page if block['type'] != 'section' or
+                          not block['text']['text'].startswith('*20')],
+                         [block for block in modals.format_data_for_slack(self.data)
+                          if block['type'] != 'section' or not block['text']['text'].startswith('*20')])
+
+    def test_oversized_meeting_is_split(self):
+        data = {'2024': {'Assembly': {f'Field {number}': number for number in range(25)}}}
+        pages = modals.paginate_meetings(data, 10)
+        self.assertTrue(all(len(page) <= 10 for page in pages))
+        for page in pages:
+            self.assertEqual(texts(page)[:2], ['*2024*', '_Assembly_'])
+        fields = [text for page in pages for text in texts(page) if text.startswith('*Field')]
+        self.assertEqual(fields, [f'*Field {number}:* {number}' for number in range(25)])
+        self.assertEqual(pages[-1][-1], {'type': 'divider'})
+
+    def test_empty(self):
+        self.assertEqual(modals.paginate_meetings({}, 10), [[]])
+
+
+class TestMeetingArchive(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'meetings.json')
+        with open(self.path, 'w', encoding='utf-8') as file:
+            json.dump(TestPaginateMeetings.data, file)
+        self.archive = modals.MeetingArchive(self.path, size=10)
+
+    def buttons(self, view):
+        actions = [block for block in view['blocks'] if block['type'] == 'actions']
+        return [(button['action_id'], button['value']) for button in actions[0]['elements']]
+
+    def test_navigation(self):
+        self.assertEqual(self.buttons(self.archive.page(0)), [('meetings_page_next', '1')])
+        self.assertEqual(self.buttons(self.archive.page(1)), [('meetings_page_prev', '0'), ('meetings_page_next', '2')])
+        self.assertEqual(self.buttons(self.archive.page(2)), [('meetings_page_prev', '1')])
+
+    def test_page_past_the_end(self):
+        self.assertIs(self.archive.page(99), self.archive.page(2))
+
+
+if __name__ == '__main__':
+    unittest.main()
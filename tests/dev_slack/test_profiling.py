@@ -0,0 +1,95 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from urllib.parse import urlencode
+from dev_slack import profiling
+
+EVENT = json.dumps({'type': 'event_callback', 'event': {'type': 'app_home_opened'}}).encode()
+
+
+class TestAuthorized(unittest.TestCase):
+
+    def test_admin_token(self):
+        with mock.patch.dict(os.environ, {'PROFILE_ADMIN_TOKEN': 'secret'}):
+            self.assertTrue(profiling.authorized('secret'))
+            self.assertFalse(profiling.authorized('guess'))
+            self.assertFalse(profiling.authorized(None))
+
+    def test_nobody_without_a_token(self):
+        with mock.patch.dict(os.environ, {'PROFILE_ADMIN_TOKEN': ''}):
+            self.assertFalse(profiling.authorized(''))
+
+
+class TestRequestKey(unittest.TestCase):
+
+    def test_tags(self):
+        action = {'type': 'block_actions', 'actions': [{'action_id': 'request_arxeio'}]}
+        view = {'type': 'view_submission', 'view': {'callback_id': 'search_archive'}}
+        self.assertEqual(profiling.request_key(EVENT), 'event-app_home_opened')
+        self.assertEqual(profiling.request_key(urlencode({'payload': json.dumps(action)}).encode()),
+                         'action-request_arxeio')
+        self.assertEqual(profiling.request_key(urlencode({'payload': json.dumps(view)}).encode()),
+                         'view-search_archive')
+        self.assertEqual(profiling.request_key(urlencode({'command': '/archive'}).encode()), 'command-archive')
+        self.assertEqual(profiling.request_key(b'{not json'), 'unknown')
+
+
+class TestSessions(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        for patcher in (mock.patch.object(profiling, 'PROFILE_DIR', directory.name),
+                        mock.patch.object(profiling, 'MAX_FILES', 2),
+                        mock.patch.dict(profiling._settings, {'enabled': True, 'rate': 1.0}),
+                        mock.patch.dict(profiling._counters, {name: 0 for name in profiling._counters})):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_sample_rate(self):
+        profiling.configure(rate=0)
+        self.assertIsNone(profiling.sample(EVENT))
+        profiling.configure(rate=5)
+        self.assertEqual(profiling.status()['rate'], 1.0)
+        self.assertEqual(profiling.sample(EVENT), 'event-app_home_opened')
+        profiling.configure(enabled=False)
+        self.assertIsNone(profiling.sample(EVENT))
+        self.assertEqual(profiling.status()['sampled'], 1)
+
+    def test_profile_is_saved_when_released(self):
+        session = profiling.start(EVENT)
+        self.assertIsNotNone(session)
+        # only one session runs at a time
+        self.assertIsNone(profiling.start(EVENT))
+        session.release()
+        self.assertEqual(len(profiling.profiles()), 1)
+        self.assertTrue(profiling.profiles()[0].endswith('-event-app_home_opened.prof'))
+        self.assertEqual((profiling.status()['saved'], profiling.status()['skipped']), (1, 1))
+
+    def test_oldest_profiles_are_removed(self):
+        for _ in range(3):
+            profiling.start(EVENT).release()
+        self.assertEqual(len(profiling.profiles()), 2)
+        self.assertEqual(profiling.status()['removed'], 1)
+
+    def test_listener_holds_the_session(self):
+        session = profiling.start(EVENT)
+        released = threading.Event()
+        token = profiling.current.set(session)
+        with profiling.ProfilingExecutor(max_workers=1) as executor:
+            future = executor.submit(released.wait, 5)
+            profiling.current.reset(token)
+            session.release()
+            self.assertEqual(profiling.profiles(), [])
+            released.set()
+            future.result()
+        self.assertEqual(len(profiling.profiles()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import threading
+import unittest
+from unittest import mock
+from dev_slack import report_digest
+
+
+def report(n):
+    a = [{'type': 'section', 'text': {'type': 'mrkdwn', 'text': '> *ΑΝΑΦΟΡΑ ΔΡΑΣΤΗΡΙΟΤΗΤΑΣ*'}},
+         {'type': 'section', 'block_id': 'user', 'text': {'type': 'mrkdwn', 'text': f'report {n}'}}]
+    b = [{'type': 'divider'}]
+    return a, b
+
+
+class TestMerge(unittest.TestCase):
+
+    def test_title_once_and_block_ids_numbered(self):
+        blocks = report_digest.merge([report(n)[0][1:] + report(n)[1] for n in range(2)])
+        self.assertEqual(blocks[0]['text']['text'], '> *ΑΝΑΦΟΡΑ ΔΡΑΣΤΗΡΙΟΤΗΤΑΣ* (2)')
+        self.assertEqual([block.get('block_id') for block in blocks[1:]], ['user-0', None, 'user-1', None])
+
+    def test_full_digest_fits_in_one_message(self):
+        entries = [[{'type': 'section'}, {'type': 'context'}, {'type': 'divider'}]] * report_digest.MAX_ENTRIES
+        self.assertLessEqual(len(report_digest.merge(entries)), report_digest.MAX_BLOCKS)
+
+
+class TestReportDigest(unittest.TestCase):
+
+    def setUp(self):
+        self.sent = []
+        self.updated = []
+        self.posted = threading.Event()
+        self.rolling_message_exists = True
+        for patcher in (mock.patch.object(report_digest.slack_todo, 'send_text', self.send_text),
+                        mock.patch.object(report_digest.slack_todo, 'update_ts', self.update_ts)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def send_text(self, txt, channel_id, blocks=None):
+        self.sent.append(blocks)
+        self.posted.set()
+        return f'{len(self.sent)}.0'
+
+    def update_ts(self, txt, channel_id, timestamp, blocks=None):
+        self.updated.append((timestamp, blocks))
+        return self.rolling_message_exists
+
+    def digest(self, **kwargs):
+        digest = report_digest.ReportDigest('C1', **kwargs)
+        self.addCleanup(digest.flush)
+        return digest
+
+    def test_post_mode_publishes_when_full(self):
+        digest = self.digest(window=60, size=3)
+        for n in range(2):
+            digest.add(*report(n))
+        self.assertEqual(self.sent, [])
+        digest.add(*report(2))
+        self.assertEqual(len(self.sent), 1)
+        self.assertEqual(self.sent[0][0]['text']['text'], '> *ΑΝΑΦΟΡΑ ΔΡΑΣΤΗΡΙΟΤΗΤΑΣ* (3)')
+        self.assertEqual(digest.stats(), {'pending': 0, 'reports': 3, 'posted': 1, 'updated': 0})
+
+    def test_timer_flushes_the_pending_reports(self):
+        digest = self.digest(window=0.05, size=10)
+        digest.add(*report(0))
+        self.assertTrue(self.posted.wait(2))
+        self.assertEqual(len(self.sent), 1)
+        self.assertEqual(digest.stats()['pending'], 0)
+
+    def test_flush_splits_more_than_max_entries(self):
+        digest = self.digest(window=60, size=report_digest.MAX_ENTRIES)
+        with mock.patch.object(digest, 'size', report_digest.MAX_ENTRIES + 5):
+            for n in range(report_digest.MAX_ENTRIES + 2):
+                digest.add(*report(n))
+            digest.flush()
+        self.assertEqual([len(blocks) for blocks in self.sent], [1 + 2 * report_digest.MAX_ENTRIES, 1 + 2 * 2])
+
+    def test_rolling_mode_updates_its_message_until_full(self):
+        digest = self.digest(window=60, size=1, rolling=True)
+        for n in range(report_digest.MAX_ENTRIES + 1):
+            digest.add(*report(n))
+        self.assertEqual(len(self.sent), 2)
+        self.assertEqual(len(self.updated), report_digest.MAX_ENTRIES - 1)
+        self.assertEqual({timestamp for timestamp, _ in self.updated}, {'1.0'})
+        self.assertEqual(self.updated[-1][1][0]['text']['text'],
+                         f'> *ΑΝΑΦΟΡΑ ΔΡΑΣΤΗΡΙΟΤΗΤΑΣ* ({report_digest.MAX_ENTRIES})')
+        self.assertEqual(self.sent[1][0]['text']['text'], '> *ΑΝΑΦΟΡΑ ΔΡΑΣΤΗΡΙΟΤΗΤΑΣ* (1)')
+
+    def test_rolling_message_is_posted_again_if_deleted(self):
+        digest = self.digest(window=60, size=1, rolling=True)
+        digest.add(*report(0))
+        self.rolling_message_exists = False
+        digest.add(*report(1))
+        self.assertEqual(len(self.sent), 2)
+        self.assertEqual(self.sent[1][0]['text']['text'], '> *ΑΝΑΦΟΡΑ ΔΡΑΣΤΗΡΙΟΤΗΤΑΣ* (2)')
+
+
+if __name__ == '__main__':
+    unittest.main()
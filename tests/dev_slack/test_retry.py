@@ -0,0 +1,76 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import socket
+import unittest
+from unittest import mock
+from urllib.error import URLError
+from slack_sdk.errors import SlackApiError
+from slack_sdk.web import SlackResponse
+from dev_slack import retry
+
+
+def api_error(status_code, error, headers=None):
+    response = SlackResponse(client=None, http_verb='POST', api_url='https://slack.com/api/test', req_args={},
+                             data={'ok': False, 'error': error}, headers=headers or {}, status_code=status_code)
+    return SlackApiError(error, response)
+
+
+class TestDelay(unittest.TestCase):
+
+    def setUp(self):
+        self.policy = retry.RetryPolicy(base_delay=1, max_delay=8)
+
+    def test_rate_limit_waits_for_retry_after(self):
+        self.assertEqual(self.policy.delay(api_error(429, 'ratelimited', {'Retry-After': '7'}), 0), 7.0)
+        self.assertEqual(self.policy.delay(api_error(200, 'ratelimited'), 0), 1.0)
+
+    def test_client_errors_are_not_retried(self):
+        self.assertIsNone(self.policy.delay(api_error(200, 'channel_not_found'), 0))
+        self.assertIsNone(self.policy.delay(api_error(403, 'not_allowed'), 0))
+
+    def test_backoff_is_capped(self):
+        for attempt, most in ((0, 1), (2, 4), (10, 8)):
+            for _ in range(20):
+                self.assertTrue(0 <= self.policy.delay(TimeoutError(), attempt) <= most)
+        self.assertIsNotNone(self.policy.delay(api_error(503, 'service_unavailable'), 0))
+
+    def test_non_idempotent_calls(self):
+        self.assertIsNone(self.policy.delay(TimeoutError(), 0, idempotent=False))
+        self.assertIsNone(self.policy.delay(api_error(503, 'service_unavailable'), 0, idempotent=False))
+        self.assertIsNone(self.policy.delay(URLError(ConnectionResetError()), 0, idempotent=False))
+        self.assertEqual(self.policy.delay(api_error(429, 'ratelimited', {'Retry-After': '2'}), 0, idempotent=False), 2.0)
+        self.assertIsNotNone(self.policy.delay(URLError(ConnectionRefusedError()), 0, idempotent=False))
+        self.assertIsNotNone(self.policy.delay(URLError(socket.gaierror()), 0, idempotent=False))
+
+
+class TestCall(unittest.TestCase):
+
+    def setUp(self):
+        self.policy = retry.RetryPolicy(max_attempts=3, base_delay=0, max_delay=0)
+        patcher = mock.patch.object(retry.time, 'sleep')
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_retries_until_success(self):
+        function = mock.Mock(side_effect=[TimeoutError(), api_error(502, 'bad_gateway'), 'ok'])
+        self.assertEqual(self.policy.call('test_success', function, channel='C1'), 'ok')
+        self.assertEqual(function.call_count, 3)
+        function.assert_called_with(channel='C1')
+        self.assertEqual(retry.stats()['test_success'], {'retries': 2, 'giveups': 0})
+
+    def test_gives_up(self):
+        function = mock.Mock(side_effect=TimeoutError())
+        with self.assertRaises(TimeoutError):
+            self.policy.call('test_giveup', function)
+        self.assertEqual(function.call_count, 3)
+        self.assertEqual(retry.stats()['test_giveup'], {'retries': 2, 'giveups': 1})
+
+    def test_posts_are_not_repeated_after_a_timeout(self):
+        function = mock.Mock(side_effect=[TimeoutError(), 'ok'])
+        with self.assertRaises(TimeoutError):
+            self.policy.call('chat_postMessage', function)
+        self.assertEqual(function.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
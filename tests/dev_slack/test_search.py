@@ -0,0 +1,63 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from dev_slack import functions, search
+
+
+class TestArchiveSearch(unittest.TestCase):
+
+    requests = {
+        '101/2024': {'name': 'Αίτηση ύδρευσης', 'municipality_d': 'Εγκρίθηκε', 'onedrive_pin_a': '4321'},
+        '102/2024': {'name': 'Ανάπλαση πλατείας', 'management_a': 'Ύδρευση 01/02'},
+    }
+    meetings = {'2023': {'Τακτική Γενική Συνέλευση': {'Θέμα': 'Ύδρευση οικισμού'}}}
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.requests_path = os.path.join(directory.name, 'requests.json')
+        self.meetings_path = os.path.join(directory.name, 'meetings.json')
+        self.write(self.requests_path, self.requests)
+        self.write(self.meetings_path, self.meetings)
+        patcher = mock.patch.object(functions, 'archive', functions.RequestArchive(self.requests_path))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.search = search.ArchiveSearch(self.meetings_path)
+
+    @staticmethod
+    def write(path, data):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(data, file)
+        # a new modification time, as a later edit of the file would have
+        os.utime(path, ns=(os.stat(path).st_mtime_ns + 1000, os.stat(path).st_mtime_ns + 1000))
+
+    def test_requests_and_meetings(self):
+        results = self.search.search('υδρευση')
+        self.assertEqual([(result['kind'], result['title']) for result in results], [
+            ('request', 'Αίτηση ύδρευσης'), ('meeting', 'Τακτική Γενική Συνέλευση'), ('request', 'Ανάπλαση πλατείας')])
+        self.assertEqual(results[1]['year'], '2023')
+        self.assertEqual(results[2]['details'], ['ΣΥΝΕΛΕΥΣΗ ΔΣ: Ύδρευση 01/02'])
+
+    def test_protocol_number_comes_first(self):
+        self.assertEqual(self.search.search('102/2024')[0]['key'], '102/2024')
+
+    def test_pins_are_not_searchable(self):
+        self.assertEqual(self.search.search('4321'), [])
+
+    def test_changed_files_are_indexed_again(self):
+        self.search.search('υδρευση')
+        self.write(self.requests_path, {'101/2024': self.requests['101/2024']})
+        self.write(self.meetings_path, {})
+        self.assertEqual([result['key'] for result in self.search.search('υδρευση')], ['101/2024'])
+
+    def test_missing_meetings_file(self):
+        results = search.ArchiveSearch(self.meetings_path + '.missing').search('συνελευση')
+        self.assertEqual([result['kind'] for result in results], ['request'])
+
+
+if __name__ == '__main__':
+    unittest.main()
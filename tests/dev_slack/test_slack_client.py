@@ -0,0 +1,137 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import http.client
+import http.server
+import json
+import threading
+import unittest
+from unittest import mock
+from slack_sdk.errors import SlackApiError
+from dev_slack import slack_client
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        server = self.server
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        server.paths.append(self.path)
+        status, headers = 200, {}
+        if self.path.endswith('/chat.delete'):
+            status, headers = 429, {'Retry-After': '7'}
+        data = json.dumps({'ok': status == 200, 'error': None if status == 200 else 'ratelimited',
+                           'path': self.path}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+        # the server drops the kept-alive connection without telling the client, as after an idle timeout
+        self.close_connection = server.drop
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ServerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.paths = []
+        self.server.drop = False
+        threading.Thread(target=self.server.serve_forever, args=(0.01,), daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.host = f'127.0.0.1:{self.server.server_address[1]}'
+        self.pool = slack_client.ConnectionPool(self.host, size=2, scheme='http')
+        self.addCleanup(self.pool.close)
+
+    def post(self, path='/api/api.test', **kwargs):
+        status, headers, reason, body = self.pool.request('POST', path, b'{}', {'Content-Type': 'application/json'},
+                                                          **kwargs)
+        return status, json.loads(body)
+
+
+class TestConnectionPool(ServerTestCase):
+
+    def test_connection_is_reused(self):
+        for _ in range(3):
+            self.assertEqual(self.post()[0], 200)
+        stats = self.pool.stats()
+        self.assertEqual((stats['requests'], stats['created'], stats['reused'], stats['idle']), (3, 1, 2, 1))
+
+    def test_idle_connection_expires(self):
+        self.post()
+        with mock.patch.object(slack_client.time, 'monotonic', return_value=slack_client.time.monotonic() + 61):
+            self.post()
+        stats = self.pool.stats()
+        self.assertEqual((stats['created'], stats['reused'], stats['discarded']), (2, 0, 1))
+
+    def test_stale_connection_is_replaced(self):
+        self.server.drop = True
+        self.post()
+        self.assertEqual(self.post('/api/conversations.history'), (200, {'ok': True, 'error': None,
+                                                                        'path': '/api/conversations.history'}))
+        stats = self.pool.stats()
+        self.assertEqual((stats['created'], stats['discarded'], stats['errors']), (2, 1, 0))
+
+    def test_request_is_not_sent_again_once_it_may_have_reached_the_server(self):
+        stale = mock.Mock()
+        stale.getresponse.side_effect = http.client.RemoteDisconnected('Remote end closed connection')
+        self.pool._idle.append((stale, slack_client.time.monotonic()))
+        with self.assertRaises(http.client.RemoteDisconnected):
+            self.post('/api/chat.postMessage', replay=False)
+        stale.close.assert_called_once_with()
+        self.assertEqual(self.server.paths, [])
+        self.assertEqual(self.pool.stats()['errors'], 1)
+
+    def test_request_that_was_not_sent_is_sent_again(self):
+        stale = mock.Mock()
+        stale.request.side_effect = http.client.CannotSendRequest()
+        self.pool._idle.append((stale, slack_client.time.monotonic()))
+        self.assertEqual(self.post('/api/chat.postMessage', replay=False)[0], 200)
+        stale.close.assert_called_once_with()
+        self.assertEqual(self.server.paths, ['/api/chat.postMessage'])
+
+
+class TestPooledWebClient(ServerTestCase):
+    """
+    The transport of PooledWebClient overrides a private method of slack_sdk's BaseClient, these tests
+    fail if an upgrade of slack_sdk stops routing the calls through it.
+    """
+
+    def client(self):
+        return slack_client.PooledWebClient(self.pool, token='xoxb-test', base_url=f'http://{self.host}/api/')
+
+    def test_calls_are_sent_on_the_pool(self):
+        client = self.client()
+        self.assertEqual(client.api_test()['path'], '/api/api.test')
+        self.assertEqual(client.conversations_history(channel='C1')['path'], '/api/conversations.history')
+        self.assertEqual((self.pool.stats()['requests'], self.pool.stats()['reused']), (2, 1))
+
+    def test_http_errors_are_raised_as_slack_errors(self):
+        with self.assertRaises(SlackApiError) as context:
+            self.client().chat_delete(channel='C1', ts='1.0')
+        self.assertEqual(context.exception.response.status_code, 429)
+        self.assertEqual(context.exception.response.headers['Retry-After'], '7')
+        self.assertEqual(self.pool.stats()['requests'], 1)
+
+    def test_posts_are_not_replayed(self):
+        client = self.client()
+        with mock.patch.object(self.pool, 'request', wraps=self.pool.request) as request:
+            client.chat_postMessage(channel='C1', text='ΔΗΜΟΣΙΕΥΜΑ')
+            client.conversations_history(channel='C1')
+        self.assertEqual([call.kwargs['replay'] for call in request.call_args_list], [False, True])
+
+    def test_other_hosts_use_urllib(self):
+        client = self.client()
+        client.pool = slack_client.ConnectionPool('files.slack.com', scheme='http')
+        self.assertEqual(client.api_test()['path'], '/api/api.test')
+        self.assertEqual(client.pool.stats()['requests'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import asyncio
+import unittest
+from unittest import mock
+from slack_sdk.errors import SlackApiError
+from slack_sdk.web import SlackResponse
+from dev_slack import slack_todo_async
+
+
+def api_error(error):
+    response = SlackResponse(client=None, http_verb='POST', api_url='https://slack.com/api/test', req_args={},
+                             data={'ok': False, 'error': error}, headers={}, status_code=200)
+    return SlackApiError(error, response)
+
+
+class TestSlackTodoAsync(unittest.TestCase):
+
+    def setUp(self):
+        self.client = mock.Mock()
+        self.client.chat_postMessage = mock.AsyncMock(return_value={'ok': True, 'ts': '10.0'})
+        self.client.chat_delete = mock.AsyncMock(return_value={'ok': True})
+        self.client.conversations_history = mock.AsyncMock(side_effect=[
+            {'messages': [{'ts': '3.0', 'text': 'ΑΛΛΟ'}, {'ts': '2.0', 'text': 'ONLINE OFFLINE 2'}],
+             'has_more': True, 'response_metadata': {'next_cursor': 'page-2'}},
+            {'messages': [{'ts': '1.0', 'text': 'ONLINE OFFLINE 1'}], 'has_more': False},
+        ])
+        self.index = mock.Mock()
+        self.index.lookup.return_value = None
+        for patcher in (mock.patch.object(slack_todo_async.slack_client, 'get_async_client', return_value=self.client),
+                        mock.patch.object(slack_todo_async, 'message_index', self.index)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_send_text_returns_and_records_the_timestamp(self):
+        blocks = [{'type': 'section', 'text': {'type': 'mrkdwn', 'text': 'ΔΗΜΟΣΙΕΥΜΑ'}}]
+        self.assertEqual(asyncio.run(slack_todo_async.send_text('ΔΗΜΟΣΙΕΥΜΑ', 'C1', blocks)), '10.0')
+        self.assertEqual(self.client.chat_postMessage.await_args.kwargs['channel'], 'C1')
+        self.index.record.assert_called_once_with('C1', '10.0', 'ΔΗΜΟΣΙΕΥΜΑ', blocks)
+
+    def test_send_text_returns_none_when_not_posted(self):
+        self.client.chat_postMessage.side_effect = api_error('not_in_channel')
+        self.assertIsNone(asyncio.run(slack_todo_async.send_text('ΔΗΜΟΣΙΕΥΜΑ', 'C1')))
+        self.index.record.assert_not_called()
+
+    def test_history_pages_are_fetched_lazily(self):
+        async def first_two():
+            return [message['ts'] async for message in slack_todo_async.iter_history('C1', limit=2)]
+
+        self.assertEqual(asyncio.run(first_two()), ['3.0', '2.0'])
+        self.assertEqual(self.client.conversations_history.await_count, 1)
+
+    def test_lookup_falls_back_to_the_history(self):
+        self.assertEqual(asyncio.run(slack_todo_async.get_from_text_history('C1', 'ONLINE OFFLINE')), '2.0')
+        self.index.lookup.return_value = '7.0'
+        self.assertEqual(asyncio.run(slack_todo_async.get_from_text_history('C1', 'ONLINE OFFLINE')), '7.0')
+        self.assertEqual(self.client.conversations_history.await_count, 1)
+
+    def test_delete_with_specific_text_uses_the_index_first(self):
+        self.index.lookup.return_value = '7.0'
+        asyncio.run(slack_todo_async.delete_with_specific_text('C1', 'ONLINE OFFLINE'))
+        self.client.chat_delete.assert_awaited_once_with(channel='C1', ts='7.0')
+        self.index.forget.assert_called_once_with('C1', '7.0')
+        self.client.conversations_history.assert_not_awaited()
+
+    def test_missing_message_is_forgotten(self):
+        self.client.chat_delete.side_effect = api_error('message_not_found')
+        self.assertFalse(asyncio.run(slack_todo_async.delete('C1', '7.0')))
+        self.index.forget.assert_called_once_with('C1', '7.0')
+
+
+if __name__ == '__main__':
+    unittest.main()
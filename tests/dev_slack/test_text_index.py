@@ -0,0 +1,112 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import unittest
+from dev_slack import text_index
+
+
+class TestNormalize(unittest.TestCase):
+
+    def test_accents_and_case_are_folded(self):
+        self.assertEqual(text_index.normalize('Αίτηση'), 'αιτηση')
+        self.assertEqual(text_index.normalize('ΑΙΤΗΣΗ'), 'αιτηση')
+        self.assertEqual(text_index.normalize('Café'), 'cafe')
+
+    def test_final_sigma_matches_sigma(self):
+        self.assertEqual(text_index.normalize('Ελλάς'), text_index.normalize('ΕΛΛΑΣ'))
+
+    def test_punctuation_separates_words(self):
+        self.assertEqual(text_index.words('101/2024 Αίτηση, ύδρευσης'), ['101', '2024', 'αιτηση', 'υδρευσησ'])
+
+
+class TestTrigramIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = text_index.TrigramIndex([
+            ('101/2024', '101/2024 Αίτηση ύδρευσης'),
+            ('7/2023', '7/2023 Ανάπλαση πλατείας'),
+            ('12/2023', '12/2023 Αίτηση για την πλατεία'),
+            ('3/2022', '3/2022 Καθαριότητα'),
+        ])
+
+    def test_empty_query_returns_the_first_keys(self):
+        self.assertEqual(self.index.search('', limit=2), ['101/2024', '7/2023'])
+
+    def test_word_start(self):
+        self.assertEqual(self.index.search('αιτ'), ['101/2024', '12/2023'])
+
+    def test_every_word_has_to_match(self):
+        self.assertEqual(self.index.search('Αίτηση πλατ'), ['12/2023'])
+
+    def test_inside_word(self):
+        self.assertEqual(self.index.search('λατ'), ['7/2023', '12/2023'])
+        self.assertEqual(self.index.search('ΔΡΕΥ'), ['101/2024'])
+
+    def test_word_start_ranks_before_inside(self):
+        index = text_index.TrigramIndex([('1', 'Ανάπλαση'), ('2', 'Πλατεία')])
+        self.assertEqual(index.search('πλα'), ['2', '1'])
+
+    def test_short_terms_only_match_word_starts(self):
+        self.assertEqual(self.index.search('ρι'), [])
+        self.assertEqual(self.index.search('κα'), ['3/2022'])
+
+    def test_exact_key_comes_first(self):
+        self.assertEqual(self.index.search('12/2023')[0], '12/2023')
+
+    def test_limit(self):
+        self.assertEqual(len(self.index.search('2023', limit=1)), 1)
+
+    def test_no_match(self):
+        self.assertEqual(self.index.search('ξξξ'), [])
+
+
+class TestInvertedIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = text_index.InvertedIndex()
+        self.index.add('water', (('Αίτηση ύδρευσης', 3), ('ΑΠΟΦΑΣΗ: εγκρίθηκε', 1)))
+        self.index.add('square', (('Ανάπλαση πλατείας', 3), ('ΘΕΜΑ: ύδρευση και φωτισμός', 1)))
+        self.index.add('lights', (('Φωτισμός οδών', 3),))
+
+    def ids(self, query, **kwargs):
+        return [doc_id for doc_id, _, _ in self.index.search(query, **kwargs)]
+
+    def test_title_outranks_detail(self):
+        self.assertEqual(self.ids('φωτισμος'), ['lights', 'square'])
+
+    def test_documents_with_every_word_come_first(self):
+        self.assertEqual(self.ids('υδρευση φωτισμος')[0], 'square')
+
+    def test_last_word_is_completed(self):
+        self.assertEqual(self.ids('αναπλ'), ['square'])
+        self.assertEqual(self.ids('αν', prefix=3), [])
+
+    def test_matched_words(self):
+        (_, score, matched), = self.index.search('εγκριθηκε')
+        self.assertGreater(score, 0)
+        self.assertEqual(matched, ['εγκριθηκε'])
+
+    def test_add_unchanged_document(self):
+        self.assertFalse(self.index.add('lights', (('Φωτισμός οδών', 3),)))
+        self.assertTrue(self.index.add('lights', (('Φωτισμός πάρκων', 3),)))
+        self.assertEqual(self.ids('παρκων'), ['lights'])
+        self.assertEqual(self.ids('οδων'), [])
+
+    def test_remove(self):
+        self.assertTrue(self.index.remove('lights'))
+        self.assertFalse(self.index.remove('lights'))
+        self.assertNotIn('lights', self.index)
+        self.assertEqual(self.ids('φωτισμος'), ['square'])
+        self.assertNotIn('οδων', self.index.postings)
+
+    def test_empty_query_or_index(self):
+        self.assertEqual(self.index.search('  '), [])
+        self.assertEqual(text_index.InvertedIndex().search('abc'), [])
+
+    def test_documents_without_words(self):
+        index = text_index.InvertedIndex()
+        index.add(1, (('', 1),))
+        self.assertEqual(index.search('abc'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+#  Copyright (c) Ioannis E. Kommas 2024. All Rights Reserved
+
+import asyncio
+import unittest
+from unittest import mock
+from dev_slack import user_cache
+from dev_slack.cache import TTLCache
+
+
+class TestUserCache(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(user_cache, '_users', TTLCache(maxsize=8))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = mock.Mock()
+        self.client.users_info.return_value = {'ok': True, 'user': {'id': 'U1', 'real_name': 'Γιάννης'}}
+
+    def test_users_info_is_called_once(self):
+        for _ in range(3):
+            self.assertEqual(user_cache.get_user(self.client, 'U1')['real_name'], 'Γιάννης')
+        self.client.users_info.assert_called_once_with(user='U1')
+        self.assertEqual((user_cache.stats()['hits'], user_cache.stats()['misses']), (2, 1))
+
+    def test_failures_are_not_cached(self):
+        self.client.users_info.return_value = {'ok': False}
+        self.assertIsNone(user_cache.get_user(self.client, 'U1'))
+        self.assertIsNone(user_cache.get_user(self.client, 'U1'))
+        self.assertEqual(self.client.users_info.call_count, 2)
+
+    def test_invalidate(self):
+        user_cache.get_user(self.client, 'U1')
+        user_cache.invalidate('U1')
+        user_cache.get_user(self.client, 'U1')
+        self.assertEqual(self.client.users_info.call_count, 2)
+
+    def test_async_lookups_share_the_cache(self):
+        client = mock.Mock()
+        client.users_info = mock.AsyncMock(return_value={'ok': True, 'user': {'id': 'U1'}})
+        self.assertEqual(asyncio.run(user_cache.get_user_async(client, 'U1')), {'id': 'U1'})
+        self.assertEqual(user_cache.get_user(self.client, 'U1'), {'id': 'U1'})
+        client.users_info.assert_awaited_once()
+        self.client.users_info.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()